@@ -0,0 +1,3 @@
+"""
+Tkinter/Matplotlib helpers for the measurement GUI.
+"""
@@ -0,0 +1,119 @@
+"""
+Incremental (blitted) live plotting for the sweep. All calls must be made from the Tk thread.
+"""
+import numpy as np
+
+
+def padded_limits(low, high, margin):
+    """
+    Limits around low..high with margin (fraction of the span) added on both sides.
+    """
+    span = high - low
+    if span == 0:
+        span = abs(low) * 0.1 or 1.0
+    return low - margin * span, high + margin * span
+
+
+class LivePlotUpdater:
+    def __init__(self, canvas, margin=0.3):
+        """
+        canvas: FigureCanvasTkAgg of the figure.
+        margin: headroom (fraction of the data span) left around the data when an axis is rescaled,
+                so the next points of the sweep usually fall inside the limits.
+        """
+        self.canvas = canvas
+        self.fig = canvas.figure
+        self.margin = margin
+        self.series = []  # (axes, artists, x column, y column)
+        self.background = None
+        self.animated = False
+        self.checked = 0  # number of records already checked against the axis limits
+        canvas.mpl_connect('draw_event', self.on_draw)
+
+    def add(self, axes, artists, x_column, y_column):
+        """
+        Plot y_column against x_column of the sweep records with the given artists (line, markers).
+        """
+        self.series.append((axes, artists, x_column, y_column))
+
+    def set_animated(self, animated):
+        for _, artists, _, _ in self.series:
+            for artist in artists:
+                artist.set_animated(animated)
+        self.animated = animated
+
+    def on_draw(self, event):
+        """
+        After any full redraw (rescale, resize, toolbar zoom) cache the new background and
+        draw the animated lines on top of it.
+        """
+        if not self.animated:
+            return
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_artists()
+
+    def draw_artists(self):
+        for _, artists, _, _ in self.series:
+            for artist in artists:
+                self.fig.draw_artist(artist)
+
+    def outside_limits(self, axes, xs, ys):
+        """
+        True if any finite (x, y) point lies outside the current limits of axes.
+        """
+        finite = np.isfinite(xs) & np.isfinite(ys)
+        if not finite.any():
+            return False
+        x_low, x_high = sorted(axes.get_xlim())
+        y_low, y_high = sorted(axes.get_ylim())
+        xs, ys = xs[finite], ys[finite]
+        return xs.min() < x_low or xs.max() > x_high or ys.min() < y_low or ys.max() > y_high
+
+    def rescale(self, axes, records):
+        """
+        Fit the limits of axes to all series drawn on it, with margin.
+        """
+        xs, ys = [], []
+        for series_axes, _, x_column, y_column in self.series:
+            if series_axes is axes:
+                x, y = records[x_column], records[y_column]
+                finite = np.isfinite(x) & np.isfinite(y)
+                xs.append(x[finite])
+                ys.append(y[finite])
+        xs, ys = np.concatenate(xs), np.concatenate(ys)
+        if len(xs):
+            axes.set_xlim(*padded_limits(xs.min(), xs.max(), self.margin))
+            axes.set_ylim(*padded_limits(ys.min(), ys.max(), self.margin))
+
+    def update(self, records):
+        """
+        Show the current sweep records, blitting unless an axis has to be rescaled.
+        """
+        if len(records) < self.checked:
+            self.checked = 0  # records were cleared for a new sweep
+        rescale_axes = []
+        for axes, artists, x_column, y_column in self.series:
+            xs, ys = records[x_column], records[y_column]
+            for artist in artists:
+                artist.set_data(xs, ys)
+            if axes not in rescale_axes and self.outside_limits(axes, xs[self.checked:], ys[self.checked:]):
+                rescale_axes.append(axes)
+        self.checked = len(records)
+
+        if not self.animated or rescale_axes or self.background is None:
+            for axes in rescale_axes:
+                self.rescale(axes, records)
+            self.set_animated(True)
+            self.canvas.draw()  # full redraw; on_draw caches the new background
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.canvas.blit(self.fig.bbox)
+
+    def finish(self):
+        """
+        Make the lines ordinary artists again, so full redraws and savefig include them.
+        """
+        self.set_animated(False)
+        self.background = None
+        self.checked = 0
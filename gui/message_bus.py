@@ -0,0 +1,100 @@
+"""
+Thread-safe message bus between the worker threads and the Tk GUI.
+"""
+import queue
+import time
+import tkinter as tk
+from collections import namedtuple
+
+from sweep.log import STATUS, WARNING, ERROR
+from sweep.profiler import GUI
+
+CALL = 'call'
+
+MessageEvent = namedtuple('MessageEvent', ['kind', 'text', 'data', 'timestamp'])
+
+
+class MessageBus:
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+
+    def post(self, text, kind=STATUS, **data):
+        """
+        Post a message from any thread. data holds structured fields (e.g. a step's readings).
+        """
+        self.queue.put(MessageEvent(kind, text, data, time.time()))
+
+    def call(self, function):
+        """
+        Run function() on the Tk thread, in order with the messages posted before it.
+        """
+        self.queue.put(MessageEvent(CALL, None, {'function': function}, time.time()))
+
+    def drain(self, max_events):
+        """
+        Return up to max_events queued events without blocking.
+        """
+        events = []
+        while len(events) < max_events:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+
+class TextFeed:
+    def __init__(self, root, text_widget, bus, interval=100, max_lines=2000, batch=500, profiler=None):
+        """
+        root: Tk root, used for the after() loop.
+        text_widget: tk.Text the messages are appended to.
+        bus: MessageBus to drain.
+        interval: time (ms) between drains.
+        max_lines: scrollback kept in the text widget.
+        batch: most events handled per drain, so one drain cannot stall the GUI.
+        profiler: SweepProfiler the feed updates are timed in, if any.
+        """
+        self.root = root
+        self.text = text_widget
+        self.bus = bus
+        self.interval = interval
+        self.max_lines = max_lines
+        self.batch = batch
+        self.profiler = profiler
+        self.text.tag_configure(WARNING, foreground='darkorange')
+        self.text.tag_configure(ERROR, foreground='red')
+
+    def start(self):
+        self.root.after(self.interval, self.poll)
+
+    def poll(self):
+        start = time.perf_counter()
+        events = self.bus.drain(self.batch)
+        chunk = []  # consecutive (text, tag) pieces inserted together
+        for event in events:
+            if event.kind == CALL:
+                self.write(chunk)
+                chunk = []
+                try:
+                    event.data['function']()
+                except Exception as e:
+                    chunk.append((f"Error in GUI update: {e}\n", ERROR))  # keep the feed running
+            else:
+                chunk.append((event.text + "\n", event.kind))
+        self.write(chunk)
+        if events and self.profiler is not None:
+            self.profiler.record(GUI, 'gui', 'message feed', time.perf_counter() - start)
+        self.root.after(self.interval, self.poll)
+
+    def write(self, chunk):
+        if not chunk:
+            return
+        args = []
+        for text, tag in chunk:
+            args.extend((text, tag))
+        self.text.insert(tk.END, *args)
+        # Bounded scrollback: drop the oldest lines
+        line_count = int(self.text.index('end-1c').split('.')[0])
+        if line_count > self.max_lines:
+            self.text.delete('1.0', f'{line_count - self.max_lines + 1}.0')
+        self.text.see(tk.END)
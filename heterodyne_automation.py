@@ -1,66 +1,48 @@
 import time
 import math
-import pyvisa
 import sys
+import argparse
 import numpy as np
-import openpyxl
-from openpyxl import Workbook
 import threading
-import re
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import mplcursors
 from matplotlib.figure import Figure
 from matplotlib.ticker import FuncFormatter
+from sweep.engine import SweepEngine, SweepConfig
+from sweep.journal import read_journal
+from sweep.export import export_journal
+from sweep.nested import parse_points
+from sweep.profiler import GUI
+from gui.live_plot import LivePlotUpdater
+from gui.message_bus import MessageBus, TextFeed, STATUS, ERROR
+from instruments.power_meters import POWER_METERS, DEFAULT_POWER_METER
 
 
 class MeasurementApp:
-    def __init__(self):
+    def __init__(self, resource_manager=None, power_meter=DEFAULT_POWER_METER, pause_after_search=False):
         """
         Initialize the application:
-         - Set up the VISA resource manager and list connected devices.
-         - Define VISA addresses for each instrument (ECL laser, wavelength meter, spectrum analyzer, Keithley, etc.).
-         - Initialize data containers and threading events.
-         - Create the main Tkinter window.
-        """
-        # Initialize the VISA resource manager and list connected devices (optional)
-        self.rm = pyvisa.ResourceManager()
-        print("Connected devices:", self.rm.list_resources())
-
-        # Define VISA addresses for the instruments
-        self.ecl_adapter_GPIB = 'GPIB0::10::INSTR'         # ECL laser (should be constant)
-        self.wavelength_meter_GPIB = 'GPIB0::20::INSTR'      # Wavelength meter
-        self.spectrum_analyzer_GPIB = 'GPIB0::18::INSTR'     # Spectrum analyzer
-        self.keithley_GPIB = 'GPIB0::24::INSTR'              # Keithley source meter
-        self.RS_power_sensor_GPIB = 'RSNRP::0x00a8::100940::INSTR'  # R&S power sensor
-        self.voa_GPIB = 'GPIB0::26::INSTR'                   # VOA
-
-        # Instrument objects (to be opened later)
-        self.ecl_adapter = None
-        self.wavelength_meter = None
-        self.spectrum_analyzer = None
-        self.keithley = None
-        self.RS_power_sensor = None
-        self.voa = None
-
-        # Data containers for measurements and calibration
-        self.steps = []
-        self.beat_freqs = []
-        self.laser_4_wavelengths = []
-        self.beat_freq_and_power = []  # List of tuples: (beat_freq, raw RF power, photocurrent, VOA P actual)
-        self.calibrated_rf = []
-        self.photo_currents = []
-        self.rf_loss = []
-        self.rf_probe_loss = []
-        self.rf_link_loss = []
-        self.powers = []
-        self.p_actuals = []
-        self.looping = False
-
-        # Threading events for controlling data collection and plot updates
-        self.stop_event = threading.Event()
-        self.data_ready_event = threading.Event()
+         - Create the acquisition engine, which sets up the VISA resource manager and the instrument addresses.
+           A resource manager can be passed in (e.g. instruments.simulated.SimulatedResourceManager)
+           to run without hardware; by default pyvisa.ResourceManager() is used.
+           power_meter selects the RF power meter driver ('nrp_z58' or 'ml2437a', see instruments/power_meters.py).
+         - Create the main Tkinter window. pause_after_search is the initial state of the
+           "Pause after initial search" option.
+        """
+        self.pause_after_search = pause_after_search
+        # Messages from the worker threads, shown by the Tk thread (see gui/message_bus.py)
+        self.messages = MessageBus()
+
+        # Acquisition engine: instrument sessions, sweep loop, records and journal (see sweep/engine.py)
+        self.engine = SweepEngine(resource_manager, log=self.update_message_feed, power_meter=power_meter)
+        self.rm = self.engine.rm
+
+        # Shared with the engine: sweep records for plotting and the stop/data-ready events
+        self.records = self.engine.records
+        self.stop_event = self.engine.stop_event
+        self.data_ready_event = self.engine.data_ready_event
 
         # Initialize main Tkinter window (full-screen, or "zoomed")
         self.root = tk.Tk()
@@ -75,8 +57,9 @@ class MeasurementApp:
         # Setup closing protocol and plot updating loop
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.root.after(100, self.update_plots)
-
-        self.open_instruments()
+        self.message_pump = TextFeed(self.root, self.message_feed, self.messages, profiler=self.engine.profiler)
+        self.message_pump.start()
+        # The instruments are connected on first use (see instruments/sessions.py)
 
     def create_gui(self):
         """
@@ -133,6 +116,62 @@ class MeasurementApp:
         self.delay_entry = ttk.Entry(self.input_frame, textvariable=self.delay_var)
         self.delay_entry.grid(row=6, column=1, padx=5, pady=5)
 
+        # Checkbox for adaptive settling (the delay above becomes an upper bound)
+        ttk.Label(self.input_frame, text="Adaptive Settle (Delay = Max Wait):").grid(row=7, column=0, padx=5, pady=5, sticky="e")
+        self.adaptive_settle_var = tk.BooleanVar(value=False)
+        self.adaptive_settle_checkbox = ttk.Checkbutton(self.input_frame, variable=self.adaptive_settle_var)
+        self.adaptive_settle_checkbox.grid(row=7, column=1, padx=5, pady=5, sticky="w")
+
+        # Sweep engine options
+        self.options_frame = ttk.LabelFrame(self.input_frame, text="Sweep Options")
+        self.options_frame.grid(row=10, column=0, columnspan=3, padx=5, pady=5, sticky="we")
+        self.pipelined_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.options_frame, text="Pipelined laser retune (retune before logging/plotting each step)",
+                        variable=self.pipelined_var).grid(row=0, column=0, padx=5, pady=2, sticky="w")
+        self.retune_during_averaging_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.options_frame, text="Retune during RF power averaging (averaging insensitive to retune)",
+                        variable=self.retune_during_averaging_var).grid(row=1, column=0, padx=5, pady=2, sticky="w")
+        self.esa_trace_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.options_frame, text="Trace-based ESA peak detection (zoom around predicted beat)",
+                        variable=self.esa_trace_var).grid(row=2, column=0, padx=5, pady=2, sticky="w")
+        self.tracking_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.options_frame, text="Predictive beat tracking (query one instrument per step)",
+                        variable=self.tracking_var).grid(row=3, column=0, padx=5, pady=2, sticky="w")
+        self.use_laser_cache_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self.options_frame, text="Start search from cached laser 4 calibration",
+                        variable=self.use_laser_cache_var).grid(row=4, column=0, padx=5, pady=2, sticky="w")
+        # Nested bias sweep: comma separated list or start:stop:count, empty for a plain frequency sweep
+        bias_frame = ttk.Frame(self.options_frame)
+        bias_frame.grid(row=5, column=0, padx=5, pady=2, sticky="w")
+        ttk.Label(bias_frame, text="Bias points (V), e.g. -1,-2 or -1:-5:5:").pack(side=tk.LEFT)
+        self.bias_points_var = tk.StringVar()
+        ttk.Entry(bias_frame, textvariable=self.bias_points_var, width=14).pack(side=tk.LEFT, padx=5)
+        # Nested VOA attenuation sweep (RF compression); start = end frequency and 1 step for a single beat frequency
+        attenuation_frame = ttk.Frame(self.options_frame)
+        attenuation_frame.grid(row=6, column=0, padx=5, pady=2, sticky="w")
+        ttk.Label(attenuation_frame, text="VOA attenuation points (dB), e.g. 0:10:11:").pack(side=tk.LEFT)
+        self.attenuation_points_var = tk.StringVar()
+        ttk.Entry(attenuation_frame, textvariable=self.attenuation_points_var, width=14).pack(side=tk.LEFT, padx=5)
+        # Keithley buffered readings: samples averaged per step and integration time
+        keithley_frame = ttk.Frame(self.options_frame)
+        keithley_frame.grid(row=8, column=0, padx=5, pady=2, sticky="w")
+        ttk.Label(keithley_frame, text="Keithley samples per step:").pack(side=tk.LEFT)
+        self.current_samples_var = tk.IntVar(value=5)
+        ttk.Entry(keithley_frame, textvariable=self.current_samples_var, width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(keithley_frame, text="NPLC:").pack(side=tk.LEFT)
+        self.current_nplc_var = tk.DoubleVar(value=1.0)
+        ttk.Entry(keithley_frame, textvariable=self.current_nplc_var, width=5).pack(side=tk.LEFT, padx=5)
+        self.nested_outer_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.options_frame, text="Bias/attenuation as outer loop (full frequency sweep per point)",
+                        variable=self.nested_outer_var).grid(row=7, column=0, padx=5, pady=2, sticky="w")
+        # Hold at the start frequency after the search until CONTINUE is pressed
+        self.pause_after_search_var = tk.BooleanVar(value=self.pause_after_search)
+        ttk.Checkbutton(self.options_frame, text="Pause after initial search (press CONTINUE to start the sweep)",
+                        variable=self.pause_after_search_var).grid(row=9, column=0, padx=5, pady=2, sticky="w")
+        self.adaptive_timeouts_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.options_frame, text="Adaptive VISA timeouts (learned from each instrument's response times)",
+                        variable=self.adaptive_timeouts_var).grid(row=10, column=0, padx=5, pady=2, sticky="w")
+
         # File selector for RF Link Loss (.s2p file) calibration
         ttk.Label(self.input_frame, text="RF Link Loss (.s2p):").grid(row=8, column=0, padx=5, pady=5, sticky="e")
         self.s2p_file_var = tk.StringVar()
@@ -152,8 +191,12 @@ class MeasurementApp:
         # Control buttons: Start, Stop, and Reset
         self.start_button = ttk.Button(self.input_frame, text="START", command=self.start_data_collection)
         self.start_button.grid(row=11, column=0, columnspan=2, pady=10)
+        self.resume_button = ttk.Button(self.input_frame, text="RESUME", command=self.start_resume)
+        self.resume_button.grid(row=11, column=2, pady=10)
         self.stop_button = ttk.Button(self.input_frame, text="STOP", command=self.on_stop)
         self.stop_button.grid(row=12, column=0, columnspan=2, pady=10)
+        self.continue_button = ttk.Button(self.input_frame, text="CONTINUE", command=self.engine.continue_after_pause)
+        self.continue_button.grid(row=12, column=2, pady=10)
         ttk.Label(self.input_frame, text="NOTE: This will only stop data collection during the frequency sweep").grid(row=13, column=0, columnspan=2, pady=2)
         self.cancel_button = ttk.Button(self.input_frame, text="RESET", command=self.on_cancel)
         self.cancel_button.grid(row=15, column=0, columnspan=2, pady=10)
@@ -242,6 +285,14 @@ class MeasurementApp:
         self.toolbar.update()
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
+        # Blitted updates while the sweep runs (full redraws only when an axis needs rescaling)
+        self.live_plot = LivePlotUpdater(self.canvas)
+        self.live_plot.add(self.ax1, [self.line1, self.markers1], 'step', 'beat_freq')
+        self.live_plot.add(self.ax2, [self.line2, self.markers2], 'step', 'laser_4_WL')
+        self.live_plot.add(self.ax3, [self.line3, self.markers3], 'beat_freq', 'raw_power')
+        self.live_plot.add(self.ax4, [self.line4, self.markers4], 'beat_freq', 'current')
+        self.live_plot.add(self.ax5, [self.line5, self.markers5], 'beat_freq', 'calibrated_rf')
+
         # Add hover functionality with mplcursors.
         mplcursors.cursor(self.markers1, hover=mplcursors.HoverMode.Transient)
         mplcursors.cursor(self.markers3, hover=mplcursors.HoverMode.Transient)
@@ -277,292 +328,17 @@ class MeasurementApp:
         if file_path:
             self.excel_file_var.set(file_path)
 
-    def update_message_feed(self, message: str):
-        """
-        Update the message feed in the GUI with the given message.
-        This is used to provide real-time feedback during the measurement process.
-        """
-        self.message_feed.insert(tk.END, message + "\n")
-        self.message_feed.see(tk.END)
-        self.root.update_idletasks()
-
-    def open_instruments(self):
-        """
-        Create VISA adapters with the connected equipment.
-        If connection fails, report the error to the message feed.
-        """
-        try:
-            self.ecl_adapter = self.rm.open_resource(self.ecl_adapter_GPIB)
-            self.wavelength_meter = self.rm.open_resource(self.wavelength_meter_GPIB)
-            self.spectrum_analyzer = self.rm.open_resource(self.spectrum_analyzer_GPIB)
-            self.keithley = self.rm.open_resource(self.keithley_GPIB)
-            self.RS_power_sensor = self.rm.open_resource(self.RS_power_sensor_GPIB)
-            self.voa = self.rm.open_resource(self.voa_GPIB)
-
-            self.RS_power_sensor.timeout = 15000
-            self.ecl_adapter.timeout = 5000
-            self.wavelength_meter.timeout = 5000
-            self.spectrum_analyzer.timeout = 5000
-            self.keithley.timeout = 5000
-            self.voa.timeout = 5000
-        
-            self.update_message_feed("Successfully connected to all VISA devices.")
-        except Exception as e:
-            self.update_message_feed(f"Error connecting to VISA devices: {e}")
-
-    def close_instruments(self):
-        try:
-            if self.ecl_adapter is not None:
-                self.ecl_adapter.close()
-                self.ecl_adapter = None
-            if self.wavelength_meter is not None:
-                self.wavelength_meter.close()
-                self.wavelength_meter = None
-            if self.spectrum_analyzer is not None:
-                self.spectrum_analyzer.close()
-                self.spectrum_analyzer = None
-            if self.keithley is not None:
-                self.keithley.close()
-                self.keithley = None
-            if self.RS_power_sensor is not None:
-                self.RS_power_sensor.close()
-                self.RS_power_sensor = None
-            if self.voa is not None:
-                self.voa.close()
-                self.voa = None
-            self.update_message_feed("Instruments closed successfully.")
-        except Exception as e:
-            self.update_message_feed(f"Error closing instruments: {e}")
-
-    def measure_peak_frequency(self):
-        """
-        Measure the peak frequency using the spectrum analyzer.
-        (Repeated measurements are taken and the minimum value is returned.)
-        """
-        try:
-            self.spectrum_analyzer.write('MKPK HI')
-            time.sleep(0.1)
-            peak_freq_1 = self.spectrum_analyzer.query('MKF?')
-            time.sleep(0.1)
-            self.spectrum_analyzer.write('MKPK HI')
-            time.sleep(0.1)
-            peak_freq_2 = self.spectrum_analyzer.query('MKF?')
-            time.sleep(0.1)
-            self.spectrum_analyzer.write('MKPK HI')
-            time.sleep(0.1)
-            peak_freq_3 = self.spectrum_analyzer.query('MKF?')
-            peak_freq = min(peak_freq_1, peak_freq_2, peak_freq_3)
-
-            self.spectrum_analyzer.write(":SENS:FREQ:SPAN 50GHz") # reset span to full span for next measurement
-            self.spectrum_analyzer.write(":SYSTem:LOCal")
-            return float(peak_freq) / 1e9  # Convert Hz to GHz
-        
-        except Exception as e:
-            self.update_message_feed(f"Error measuring peak frequency: {e}")
-            return None
-
-    def measure_wavelength_beat(self):
+    def update_message_feed(self, message: str, kind=STATUS, **data):
         """
-        Measure the beat frequency using the wavelength meter.
-        Initiates a single measurement and then calculates the difference between two frequency readings.
-        If the returned beat frequency is below a valid threshold (e.g. 50 GHz), or if nothing is returned,
-        return None so that the ESA measurement is used instead.
+        Post a message for the GUI message feed. Safe to call from any thread: the message is
+        queued on the message bus and shown by the Tk thread on its next drain.
+        kind is STATUS, WARNING, ERROR or STEP; data holds structured fields (e.g. a step's readings).
         """
-        try:
-            self.wavelength_meter.write(":INIT:IMM")
-            time.sleep(1.5)
-            result = self.wavelength_meter.query(":CALC3:DATA? FREQuency").strip()
-            # If the query returns an empty string, return None immediately.
-            if not result:
-                return None
-            data = result.split(',')
-            freqs = [float(f) for f in data]
-            beat_node = min(freqs)  # assuming the reference delta is 0
-            self.wavelength_meter.write(":SYSTem:LOCal")
-            beat_val = abs(beat_node / 1e9)  # Convert to GHz
-            if beat_val < 50:  # Threshold check
-                return None
-            return beat_val
-        except Exception as e:
-            self.update_message_feed(f"Error measuring beat frequency with wavelength meter: {e}")
-            return None
-
-    def zero_power_sensor(self):
-        try:
-            output_state = self.voa.query(":OUTPut:STATe?").strip()
-            if int(output_state) == 1:
-                self.update_message_feed("VOA is currently enabled, disable before zeroing power meter...")
-                raise Exception("VOA is enabled")
-            self.update_message_feed("Zeroing power sensor...")
-            # Assuming RS_power_sensor is your power meter:
-            self.RS_power_sensor.write('CAL:ZERO:AUTO ONCE')
-            time.sleep(10)  # wait 10 seconds for the zeroing process to complete
-            self.update_message_feed("Power sensor zeroing completed.")
-            self.voa.write(":SYSTem:LOCal")
-        except Exception as e:
-            self.update_message_feed(f"Error during power sensor zeroing: {e}")
-
-    def measure_rf_power(self, beat_freq, max_attempts=3):
-        """
-        Safely measure RF power at beat_freq. Returns dBm or None if all attempts time out.
-        """
-        for attempt in range(1, max_attempts+1):
-            try:
-                self.RS_power_sensor.write('INIT:CONT OFF')
-                self.RS_power_sensor.write('SENS:FUNC "POW:AVG"')
-                self.RS_power_sensor.write(f'SENS:FREQ {beat_freq}e9')
-                self.RS_power_sensor.write('SENS:AVER:COUN:AUTO ON')
-                self.RS_power_sensor.write('SENS:AVER:STAT ON')
-                self.RS_power_sensor.write('SENS:AVER:TCON REP')
-                self.RS_power_sensor.write('SENS:POW:AVG:APER 1e-1')
-                time.sleep(0.2)
-
-                readings = []
-                for _ in range(5):
-                    self.RS_power_sensor.write('INIT:IMM')
-                    output = self.RS_power_sensor.query('TRIG:IMM')
-                    watts = float(output.split(',')[0])
-                    readings.append(watts)
-                    time.sleep(0.1)
-
-                avg_watts = sum(readings) / len(readings)
-                return math.log10(avg_watts) * 10 + 30  # convert to dBm
-
-            except pyvisa.errors.VisaIOError:
-                self.update_message_feed(
-                    f"Power sensor timeout (attempt {attempt}/{max_attempts}), retrying..."
-                )
-                time.sleep(0.5)
-
-        self.update_message_feed(
-            "Power sensor unavailable after retries—continuing sweep without RF data."
-        )
-        return None
-
+        self.messages.post(message, kind, **data)
 
     def start_zeroing(self):
         # Launch the zeroing process in a separate thread
-        threading.Thread(target=self.zero_power_sensor, daemon=True).start()
-
-    def set_laser_wavelength(self, channel: int, wavelength: float):
-        """
-        Set the laser wavelength for the specified channel.
-        (This sends the command to the ECL laser via VISA.)
-        """
-        self.update_message_feed(f"Setting laser {channel} wavelength to {wavelength:.3f} nm...")
-        self.ecl_adapter.write(f"CH{channel}:L={wavelength:.3f}")
-
-    def read_excel_data(self, filepath: str):
-        """
-        Read the Excel file containing RF probe loss data.
-        Returns two numpy arrays: one for frequency and one for loss.
-        """
-        workbook = openpyxl.load_workbook(filepath)
-        sheet = workbook.active
-        frequency = []
-        loss = []
-        for row in sheet.iter_rows(min_row=1, max_col=2, values_only=True):
-            frequency.append(row[0])
-            loss.append(row[1])
-        return np.array(frequency), np.array(loss)
-
-    def read_s2p_file(self, filepath: str):
-        """
-        Read the .s2p file containing network analyzer data.
-        Extracts frequency and S-parameter (S12 and S21) data and returns the averaged loss.
-        """
-        frequencies = []
-        s12 = []
-        s21 = []
-        with open(filepath, 'r') as file:
-            lines = file.readlines()
-        freq_unit = 'hz'
-        data_format = 'db'
-        for line in lines:
-            if line.startswith('#'):
-                parts = line.split()
-                for part in parts:
-                    if part.lower() in ['hz', 'khz', 'mhz', 'ghz']:
-                        freq_unit = part.lower()
-                    elif part.lower() in ['ri', 'db', 'ma']:
-                        data_format = part.upper()
-                continue
-            if not line.startswith('!') and not line.startswith('#'):
-                values = re.split(r'\s+', line.strip())
-                if len(values) >= 9:
-                    frequencies.append(float(values[0]))
-                    s21.append(float(values[3]))  # S21 in dB
-                    s12.append(float(values[5]))  # S12 in dB
-        frequencies = np.array(frequencies)
-        s_avg = (np.array(s12) + np.array(s21)) / 2
-        if freq_unit == 'khz':
-            frequencies = frequencies / 1e6
-        elif freq_unit == 'mhz':
-            frequencies = frequencies / 1e3
-        elif freq_unit == 'hz':
-            frequencies = frequencies / 1e9
-        return frequencies, s_avg
-
-    def custom_linear_interpolation(self, x, y, x_new):
-        x = np.asarray(x)
-        y = np.asarray(y)
-        x_new = np.asarray(x_new)
-        y_new = np.zeros_like(x_new)
-        for i, xi in enumerate(x_new):
-            if xi <= x[0]:
-                y_new[i] = y[0]
-            elif xi >= x[-1]:
-                y_new[i] = y[-1]
-            else:
-                k = np.searchsorted(x, xi) - 1
-                x_k = x[k]
-                x_k1 = x[k + 1]
-                y_k = y[k]
-                y_k1 = y[k + 1]
-                # Avoid division by zero if consecutive x values are identical
-                if x_k1 - x_k == 0:
-                    y_new[i] = y_k
-                else:
-                    y_new[i] = y_k + (y_k1 - y_k) * (xi - x_k) / (x_k1 - x_k)
-        return y_new
-
-
-    def calculate_calibrated_rf(self, powers, beat_freqs_pow, s2p_filename=None, excel_filename=None):
-        """
-        Calculate the calibrated RF power by applying RF losses from:
-         - A network analyzer (.s2p file) for RF link loss.
-         - An Excel file for RF probe loss.
-        Returns the calibrated RF power and the individual loss components.
-        """
-        calibrated_rf = np.array(powers)  # Initialize with raw RF power
-        rf_loss = np.zeros_like(calibrated_rf)
-        rf_probe_loss = np.zeros_like(calibrated_rf)
-        rf_link_loss = np.zeros_like(calibrated_rf)
-        # Apply calibration from .s2p file
-        if s2p_filename:
-            try:
-                frequencies, s_avg = self.read_s2p_file(s2p_filename)
-                interpolated_loss = self.custom_linear_interpolation(frequencies, s_avg, beat_freqs_pow)
-                interpolated_loss = np.array(interpolated_loss)
-                rf_loss += np.abs(interpolated_loss.real)
-                rf_probe_loss += np.abs(interpolated_loss.real)
-                calibrated_rf += np.abs(interpolated_loss.real)
-                calibrated_rf = np.round(calibrated_rf, 2)
-            except Exception as e:
-                self.update_message_feed(f"Error processing S2P file: {e}")
-        # Apply calibration from Excel file
-        if excel_filename:
-            try:
-                probe_loss_frequency, probe_loss = self.read_excel_data(excel_filename)
-                interpolated_probe_loss = self.custom_linear_interpolation(probe_loss_frequency, probe_loss, beat_freqs_pow)
-                interpolated_probe_loss = np.array(interpolated_probe_loss)
-                rf_loss += np.abs(interpolated_probe_loss)
-                rf_link_loss += np.abs(interpolated_probe_loss)
-                calibrated_rf += np.abs(interpolated_probe_loss)
-                calibrated_rf = np.round(calibrated_rf, 2)
-            except Exception as e:
-                self.update_message_feed(f"Error processing Excel file: {e}")
-        return calibrated_rf, rf_loss, rf_probe_loss, rf_link_loss
+        threading.Thread(target=self.engine.zero_power_sensor, daemon=True).start()
 
     def validate_inputs(self) -> bool:
         """
@@ -576,6 +352,10 @@ class MeasurementApp:
             float(self.end_freq_var.get())
             int(self.num_steps_var.get())
             float(self.delay_var.get())
+            if int(self.current_samples_var.get()) < 1 or not 0.01 <= float(self.current_nplc_var.get()) <= 10:
+                raise ValueError("Keithley samples must be at least 1 and NPLC between 0.01 and 10")
+            if parse_points(self.bias_points_var.get()) and parse_points(self.attenuation_points_var.get()):
+                raise ValueError("enter either bias points or attenuation points, not both")
             return True
         except Exception as e:
             messagebox.showerror("Input Error", f"Invalid input: {e}")
@@ -588,23 +368,45 @@ class MeasurementApp:
         """
         if not self.validate_inputs():
             return
+        # The dialog runs on the Tk thread before the measurement thread starts
+        if not self.prompt_save_inputs():
+            self.update_message_feed("No save location chosen, data collection not started.")
+            return
+        self.stop_event.clear()
         # Store the thread reference so we can join it later
         self.measurement_thread = threading.Thread(target=self.data_collection, daemon=True)
         self.measurement_thread.start()
 
-    def data_collection(self):
+    def start_resume(self):
         """
-        Perform the complete data collection process:
-         - Open instruments and wait for stabilization.
-         - Set initial laser wavelengths.
-         - Perform an automatic beat frequency search loop (if enabled) to bring the system near the target frequency.
-         - Conduct the frequency sweep and measure beat frequency, photocurrent, and RF power.
-         - Handle occasional errors and measurement retries.
-         - Finally, perform calibration calculations.
-         
-         (Many inline comments explain each step, as in the original code.)
+        Continue an interrupted sweep: choose its journal and run data collection from the step
+        after the last one recorded, appending to the same journal and data files.
         """
+        journal_path = filedialog.askopenfilename(
+            filetypes=[("Sweep journal", "*.journal.jsonl"), ("All files", "*.*")]
+        )
+        if not journal_path:
+            return
+        try:
+            header, steps, _ = read_journal(journal_path)
+        except (OSError, KeyError) as e:
+            messagebox.showerror("Resume Error", f"Could not read the sweep journal: {e}")
+            return
+        if header is None or not steps:
+            messagebox.showerror("Resume Error", "The journal has no completed steps to resume from.")
+            return
+        if steps[-1]['step'] >= header['num_steps']:
+            messagebox.showinfo("Resume", "This sweep already completed all of its steps.")
+            return
+        self.stop_event.clear()
+        self.measurement_thread = threading.Thread(target=self.data_collection, args=(journal_path,), daemon=True)
+        self.measurement_thread.start()
 
+    def prompt_save_inputs(self):
+        """
+        Ask for the device number, comments and save location, and wait until they are given.
+        Returns False if the dialog was closed without choosing a save location.
+        """
         input_window = tk.Toplevel(self.root)
         input_window.title("Save Data Inputs")
         input_window.geometry("300x200")
@@ -619,19 +421,22 @@ class MeasurementApp:
         comment_entry = ttk.Entry(input_window, textvariable=comment_var)
         comment_entry.grid(row=1, column=1, padx=10, pady=10)
         
+        chosen = []
+
         def choose_file_and_close():
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".txt",
                 filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
             )
             if not file_path:
-                return  # Optionally, handle cancelation here
+                return  # keep the dialog open to choose again (or close it to cancel)
             # Store the user inputs in instance variables for later use
             self.device_num = device_num_var.get().strip()
             self.user_comment = comment_var.get().strip().upper()
             self.save_file_path = file_path
             self.excel_file_path = file_path.replace(".txt", ".xlsx")
             self.plot_file_path = file_path.rsplit('.', 1)[0] + '.png'
+            chosen.append(file_path)
             input_window.destroy()
         
         confirm_button = ttk.Button(input_window, text="Confirm and Choose Save Location", command=choose_file_and_close)
@@ -639,360 +444,67 @@ class MeasurementApp:
         
         # Wait for the user to provide the inputs and choose a save location
         self.root.wait_window(input_window)
-        # ===============================================================
-        self.stop_event.clear()
-        self.data_ready_event.clear()
-
-        start_time = time.time()
-        try:
-            # --- Get user inputs and initialize measurement parameters ---
-            laser_3_WL = self.laser_3_var.get()
-            laser_4_WL = self.laser_4_var.get()
-            num_steps = self.num_steps_var.get()
-            delay = self.delay_var.get()
-            start_freq = self.start_freq_var.get()
-            end_freq = self.end_freq_var.get()
-            enable_search = self.enable_search_var.get()
-            freq_threshold = 0.5  # Note: values below 0.5 GHz are less likely to work
-            excel_filename = self.excel_file_var.get()
-            s2p_filename = self.s2p_file_var.get()
-
-            # Set the laser wavelengths and power
-            self.set_laser_wavelength(3, laser_3_WL)
-            self.set_laser_wavelength(4, laser_4_WL)
-
-            # Wait for the lasers to stabilize
-            self.update_message_feed("Waiting for the lasers to stabilize...")
-            time.sleep(10)
-
-            # Initialize frequencies: set reference frequency to laser 3
-            c = 299792458  # Speed of light in m/s
-            laser_3_freq = c / (laser_3_WL * 1e-9)
-            self.wavelength_meter.write(":CALCulate3:PRESet")
-            time.sleep(1)
-            self.wavelength_meter.write("*OPC?")
-            if self.wavelength_meter.read().strip() == "1":
-                print("CALCulate3 states cleared.")
-            else:
-                print("Warning: Operation did not complete as expected.")
-
-            self.wavelength_meter.write(":CALCulate3:DELTa:REFerence:WAVelength MIN")
-            time.sleep(1)
-
-            self.wavelength_meter.write(":CALCulate3:DELTa:WAVelength ON")
-            time.sleep(1)
-            self.wavelength_meter.write("*OPC?")
-            if self.wavelength_meter.read().strip() == "1":
-                print("Delta wavelength mode successfully turned ON.")
-            else:
-                print("Delta wavelength mode command did not complete as expected.")
-            time.sleep(1)
-
-            # Configure the sensor before measurement attempts
-            self.RS_power_sensor.write('INIT:CONT OFF')
-            self.RS_power_sensor.write('SENS:FUNC "POW:AVG"')
-            self.RS_power_sensor.write('SENS:AVER:COUN:AUTO ON')
-            self.RS_power_sensor.write('SENS:AVER:STAT ON')
-            self.RS_power_sensor.write('SENS:AVER:TCON REP')
-            self.RS_power_sensor.write('SENS:POW:AVG:APER 1e-1')
-
-            # Additional variables to track consecutive increases
-            consecutive_increases = 0
-            max_consecutive_increases = 3
-
-            # Measure initial beat frequency using both instruments
-            wl_meter_beat_freq = self.measure_wavelength_beat()
-            esa_beat_freq = self.measure_peak_frequency()
-            if wl_meter_beat_freq is None:
-                wl_meter_beat_freq = esa_beat_freq
-            current_freq = wl_meter_beat_freq if (wl_meter_beat_freq > 50 and wl_meter_beat_freq < 1000) else esa_beat_freq
-            last_beat_freq = None
-
-            # --- AUTO START FREQUENCY SEARCH LOOP ---
-            if enable_search:
-                self.update_message_feed("RUNNING AUTOMATIC START FREQUENCY SEARCH LOOP...")
-                while current_freq >= 1:
-                    if self.stop_event.is_set():
-                        self.update_message_feed("Data collection stopped by user.")
-                        return
-                    laser_4_freq = c / (laser_4_WL * 1e-9)
-                    wl_meter_beat_freq = self.measure_wavelength_beat()
-                    esa_beat_freq = self.measure_peak_frequency()
-                    if wl_meter_beat_freq is None:
-                        wl_meter_beat_freq = esa_beat_freq
-                    if wl_meter_beat_freq is None or esa_beat_freq is None:
-                        self.update_message_feed("Issue reading from WLM and ESA, updating small jump in laser...")
-                        laser_4_freq = c / (laser_4_WL * 1e-9)
-                        laser_4_new_freq = laser_4_freq - (0.2 * 1e9)
-                        laser_4_WL = (c / laser_4_new_freq) * 1e9
-                        self.set_laser_wavelength(4, laser_4_WL)
-                        time.sleep(3)
-                        continue
-                    current_freq = wl_meter_beat_freq if (wl_meter_beat_freq > 50 and wl_meter_beat_freq < 1000) else esa_beat_freq
-                    if last_beat_freq is not None and current_freq > last_beat_freq:
-                        if self.stop_event.is_set():
-                            self.update_message_feed("Data collection stopped by user.")
-                            return
-                        if current_freq >= 1:
-                            consecutive_increases += 1
-                            if consecutive_increases >= max_consecutive_increases:
-                                self.update_message_feed("Start frequency search overshot the threshold, restarting...")
-                                # Reset calibration variables
-                                laser_4_WL = laser_3_WL - 2  # Reset to an initial offset
-                                self.set_laser_wavelength(4, laser_4_WL)
-                                consecutive_increases = 0
-                                last_beat_freq = None
-                                time.sleep(15)
-                                wl_meter_beat_freq = self.measure_wavelength_beat()
-                                esa_beat_freq = self.measure_peak_frequency()
-                                if wl_meter_beat_freq is None:
-                                    wl_meter_beat_freq = esa_beat_freq
-                                if wl_meter_beat_freq is None or esa_beat_freq is None:
-                                    continue
-                                current_freq = wl_meter_beat_freq if (wl_meter_beat_freq > 50 and wl_meter_beat_freq < 1000) else esa_beat_freq
-                                continue
-                        elif current_freq < 1:
-                            break  # Near 0 beat frequency
-                    else:
-                        consecutive_increases = 0
-
-                    if self.stop_event.is_set():
-                        self.update_message_feed("Data collection stopped by user.")
-                        return
-
-                    if wl_meter_beat_freq >= 50 and wl_meter_beat_freq < 1000:
-                        self.update_message_feed(f"Beat Frequency (Wavelength Meter): {wl_meter_beat_freq} GHz")
-                        laser_4_new_freq = laser_4_freq - (wl_meter_beat_freq * 0.67 * 1e9)
-                        laser_4_WL = (c / laser_4_new_freq) * 1e9
-                        if 1540 < laser_4_WL < 1660:
-                            self.set_laser_wavelength(4, laser_4_WL)
-                        else:
-                            self.update_message_feed(f"New wavelength out of bounds: {laser_4_WL:.3f} nm")
-                            return
-                    elif esa_beat_freq < 50 and (wl_meter_beat_freq < 50 or wl_meter_beat_freq > 10000):
-                        self.update_message_feed(f"Beat Frequency (ESA): {round(esa_beat_freq,2)} GHz")
-                        if esa_beat_freq > 3:
-                            if last_beat_freq is not None and last_beat_freq < 1:
-                                laser_4_new_freq = laser_4_freq - (0.2 * 1e9)
-                            else:
-                                laser_4_new_freq = laser_4_freq - (esa_beat_freq * 0.67 * 1e9)
-                        elif 1.5 < esa_beat_freq <= 3:
-                            laser_4_new_freq = laser_4_freq - (0.5 * 1e9)
-                        elif 1 <= esa_beat_freq <= 1.5:
-                            laser_4_new_freq = laser_4_freq - (0.2 * 1e9)
-                        elif esa_beat_freq < 1:
-                            laser_4_new_freq = laser_4_freq - (0.1 * 1e9)
-                        laser_4_WL = (c / laser_4_new_freq) * 1e9
-                        if 1540 < laser_4_WL < 1660:
-                            self.set_laser_wavelength(4, laser_4_WL)
-                        else:
-                            self.update_message_feed(f"New wavelength out of bounds: {laser_4_WL:.3f} nm")
-                            return
-                    last_beat_freq = current_freq
-                    time.sleep(3)
-                # After loop, attempt a small jump to overcome ESA measurement issues near 0 GHz
-                self.update_message_feed("Attempting small jump over ESA issues near 0 GHz...")
-                laser_4_freq = c / (laser_4_WL * 1e-9)
-                laser_4_new_freq = laser_4_freq - (1 * 1e9)
-                laser_4_WL = (c / laser_4_new_freq) * 1e9
-                self.set_laser_wavelength(4, laser_4_WL)
-                time.sleep(3)
-                wl_meter_beat_freq = self.measure_wavelength_beat()
-                esa_beat_freq = self.measure_peak_frequency()
-                if wl_meter_beat_freq is None:
-                    wl_meter_beat_freq = esa_beat_freq
-                current_freq = wl_meter_beat_freq if (wl_meter_beat_freq > 50 and wl_meter_beat_freq < 1000) else esa_beat_freq
-                self.update_message_feed(f"Current Beat Frequency: {round(current_freq,2)} GHz")
-
-                # Instead of a single if, use a while loop for the second jump if current_freq > 2
-                max_attempts = 5
-                attempt = 0
-                while current_freq is not None and current_freq > 10 and attempt < max_attempts:
-                    self.update_message_feed("Attempting second small jump over ESA issues near 0 GHz...")
-                    laser_4_freq = c / (laser_4_WL * 1e-9)
-                    laser_4_new_freq = laser_4_freq - (0.4 * 1e9)
-                    laser_4_WL = (c / laser_4_new_freq) * 1e9
-                    self.set_laser_wavelength(4, laser_4_WL)
-                    time.sleep(3)
-                    wl_meter_beat_freq = self.measure_wavelength_beat()
-                    esa_beat_freq = self.measure_peak_frequency()
-                    if wl_meter_beat_freq is None:
-                        wl_meter_beat_freq = esa_beat_freq
-                    current_freq = wl_meter_beat_freq if (wl_meter_beat_freq > 50 and wl_meter_beat_freq < 1000) else esa_beat_freq
-                    self.update_message_feed(f"Current Beat Frequency: {round(current_freq,2)} GHz")
-                    attempt += 1
-
-                 # --- SECOND LOOP: Adjust laser 4 to reach the desired starting frequency ---
-                if start_freq > 1:
-                    self.update_message_feed("Adjusting laser 4 to reach starting beat frequency after passing 0...")
-                    update_laser = True
-                    while abs(current_freq - start_freq) > freq_threshold:
-                        if self.stop_event.is_set():
-                            self.update_message_feed("Data collection stopped by user.")
-                            break
-
-                        # Re-measure beat frequency using both instruments
-                        wl_meter_beat_freq = self.measure_wavelength_beat()
-                        esa_beat_freq = self.measure_peak_frequency()
-                        if wl_meter_beat_freq is None:
-                            wl_meter_beat_freq = esa_beat_freq
-                        if wl_meter_beat_freq is None or esa_beat_freq is None:
-                            continue
-
-                        current_freq = wl_meter_beat_freq if (wl_meter_beat_freq > 45 and wl_meter_beat_freq < 1000) else esa_beat_freq
-                        self.update_message_feed(f"Current Beat Frequency: {round(current_freq,2)} GHz")
-
-                        # Calculate the current frequency of laser 4 and update it by half the difference
-                        laser_4_freq = c / (laser_4_WL * 1e-9)
-                        laser_4_new_freq = laser_4_freq - ((abs(start_freq - current_freq) * 1e9)) / 2
-                        laser_4_WL = (c / laser_4_new_freq) * 1e9
-
-                        if abs(current_freq - start_freq) <= freq_threshold:
-                            update_laser = False
-
-                        if update_laser:
-                            if 1540 < laser_4_WL < 1660:
-                                self.set_laser_wavelength(4, laser_4_WL)
-                            else:
-                                self.update_message_feed(f"New wavelength for laser 4 is out of bounds: {laser_4_WL:.3f} nm")
-                                return
-
-                        time.sleep(3)
-                        last_beat_freq = current_freq
-
-                # Final measurement after loop finishes
-                time.sleep(5)
-                wl_meter_beat_freq = self.measure_wavelength_beat()
-                esa_beat_freq = self.measure_peak_frequency()
-                if wl_meter_beat_freq is None:
-                    wl_meter_beat_freq = esa_beat_freq
-                current_freq = wl_meter_beat_freq if (wl_meter_beat_freq > 50 and wl_meter_beat_freq < 1000) else esa_beat_freq
-                self.update_message_feed(f"Final Beat Frequency: {round(current_freq,2)} GHz")
-                enable_search = False  # Disable the search after reaching the starting frequency
-
-            # --- BEGIN DATA COLLECTION LOOP ---
-            # Calculate step size for laser 4 frequency adjustment
-            laser_4_step = (end_freq - start_freq) / num_steps
-            self.update_message_feed("BEGINNING MEASUREMENT LOOP...")
-            start_time_sweep = time.time()
-            last_beat_freq = current_freq
-
-            # Get initial photocurrent from Keithley (convert to mA)
-            response = self.keithley.query(":MEASure:CURRent?")
-            initial_current_values = response.split(',')
-            if len(initial_current_values) > 1:
-                initial_current = float(initial_current_values[1]) * 1000
-                initial_current = round(initial_current, 3)
-            self.keithley.write(":SYSTem:LOCal")
-
-            self.looping = True
-            for step in range(num_steps):
-                if self.stop_event.is_set():
-                    self.update_message_feed("Data collection stopped by user.")
-                    self.looping = False
-                    time_end = time.time()
-                    sweep_run_time = time_end - start_time_sweep
-                    total_run_time = time_end - start_time
-                    beat_freqs, powers, photo_currents, p_actuals = zip(*self.beat_freq_and_power)
-                    self.calibrated_rf, self.rf_loss, self.rf_probe_loss, self.rf_link_loss = self.calculate_calibrated_rf(
-                        powers, beat_freqs, s2p_filename=s2p_filename, excel_filename=excel_filename
-                    )
-                    self.data_ready_event.set()
-                    break
-
-                # Choose measurement method based on previous beat frequency
-                wl_meter_beat_freq = self.measure_wavelength_beat()
-                esa_beat_freq = self.measure_peak_frequency()
-                if wl_meter_beat_freq is None:
-                    wl_meter_beat_freq = esa_beat_freq
-                beat_freq = wl_meter_beat_freq if (wl_meter_beat_freq > 50 and wl_meter_beat_freq < 1000) else esa_beat_freq
-
-                self.update_message_feed(f"Step {step + 1} of {num_steps}")
-
-                # For early steps near low start frequencies, adjust laser 4 more cautiously
-                if step < 2 and start_freq < 5 and beat_freq > 15:
-                    laser_4_freq = c / (laser_4_WL * 1e-9)
-                    laser_4_new_freq = laser_4_freq - (0.3 * 1e9)
-                    laser_4_WL = (c / laser_4_new_freq) * 1e9
-                    self.set_laser_wavelength(4, laser_4_WL)
-                    time.sleep(delay)
-                    wl_meter_beat_freq = self.measure_wavelength_beat()
-                    esa_beat_freq = self.measure_peak_frequency()
-                    if wl_meter_beat_freq is None:
-                        wl_meter_beat_freq = esa_beat_freq
-                    beat_freq = wl_meter_beat_freq if (wl_meter_beat_freq > 50 and wl_meter_beat_freq < 1000) else esa_beat_freq
-                    if beat_freq is None:
-                        continue
-
-                # --- MEASURE CURRENT FROM KEITHLEY ---
-                response = self.keithley.query(":MEASure:CURRent?")
-                current_values = response.split(',')
-                if len(current_values) > 1:
-                    current = float(current_values[1]) * 1000  # Convert to mA
-                    current = round(current, 3)
-                self.keithley.write(":SYSTem:LOCal")
-
-                # --- MEASURE VOA and RF power sensor data with retry loop ---
-                max_attempts = 3
-                attempts = 0
-                success = False
-                p_actual = self.voa.query('READ:POW?')
-                p_actual = round(float(p_actual), 3)
-                self.voa.write('SYST:LOC')
-                
-                output_dbm = self.measure_rf_power(beat_freq)
-                if output_dbm is None:
-                    # record placeholder (or skip)
-                    self.beat_freq_and_power.append(
-                        (beat_freq, float('nan'), current, p_actual)
-                    )
-                else:
-                    power = round(output_dbm, 2)
-                    self.beat_freq_and_power.append(
-                        (beat_freq, power, current, p_actual)
-                    )
-
-                self.update_message_feed(f"Beat Frequency: {round(beat_freq,2)} GHz")
-                self.update_message_feed(f"Measured Photocurrent: {current} mA")
-                self.update_message_feed(f"Raw RF Power: {output_dbm} dBm")
-                self.steps.append(step + 1)
-                self.beat_freqs.append(beat_freq)
-                self.laser_4_wavelengths.append(laser_4_WL)
-                self.rf_loss.append(0)  # Placeholder for RF loss
-                self.calibrated_rf.append(output_dbm)  # Placeholder for calibrated RF power
-                self.photo_currents.append(current)
-                self.powers.append(output_dbm)
-
-                # Update laser 4 wavelength for the next step
-                laser_4_freq = c / (laser_4_WL * 1e-9)
-                laser_4_new_freq = laser_4_freq - (laser_4_step * 1e9)
-                laser_4_WL = (c / laser_4_new_freq) * 1e9
-                self.set_laser_wavelength(4, laser_4_WL)
-                last_beat_freq = beat_freq
-                self.data_ready_event.set()
-                time.sleep(delay)
-
-            self.update_message_feed("Data collection completed.")
-            self.looping = False
-            time_end = time.time()
-            sweep_run_time = time_end - start_time_sweep
-            total_run_time = time_end - start_time
-            beat_freqs, powers, photo_currents, p_actuals = zip(*self.beat_freq_and_power)
-            self.p_actuals = list(p_actuals)
-            self.calibrated_rf, self.rf_loss, self.rf_probe_loss, self.rf_link_loss = self.calculate_calibrated_rf(
-                powers, beat_freqs, s2p_filename=s2p_filename, excel_filename=excel_filename
-            )
-            self.data_ready_event.set()
-
-            # After data collection, prompt user for additional inputs and save data
-            volt = self.keithley.query(':SOUR:VOLT:LEV:IMM:AMPL?').strip()
-            self.keithley_voltage = volt
-
-            self.root.after(0, lambda: self.save_data(sweep_run_time, total_run_time))
-            return
-        except Exception as e:
-            self.update_message_feed(f"Error in data collection: {e}")
-            self.reset_program()
+        return bool(chosen)
+
+    def data_collection(self, resume_path=None):
+        """
+        Run a sweep with the settings from the GUI inputs on the acquisition engine (see SweepEngine.run),
+        or continue the interrupted sweep recorded in the journal at resume_path.
+        Then save the data, or after an error export the steps measured so far and reset; a run
+        stopped or aborted before its first step only resets.
+        Runs in the measurement thread.
+        """
+        if resume_path is not None:
+            resume_header, _, _ = read_journal(resume_path)
+            self.device_num = resume_header['device_num']
+            self.user_comment = resume_header['comment']
+            self.save_file_path = resume_path[:-len('.journal.jsonl')] + '.txt'
+            self.excel_file_path = self.save_file_path.replace(".txt", ".xlsx")
+            self.plot_file_path = self.save_file_path.rsplit('.', 1)[0] + '.png'
+        config = SweepConfig(
+            laser_3_WL=self.laser_3_var.get(),
+            laser_4_WL=self.laser_4_var.get(),
+            start_freq=self.start_freq_var.get(),
+            end_freq=self.end_freq_var.get(),
+            num_steps=self.num_steps_var.get(),
+            delay=self.delay_var.get(),
+            enable_search=self.enable_search_var.get(),
+            adaptive_settle=self.adaptive_settle_var.get(),
+            pipelined=self.pipelined_var.get(),
+            retune_during_averaging=self.retune_during_averaging_var.get(),
+            esa_trace=self.esa_trace_var.get(),
+            tracking=self.tracking_var.get(),
+            use_laser_cache=self.use_laser_cache_var.get(),
+            pause_after_search=self.pause_after_search_var.get(),
+            adaptive_timeouts=self.adaptive_timeouts_var.get(),
+            bias_points=self.bias_points_var.get(),
+            attenuation_points=self.attenuation_points_var.get(),
+            frequency_outer=not self.nested_outer_var.get(),
+            current_samples=self.current_samples_var.get(),
+            current_nplc=self.current_nplc_var.get(),
+            s2p_file=self.s2p_file_var.get(),
+            excel_file=self.excel_file_var.get(),
+            save_file_path=getattr(self, 'save_file_path', None),
+            device_num=getattr(self, 'device_num', ''),
+            comment=getattr(self, 'user_comment', ''),
+        )
+        result = self.engine.run(config, resume_path)
+
+        if result.status in ('completed', 'stopped') and len(self.records):
+            # After data collection, save the data and plots (on the Tk thread)
+            self.messages.call(lambda: self.save_data(result.sweep_run_time, result.total_run_time))
+        elif result.status == 'error':
+            if result.journal_path is not None and getattr(self, 'save_file_path', None):
+                # Export the completed steps from the journal
+                threading.Thread(
+                    target=self.export_journal,
+                    args=(result.journal_path, self.save_file_path, result.sweep_run_time, result.total_run_time),
+                    daemon=True
+                ).start()
+            self.messages.call(self.reset_program)
+        else:
+            # Stopped or aborted before any step was measured: nothing to save
+            self.messages.call(self.reset_program)
 
     def save_data(self, sweep_run_time, total_run_time):
         """
@@ -1014,20 +526,21 @@ class MeasurementApp:
             f"Time: {time.strftime('%H:%M:%S')}",
             f"Frequency Sweep Run Time: {sweep_run_time:.2f} s",
             f"Total Run Time: {total_run_time:.2f} s",
-            f"Keithley Voltage: {self.keithley_voltage} V",
+            f"Keithley Voltage: {self.engine.keithley_voltage} V",
             f"Excel Loss File: {self.excel_file_var.get() or 'None'}",
             f"S2P Loss File: {self.s2p_file_var.get() or 'None'}"
         ]
 
 
-            # 1) annotate & draw on main thread
+            # 1) annotate & draw on main thread (with the final data, as ordinary artists)
+        self.redraw_plots()
         self._annotate_and_draw(comments)
 
         # 2) save the figure PNG *right here* (main thread)
         try:
             self.fig.savefig(plot_file_path)
         except Exception as e:
-            self.update_message_feed(f"Plot save failed: {e}")
+            self.update_message_feed(f"Plot save failed: {e}", ERROR)
 
         # 3) hand off only the text + Excel work to a background thread
         threading.Thread(
@@ -1043,8 +556,8 @@ class MeasurementApp:
         """
         # ---- 1) update the y-ticks on ax3 and ax5 ----
         # raw RF power axis (ax3)
-        min_power = min(self.powers)
-        max_power = max(self.powers)
+        min_power = np.nanmin(self.records['raw_power'])
+        max_power = np.nanmax(self.records['raw_power'])
         yticks = np.arange(
             np.floor(min_power/3)*3,
             np.ceil(max_power/3)*3 + 3,
@@ -1054,8 +567,8 @@ class MeasurementApp:
         self.ax3.set_ylim(min(yticks), max(yticks))
 
         # calibrated RF power axis (ax5)
-        min_calibrated_rf = min(self.calibrated_rf)
-        max_calibrated_rf = max(self.calibrated_rf)
+        min_calibrated_rf = np.nanmin(self.records['calibrated_rf'])
+        max_calibrated_rf = np.nanmax(self.records['calibrated_rf'])
         yticks2 = np.arange(
             np.floor(min_calibrated_rf/3)*3,
             np.ceil(max_calibrated_rf/3)*3 + 3,
@@ -1076,121 +589,64 @@ class MeasurementApp:
         self.canvas.draw_idle()
 
 
+    def export_journal(self, journal_path, file_path, sweep_run_time, total_run_time):
+        """
+        Write the .txt and .xlsx data files from the steps recorded in a sweep journal.
+        Runs in a background thread.
+        """
+        export_journal(journal_path, file_path, sweep_run_time, total_run_time, self.update_message_feed)
+
     def _save_data_io(self, file_path, plot_file_path, sweep_run_time, total_run_time):
         """
         Runs in a background thread:  
-        - Save figure PNG  
-        - Write text file  
-        - Build & save Excel workbook  
+        - Write text file and Excel workbook from the sweep journal
         """
-
-        # 2) write the text file
-        try:
-            with open(file_path, 'w') as f:
-                f.write("DEVICE NUMBER: " + str(self.device_num) + "\n")
-                f.write("COMMENTS: " + self.user_comment + "\n")
-                f.write("KEITHLEY VOLTAGE: " + str(self.keithley_voltage) + " V" + "\n")
-                f.write("FREQUENCY SWEEP RUN TIME: " + f"{sweep_run_time:.2f}" + " s" + "\n")
-                f.write("TOTAL RUN TIME: " + f"{total_run_time:.2f}" + " s" + "\n")
-                f.write("RF Link Loss File (.xlsx): " + str(self.excel_file_var.get() or 'None') + "\n")
-                f.write("RF Probe Loss File (.s2p): " + str(self.s2p_file_var.get() or 'None') + "\n")
-                f.write("INITIAL PHOTOCURRENT: " + str(self.photo_currents[0]) + " (mA)" + "\n")
-                f.write("STARTING WAVELENGTH FOR LASER 3: " + str(self.laser_3_var.get()) +
-                        " (nm) : STARTING WAVELENGTH FOR LASER 4: " + f"{self.laser_4_wavelengths[0]:.3f}" +
-                        " (nm) : DELAY: " + str(self.delay_var.get()) + " (s) " + "\n")
-                f.write("DATE: " + time.strftime("%m/%d/%Y") + "\n")
-                f.write("TIME: " + time.strftime("%H:%M:%S") + "\n")
-                f.write("\n")
-                f.write("F_BEAT(GHz)\tI_PD (mA)\tRaw RF POW (dBm)\tTotal RF Loss (dB)\tProbe RF Loss (dB)\tLink RF Loss (dB)\tCal RF POW (dBm)\tVOA P Actual (dBm)\n")
-                for i in range(len(self.steps)):
-                    f.write(f"{self.beat_freqs[i]:<10.2f}\t{self.photo_currents[i]:<10.4e}\t{self.powers[i]:<10.2f}\t"
-                            f"{self.rf_loss[i]:<10.2f}\t{self.rf_probe_loss[i]:<10.2f}\t{self.rf_link_loss[i]:<10.2f}\t"
-                            f"{self.calibrated_rf[i]:<10.2f}\t{self.p_actuals[i]:<10.3f}\n")
-    
-        except Exception as e:
-            self.root.after(0, lambda: self.update_message_feed(f"Text save failed: {e}"))
-
-        # 3) build & save Excel workbook
-        try:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Experiment Data"
-            ws.append(["DEVICE NUMBER", self.device_num])
-            ws.append(["COMMENTS", self.user_comment])
-            ws.append(["KEITHLEY VOLTAGE", f"{self.keithley_voltage} V"])
-            ws.append(["INITIAL PHOTOCURRENT", f"{self.photo_currents[0]} (mA)"])
-            ws.append(["STARTING WAVELENGTH FOR LASER 3", f"{self.laser_3_var.get()} (nm)"])
-            ws.append(["STARTING WAVELENGTH FOR LASER 4", f"{self.laser_4_wavelengths[0]:.3f} (nm)"])
-            ws.append(["DELAY", f"{self.delay_var.get()} (s)"])
-            ws.append(["FREQUENCY SWEEP RUN TIME", f"{sweep_run_time:.2f} s"])
-            ws.append(["TOTAL RUN TIME", f"{total_run_time:.2f} s"])
-            ws.append(["EXCEL LOSS FILE", self.excel_file_var.get() or 'None'])
-            ws.append(["S2P LOSS FILE", self.s2p_file_var.get() or 'None'])
-            ws.append(["DATE", time.strftime("%m/%d/%Y")])
-            ws.append(["TIME", time.strftime("%H:%M:%S")])
-            ws.append([])
-            ws.append(["F_BEAT (GHz)", "I_PD (mA)", "Raw RF POW (dBm)",
-                        "Total RF Loss (dB)", "RF Probe Loss (dB)",
-                        "RF Link Loss (dB)", "Cal RF POW (dBm)", "VOA P Actual (dBm)"])
-            for i in range(len(self.steps)):
-                ws.append([
-                    f"{self.beat_freqs[i]:.2f}",
-                    f"{self.photo_currents[i]}",
-                    f"{self.powers[i]:.2f}",
-                    f"{self.rf_loss[i]:.2f}",
-                    f"{self.rf_probe_loss[i]:.2f}",
-                    f"{self.rf_link_loss[i]:.2f}",
-                    f"{self.calibrated_rf[i]:.2f}",
-                    f"{self.p_actuals[i]:.3f}"
-                ])
-            # Adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column = list(column)
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except Exception:
-                        pass
-                adjusted_width = (max_length + 2)
-                ws.column_dimensions[column[0].column_letter].width = adjusted_width
-            wb.save(file_path.replace(".txt", ".xlsx"))
-            self.update_message_feed(f"Excel data saved to {file_path.replace('.txt', '.xlsx')}")
-    
-        except Exception as e:
-            self.root.after(0, lambda: self.update_message_feed(f"Excel save failed: {e}"))
+        self.export_journal(self.engine.journal_path, file_path, sweep_run_time, total_run_time)
 
         # 4) all done!
-        self.root.after(0, lambda: self.update_message_feed(
-            f"Data & plot saved to {file_path} and {plot_file_path}"
-        ))
+        self.update_message_feed(f"Data & plot saved to {file_path} and {plot_file_path}")
  
     def update_plots(self):
          """
          Update the Matplotlib plots with the latest data.
          This method is repeatedly called using Tkinter's after() method.
+         While the sweep loop runs only the plot lines are redrawn (blitting); once it ends the
+         lines become ordinary artists again and the whole figure is redrawn for saving.
          """
-         if self.data_ready_event.is_set():
-             self.line1.set_data(self.steps, self.beat_freqs)
-             self.markers1.set_data(self.steps, self.beat_freqs)
-             self.line2.set_data(self.steps, self.laser_4_wavelengths)
-             self.markers2.set_data(self.steps, self.laser_4_wavelengths)
-             self.line3.set_data(self.beat_freqs, self.powers)
-             self.markers3.set_data(self.beat_freqs, self.powers)
-             self.line4.set_data(self.beat_freqs, self.photo_currents)
-             self.markers4.set_data(self.beat_freqs, self.photo_currents)
-             if not self.looping:
-                 self.line5.set_data(self.beat_freqs, self.calibrated_rf)
-                 self.markers5.set_data(self.beat_freqs, self.calibrated_rf)
-             for ax in [self.ax1, self.ax2, self.ax3, self.ax4, self.ax5]:
-                 ax.relim()
-                 ax.autoscale_view()
-             self.canvas.draw()
+         start = time.perf_counter()
+         if self.data_ready_event.is_set() and self.engine.looping:
+             self.data_ready_event.clear()
+             self.live_plot.update(self.records)
+             self.engine.profiler.record(GUI, 'gui', 'plot', time.perf_counter() - start)
+         elif self.data_ready_event.is_set():
              self.data_ready_event.clear()
+             self.redraw_plots()
+             self.engine.profiler.record(GUI, 'gui', 'plot', time.perf_counter() - start)
          if not self.stop_event.is_set():
              self.root.after(100, self.update_plots)
 
+    def redraw_plots(self):
+        """
+        Full redraw of all plots from the sweep records, rescaling every axis.
+        """
+        self.live_plot.finish()
+        steps = self.records['step']
+        beat_freqs = self.records['beat_freq']
+        self.line1.set_data(steps, beat_freqs)
+        self.markers1.set_data(steps, beat_freqs)
+        self.line2.set_data(steps, self.records['laser_4_WL'])
+        self.markers2.set_data(steps, self.records['laser_4_WL'])
+        self.line3.set_data(beat_freqs, self.records['raw_power'])
+        self.markers3.set_data(beat_freqs, self.records['raw_power'])
+        self.line4.set_data(beat_freqs, self.records['current'])
+        self.markers4.set_data(beat_freqs, self.records['current'])
+        self.line5.set_data(beat_freqs, self.records['calibrated_rf'])
+        self.markers5.set_data(beat_freqs, self.records['calibrated_rf'])
+        for ax in [self.ax1, self.ax2, self.ax3, self.ax4, self.ax5]:
+            ax.relim()
+            ax.autoscale_view()
+        self.canvas.draw()
+
     def on_stop(self):
         """
         Handle the "Stop" button press.
@@ -1203,20 +659,10 @@ class MeasurementApp:
     def reset_program(self):
         """
         Reset only the measurement data arrays, leaving file paths and comments intact.
-        Also reinitialize instruments.
+        Also reset the instrument drivers (the sessions stay open).
         """
         # Clear only measurement data containers.
-        self.steps = []
-        self.beat_freqs = []
-        self.laser_4_wavelengths = []
-        self.beat_freq_and_power = []
-        self.calibrated_rf = []
-        self.photo_currents = []
-        self.rf_loss = []
-        self.rf_probe_loss = []
-        self.rf_link_loss = []
-        self.powers = []
-        self.p_actuals = []
+        self.records.clear()
 
         # Optionally, remove any text annotations you previously added.
         texts_to_remove = [txt for txt in self.fig.texts if txt != self.fig._suptitle]
@@ -1234,6 +680,7 @@ class MeasurementApp:
         self.markers4.set_data([], [])
         self.line5.set_data([], [])
         self.markers5.set_data([], [])
+        self.live_plot.finish()
         for ax in [self.ax1, self.ax2, self.ax3, self.ax4, self.ax5]:
             ax.relim()
             ax.autoscale_view()
@@ -1245,9 +692,8 @@ class MeasurementApp:
         self.data_ready_event.clear()
         self.update_message_feed("Program reset and ready to start again.")
 
-        # Reinitialize instruments.
-        self.close_instruments()
-        self.open_instruments()
+        # Reconfigure the instruments before the next run; the sessions stay open.
+        self.engine.reset_instruments()
 
 
 
@@ -1275,7 +721,7 @@ class MeasurementApp:
         Confirm with the user before quitting and cleanly exit.
         """
         if messagebox.askokcancel("Quit", "Do you want to quit?"):
-            self.stop_event.set()
+            self.engine.shutdown()
             self.root.destroy()
             sys.exit(0)
 
@@ -1284,7 +730,29 @@ class MeasurementApp:
         self.root.mainloop()
 
 
-if __name__ == '__main__':
-    app = MeasurementApp()
+def main(argv=None, power_meter=DEFAULT_POWER_METER, pause_after_search=False):
+    """
+    Start the GUI. power_meter and pause_after_search are the defaults of the --power-meter and
+    --pause-after-search options (the 50 GHz and pause launcher scripts change them).
+    """
+    parser = argparse.ArgumentParser(description="Heterodyne measurement GUI.")
+    parser.add_argument('--simulate', action='store_true', help="run against the simulated bench")
+    parser.add_argument('--power-meter', choices=list(POWER_METERS), default=power_meter,
+                        help="RF power meter of the setup (default: %(default)s)")
+    parser.add_argument('--pause-after-search', action='store_true', default=pause_after_search,
+                        help="check 'Pause after initial search' at startup")
+    args = parser.parse_args(argv)
+
+    resource_manager = None
+    if args.simulate:
+        # Run against the simulated bench instead of the real instruments
+        from instruments.simulated import SimulatedBench, SimulatedResourceManager
+        resource_manager = SimulatedResourceManager(SimulatedBench(latency=0.01, noise=0.05))
+    app = MeasurementApp(resource_manager=resource_manager, power_meter=args.power_meter,
+                         pause_after_search=args.pause_after_search)
     app.run()
-    app.close_instruments()
+    app.engine.close_instruments()
+
+
+if __name__ == '__main__':
+    main()
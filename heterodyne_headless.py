@@ -0,0 +1,179 @@
+"""
+Headless sweep runner: the acquisition engine (sweep/engine.py) without the Tkinter GUI.
+
+Examples:
+    python heterodyne_headless.py --config sweep.json
+    python heterodyne_headless.py --laser-3 1550 --laser-4 1548 --start 1 --end 110 --steps 100 \\
+        --delay 3.5 --output data/DEVICE1.txt --device DEVICE1
+    python heterodyne_headless.py --resume data/DEVICE1.journal.jsonl
+    python heterodyne_headless.py --config sweep.json --simulate
+    python heterodyne_headless.py --batch overnight.json
+    python heterodyne_headless.py --config sweep.json --power-meter ml2437a
+    python heterodyne_headless.py --config sweep.json --bias-points -1:-3:3
+
+Ctrl+C stops the sweep after the current step and still saves the data.
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+
+from sweep.engine import SweepEngine, SweepConfig, print_log
+from sweep.journal import read_journal
+from sweep.export import export_journal
+from sweep.batch import BatchQueue, BatchRunner
+from instruments.power_meters import POWER_METERS, DEFAULT_POWER_METER
+
+# Command line option -> SweepConfig field
+OPTIONS = [
+    ('--laser-3', 'laser_3_WL', float, "starting wavelength of laser 3 (nm)"),
+    ('--laser-4', 'laser_4_WL', float, "starting wavelength of laser 4 (nm)"),
+    ('--start', 'start_freq', float, "starting beat frequency (GHz)"),
+    ('--end', 'end_freq', float, "ending beat frequency (GHz)"),
+    ('--steps', 'num_steps', int, "number of steps"),
+    ('--delay', 'delay', float, "delay between steps (s)"),
+    ('--s2p', 's2p_file', str, "RF link loss file (.s2p)"),
+    ('--excel', 'excel_file', str, "RF probe loss file (.xlsx)"),
+    ('--output', 'save_file_path', str, ".txt output file (journal and .xlsx are written next to it)"),
+    ('--device', 'device_num', str, "device number"),
+    ('--comment', 'comment', str, "comments"),
+    ('--bias', 'bias_voltage', float, "Keithley bias voltage (V) to set before the sweep"),
+    ('--attenuation', 'voa_attenuation', float, "VOA attenuation (dB) to set before the sweep"),
+    ('--current-samples', 'current_samples', int, "Keithley readings averaged per step"),
+    ('--nplc', 'current_nplc', float, "Keithley integration time per reading (power line cycles)"),
+    ('--bias-points', 'bias_points', str, "nested bias sweep: voltages (V) as -1,-2,-3 or start:stop:count"),
+    ('--attenuation-points', 'attenuation_points', str, "nested VOA attenuation sweep: attenuations (dB) as 0,3,6 or start:stop:count"),
+]
+
+# Options whose value may start with '-' without being a plain negative number (e.g. -1:-3:3),
+# which argparse would otherwise take for another option
+DASH_VALUE_OPTIONS = ('--bias-points', '--attenuation-points')
+
+# Command line switch -> (SweepConfig field, value)
+SWITCHES = [
+    ('--no-search', 'enable_search', False, "skip the automatic start frequency search"),
+    ('--adaptive-settle', 'adaptive_settle', True, "adaptive settle (delay = max wait)"),
+    ('--pipelined', 'pipelined', True, "pipelined laser retune"),
+    ('--retune-during-averaging', 'retune_during_averaging', True, "retune during RF power averaging"),
+    ('--esa-trace', 'esa_trace', True, "trace-based ESA peak detection"),
+    ('--tracking', 'tracking', True, "predictive beat tracking"),
+    ('--no-laser-cache', 'use_laser_cache', False, "do not use the cached laser 4 calibration"),
+    ('--nested-outer', 'frequency_outer', False, "nested sweep with the bias/attenuation as the outer loop (full frequency sweep per point)"),
+    ('--adaptive-timeouts', 'adaptive_timeouts', True, "VISA timeouts learned from each instrument's response times"),
+    ('--pause-after-search', 'pause_after_search', True, "wait for Enter between the start frequency search and the sweep"),
+]
+
+
+def join_dash_values(argv):
+    """
+    Rewrite '--bias-points -1:-3:3' as '--bias-points=-1:-3:3' so argparse accepts the value.
+    """
+    joined = []
+    args = iter(argv)
+    for arg in args:
+        if arg in DASH_VALUE_OPTIONS:
+            value = next(args, None)
+            joined.append(arg if value is None else f"{arg}={value}")
+        else:
+            joined.append(arg)
+    return joined
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a heterodyne beat frequency sweep without the GUI.")
+    parser.add_argument('--config', help="JSON sweep definition (keys as in SweepConfig.FIELDS)")
+    parser.add_argument('--resume', metavar='JOURNAL', help="continue the interrupted sweep recorded in this journal")
+    parser.add_argument('--batch', metavar='FILE', help="run the queue of sweeps defined in this JSON batch file")
+    parser.add_argument('--simulate', action='store_true', help="run against the simulated bench")
+    parser.add_argument('--power-meter', choices=list(POWER_METERS), default=DEFAULT_POWER_METER,
+                        help="RF power meter of the setup (default: %(default)s)")
+    for option, field, type_, help_text in OPTIONS:
+        parser.add_argument(option, dest=field, type=type_, help=help_text)
+    for option, field, value, help_text in SWITCHES:
+        parser.add_argument(option, dest=field, action='store_const', const=value, help=help_text)
+    return parser.parse_args(join_dash_values(sys.argv[1:] if argv is None else argv))
+
+
+def build_config(args):
+    """
+    SweepConfig from the config file (if any) with the command line options applied on top.
+    """
+    values = SweepConfig.load(args.config).to_dict() if args.config else {}
+    for name in SweepConfig.FIELDS:
+        value = getattr(args, name, None)
+        if value is not None:
+            values[name] = value
+    if args.resume:
+        # The sweep settings come from the journal; keep its device, comments and save location
+        header, _, _ = read_journal(args.resume)
+        if header is not None:
+            values['device_num'] = header['device_num']
+            values['comment'] = header['comment']
+        values['save_file_path'] = args.resume[:-len('.journal.jsonl')] + '.txt'
+    return SweepConfig(**values)
+
+
+def continue_on_enter(engine):
+    """
+    Continue a sweep paused after the start frequency search when Enter is pressed.
+    """
+    def wait():
+        input()
+        engine.continue_after_pause()
+    print("The sweep pauses after the start frequency search; press Enter to continue it.")
+    threading.Thread(target=wait, daemon=True).start()
+
+
+def run_batch(engine, path):
+    """
+    Run every job of a batch file; returns the exit code.
+    """
+    queue = BatchQueue.load(path)
+    jobs = BatchRunner(engine).run(queue)
+    print(f"Batch finished: {len(jobs)} of {len(queue)} jobs run")
+    for job in jobs:
+        if job.result is not None:
+            print(f"  job {job.index}: {job.result.status} ({job.result.sweep_run_time:.2f} s) -> {job.config.save_file_path}")
+    return 0 if all(job.result is not None and job.result.status == 'completed' for job in jobs) else 1
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = None
+    if args.batch is None:
+        if args.resume is not None and not os.path.isfile(args.resume):
+            print(f"No sweep journal at {args.resume}.")
+            return 2
+        config = build_config(args)
+        if args.resume is None and (config.num_steps <= 0 or not config.save_file_path):
+            print("A sweep needs --steps > 0 and an --output file (or a config file defining them).")
+            return 2
+
+    resource_manager = None
+    if args.simulate:
+        # Run against the simulated bench instead of the real instruments
+        from instruments.simulated import SimulatedBench, SimulatedResourceManager
+        resource_manager = SimulatedResourceManager(SimulatedBench(latency=0.01, noise=0.05))
+    engine = SweepEngine(resource_manager, power_meter=args.power_meter)
+    # Ctrl+C: finish the current step, then stop and save
+    signal.signal(signal.SIGINT, lambda signum, frame: engine.stop_event.set())
+    engine.open_instruments()
+    try:
+        if args.batch is not None:
+            return run_batch(engine, args.batch)
+        if config.pause_after_search:
+            continue_on_enter(engine)
+        result = engine.run(config, args.resume)
+    finally:
+        engine.shutdown()
+        engine.close_instruments()
+
+    if result.journal_path is not None:
+        export_journal(result.journal_path, config.save_file_path, result.sweep_run_time, result.total_run_time, print_log)
+    print(f"Sweep {result.status}: sweep run time {result.sweep_run_time:.2f} s, total run time {result.total_run_time:.2f} s")
+    return 0 if result.status == 'completed' else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,3 @@
+"""
+Instrument backends for the heterodyne measurement setup.
+"""
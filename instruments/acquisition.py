@@ -0,0 +1,81 @@
+"""
+Per-step acquisition scheduler: instruments on different buses are read at the same time,
+instruments on the same bus one after the other in the order they were submitted.
+
+Usage (as in SweepEngine.start_step_acquisition, sweep/engine.py):
+    scheduler = AcquisitionScheduler()
+    pending = scheduler.start([
+        ('output_dbm', engine.power_sensor_GPIB, lambda: engine.measure_rf_power(beat_freq)),
+        ('current', engine.keithley_GPIB, engine.measure_photocurrent),
+        ('p_actual', engine.voa_GPIB, engine.measure_voa_power),
+    ])
+    readings = pending.result()  # {'output_dbm': ..., 'current': ..., 'p_actual': ...}
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+
+def bus_of(resource_name: str):
+    """
+    Return the interface part of a VISA resource name ('GPIB0::24::INSTR' -> 'GPIB0').
+    """
+    return resource_name.split('::', 1)[0].upper()
+
+
+class PendingAcquisition:
+    """
+    Handle for the reads started by AcquisitionScheduler.start().
+    """
+
+    def __init__(self, futures_by_name):
+        self._futures_by_name = futures_by_name
+
+    def result(self, *names):
+        """
+        Wait for the named readings (all readings if no names are given) and return them
+        as a dict. An exception raised by a read is re-raised here.
+        """
+        names = names or tuple(self._futures_by_name)
+        readings = {}
+        for name in names:
+            readings[name] = self._futures_by_name[name].result()[name]
+        return readings
+
+    def done(self, name):
+        return self._futures_by_name[name].done()
+
+
+class AcquisitionScheduler:
+    """
+    Runs one worker per bus for each step: reads on the same bus are serialized,
+    reads on different buses overlap.
+    """
+
+    def __init__(self, max_buses=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_buses, thread_name_prefix='acquisition')
+
+    def start(self, reads, serial=False):
+        """
+        Start a list of (name, resource_name, read_function) reads and return a PendingAcquisition.
+        With serial=True every read runs one after the other regardless of bus.
+        """
+        groups = {}
+        for name, resource_name, read_function in reads:
+            bus = 'serial' if serial else bus_of(resource_name)
+            groups.setdefault(bus, []).append((name, read_function))
+
+        futures_by_name = {}
+        for bus_reads in groups.values():
+            future = self._executor.submit(self._run_serial, bus_reads)
+            for name, _ in bus_reads:
+                futures_by_name[name] = future
+        return PendingAcquisition(futures_by_name)
+
+    @staticmethod
+    def _run_serial(bus_reads):
+        readings = {}
+        for name, read_function in bus_reads:
+            readings[name] = read_function()
+        return readings
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
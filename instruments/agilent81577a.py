@@ -0,0 +1,30 @@
+"""
+Driver for the Agilent 81577A variable optical attenuator (VOA).
+"""
+from instruments.interfaces import Attenuator
+
+
+class Agilent81577A(Attenuator):
+    def __init__(self, voa):
+        """
+        voa: open VISA resource for the 81577A.
+        """
+        self.voa = voa
+
+    def set_attenuation(self, attenuation: float):
+        self.voa.write(f":INP:ATT {attenuation}DB")
+
+    def attenuation(self):
+        return float(self.voa.query(':INP:ATT?'))
+
+    def read_power(self):
+        """
+        Actual output power (dBm), rounded to 3 decimals.
+        """
+        return round(float(self.voa.query('READ:POW?')), 3)
+
+    def output_enabled(self):
+        return int(self.voa.query(":OUTPut:STATe?").strip()) == 1
+
+    def local(self):
+        self.voa.write(":SYSTem:LOCal")
@@ -0,0 +1,28 @@
+"""
+Driver for the Anritsu ECL frame holding lasers 3 and 4 (CHn:L=<nm>).
+"""
+from instruments.interfaces import Laser
+
+
+class AnritsuECL(Laser):
+    def __init__(self, adapter):
+        """
+        adapter: open VISA resource for the ECL frame.
+        """
+        self.adapter = adapter
+
+    def set_wavelength(self, channel: int, wavelength: float):
+        self.adapter.write(f"CH{channel}:L={wavelength:.3f}")
+
+    def wait_complete(self, timeout: float):
+        """
+        Poll *OPC? with the VISA timeout limited to timeout seconds; a timeout is not an error.
+        """
+        previous = self.adapter.timeout
+        try:
+            self.adapter.timeout = max(int(timeout * 1000), 1)
+            self.adapter.query("*OPC?")
+        except Exception:
+            pass
+        finally:
+            self.adapter.timeout = previous
@@ -0,0 +1,153 @@
+"""
+Beat frequency measurement with the HP 8565E spectrum analyzer, from the peak marker
+(MKPK HI / MKF?) or, in trace mode, from one binary trace transfer (TDF B, TRA?) with the peak found locally.
+"""
+import numpy as np
+
+from instruments.interfaces import BeatFrequencyMeter
+
+TRACE_POINTS = 601  # Points per trace on the HP 856xE series
+
+
+def find_peak(trace, start_freq, stop_freq):
+    """
+    Return (frequency, level) of the highest point of a trace spanning start_freq..stop_freq (GHz).
+    The peak bin is refined by fitting a parabola through it and its two neighbours
+    (the trace is in log display units, so this is a Gaussian fit of the line shape).
+    """
+    trace = np.asarray(trace, dtype=float)
+    k = int(np.argmax(trace))
+    offset = 0.0
+    if 0 < k < len(trace) - 1:
+        left, centre, right = trace[k - 1:k + 2]
+        curvature = left - 2 * centre + right
+        if curvature != 0:
+            offset = 0.5 * (left - right) / curvature
+    bin_width = (stop_freq - start_freq) / (len(trace) - 1)
+    return start_freq + (k + offset) * bin_width, trace[k]
+
+
+class HP8565ETraceSession:
+    def __init__(self, analyzer, full_span=50.0, zoom_span=5.0, min_peak_height=40):
+        """
+        analyzer: open VISA resource for the HP 8565E.
+        full_span: span (GHz) used when there is no prediction, starting at 0 GHz.
+        zoom_span: span (GHz) around a predicted beat frequency.
+        min_peak_height: trace units the peak must rise above the trace median to count as found.
+        """
+        self.analyzer = analyzer
+        self.full_span = full_span
+        self.zoom_span = zoom_span
+        self.min_peak_height = min_peak_height
+        self.configured = False
+        self.window = None  # (start, stop) GHz currently set on the analyzer
+
+    def configure(self):
+        self.analyzer.write('TDF B')  # binary trace data, two bytes per point
+        self.configured = True
+        self.window = None
+
+    def invalidate(self):
+        self.configured = False
+        self.window = None
+
+    def set_window(self, start, stop):
+        """
+        Set the analyzer center and span for a start..stop (GHz) window, skipping it if unchanged.
+        """
+        if self.window == (start, stop):
+            return
+        self.analyzer.write(f":SENS:FREQ:CENT {(start + stop) / 2}GHz")
+        self.analyzer.write(f":SENS:FREQ:SPAN {stop - start}GHz")
+        self.window = (start, stop)
+
+    def zoom_window(self, predicted):
+        """
+        Window of zoom_span centred on a predicted beat frequency, kept inside 0..full_span.
+        """
+        start = min(max(predicted - self.zoom_span / 2, 0.0), self.full_span - self.zoom_span)
+        return start, start + self.zoom_span
+
+    def read_trace(self):
+        self.analyzer.write('TS')  # take a fresh sweep
+        self.analyzer.query('DONE?')  # returns once the sweep is complete
+        return self.analyzer.query_binary_values(
+            'TRA?', datatype='H', is_big_endian=True, container=np.array,
+            header_fmt='empty', data_points=TRACE_POINTS, expect_termination=False
+        )
+
+    def measure_peak(self, predicted=None):
+        """
+        Return the peak frequency (GHz). With a prediction the zoomed window is tried first;
+        if no peak stands out of it, the full span is measured instead. Returns None if no peak
+        stands out of the full span either (the highest point is noise or the LO feedthrough).
+        """
+        if not self.configured:
+            self.configure()
+        windows = [(0.0, self.full_span)]
+        if predicted is not None and predicted + self.zoom_span / 2 < self.full_span:
+            windows.insert(0, self.zoom_window(predicted))
+        for start, stop in windows:
+            self.set_window(start, stop)
+            trace = self.read_trace()
+            peak_freq, level = find_peak(trace, start, stop)
+            if level - np.median(trace) >= self.min_peak_height:
+                return peak_freq
+        return None
+
+
+class HP8565E(BeatFrequencyMeter):
+    def __init__(self, analyzer):
+        """
+        analyzer: open VISA resource for the HP 8565E.
+        """
+        self.analyzer = analyzer
+        self.trace_session = HP8565ETraceSession(analyzer)
+        self.adaptive = False    # take one sweep and poll DONE? instead of three timed marker reads
+        self.trace_mode = False  # read the whole trace and find the peak locally
+
+    def invalidate(self):
+        self.trace_session.invalidate()
+
+    def measure_beat(self, predicted=None):
+        """
+        Return the peak frequency (GHz).
+        Marker mode: repeated measurements are taken and the minimum value is returned.
+        With adaptive on, a single sweep is taken and DONE? is polled so the marker is read
+        once as soon as the sweep has completed.
+        Trace mode: the whole trace is read in one binary transfer and the peak is found locally,
+        with the span zoomed around predicted when it is given; None if there is no peak.
+        """
+        if self.trace_mode:
+            peak_freq = self.trace_session.measure_peak(predicted)
+            self.analyzer.write(":SYSTem:LOCal")
+            return peak_freq
+        full_window = (0.0, self.trace_session.full_span)
+        if self.trace_session.window != full_window:
+            # Trace mode left the analyzer zoomed (center moved too): back to the full span first
+            self.trace_session.set_window(*full_window)
+        if self.adaptive:
+            self.analyzer.write('TS')  # take a fresh sweep
+            self.analyzer.query('DONE?')  # returns once the sweep is complete
+            self.analyzer.write('MKPK HI')
+            peak_freq = self.analyzer.query('MKF?')
+        else:
+            self.analyzer.write('MKPK HI')
+            self.sleep(0.1, "marker")
+            peak_freq_1 = self.analyzer.query('MKF?')
+            self.sleep(0.1, "marker")
+            self.analyzer.write('MKPK HI')
+            self.sleep(0.1, "marker")
+            peak_freq_2 = self.analyzer.query('MKF?')
+            self.sleep(0.1, "marker")
+            self.analyzer.write('MKPK HI')
+            self.sleep(0.1, "marker")
+            peak_freq_3 = self.analyzer.query('MKF?')
+            peak_freq = min(peak_freq_1, peak_freq_2, peak_freq_3)
+
+        # Reset to the full span (25 GHz center, 50 GHz span) for the next measurement
+        self.analyzer.write(f":SENS:FREQ:CENT {full_window[1] / 2}GHz")
+        self.analyzer.write(f":SENS:FREQ:SPAN {full_window[1]}GHz")
+        self.trace_session.window = full_window
+        self.analyzer.write(":SYSTem:LOCal")
+        return float(peak_freq) / 1e9  # Convert Hz to GHz
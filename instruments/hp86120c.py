@@ -0,0 +1,63 @@
+"""
+Driver for the HP 86120C wavelength meter, used in delta mode as a beat frequency meter.
+"""
+
+from instruments.interfaces import BeatFrequencyMeter
+
+
+class HP86120C(BeatFrequencyMeter):
+    def __init__(self, meter, min_beat_freq=50):
+        """
+        meter: open VISA resource for the HP 86120C.
+        min_beat_freq: smallest beat frequency (GHz) the meter resolves; lower readings return None.
+        """
+        self.meter = meter
+        self.min_beat_freq = min_beat_freq
+        self.adaptive = False  # poll *OPC? instead of waiting a fixed 1.5 s per measurement
+
+    def prepare(self):
+        """
+        Clear the CALCulate3 states and turn on delta wavelength mode referenced to the shortest line.
+        Raises RuntimeError if the meter does not confirm a step (the remaining steps are still sent).
+        """
+        problems = []
+        self.meter.write(":CALCulate3:PRESet")
+        self.sleep(1, "prepare")
+        self.meter.write("*OPC?")
+        if self.meter.read().strip() != "1":
+            problems.append("clearing the CALCulate3 states did not complete")
+
+        self.meter.write(":CALCulate3:DELTa:REFerence:WAVelength MIN")
+        self.sleep(1, "prepare")
+
+        self.meter.write(":CALCulate3:DELTa:WAVelength ON")
+        self.sleep(1, "prepare")
+        self.meter.write("*OPC?")
+        if self.meter.read().strip() != "1":
+            problems.append("turning delta wavelength mode on did not complete")
+        self.sleep(1, "prepare")
+        if problems:
+            raise RuntimeError("Wavelength meter: " + "; ".join(problems))
+
+    def measure_beat(self, predicted=None):
+        """
+        Initiate a single measurement and return the beat frequency (GHz), or None if nothing is
+        returned or the reading is below min_beat_freq.
+        """
+        self.meter.write(":INIT:IMM")
+        if self.adaptive:
+            self.meter.query("*OPC?")  # returns once the measurement is complete
+        else:
+            self.sleep(1.5, "measurement")
+        result = self.meter.query(":CALC3:DATA? FREQuency").strip()
+        # If the query returns an empty string, return None immediately.
+        if not result:
+            return None
+        data = result.split(',')
+        freqs = [float(f) for f in data]
+        beat_node = min(freqs)  # assuming the reference delta is 0
+        self.meter.write(":SYSTem:LOCal")
+        beat_val = abs(beat_node / 1e9)  # Convert to GHz
+        if beat_val < self.min_beat_freq:  # Threshold check
+            return None
+        return beat_val
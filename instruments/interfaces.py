@@ -0,0 +1,179 @@
+"""
+Common interfaces (abstract base classes) of the instrument drivers used by the acquisition engine:
+
+    Laser               instruments/anritsu_ecl.py    Anritsu ECL frame (lasers 3 and 4)
+    BeatFrequencyMeter  instruments/hp86120c.py       HP 86120C wavelength meter (delta mode)
+                        instruments/hp8565e.py        HP 8565E spectrum analyzer (peak marker or trace)
+    SourceMeter         instruments/keithley2400.py   Keithley 2400 (PD bias and photocurrent)
+    Attenuator          instruments/agilent81577a.py  Agilent 81577A VOA
+    PowerMeter          instruments/nrp_z58.py        R&S NRP-Z58 power sensor
+                        instruments/ml2437a.py        Anritsu ML2437A power meter
+
+Driver methods raise the VISA errors of the underlying resource; handling and retries are up to the caller.
+"""
+import time
+from abc import ABC, abstractmethod
+
+
+class Driver(ABC):
+    profiler = None      # SweepProfiler timing the driver's waits (set by the SessionManager)
+    profile_name = None  # instrument name the waits are recorded under
+
+    def sleep(self, seconds, name='wait'):
+        """
+        Fixed wait of the driver, recorded by the profiler if one is attached.
+        """
+        if self.profiler is None:
+            time.sleep(seconds)
+        else:
+            self.profiler.sleep(seconds, self.profile_name, name)
+
+    def invalidate(self):
+        """
+        Forget any instrument state kept by the driver (e.g. after a timeout or reconnect) so it
+        is set up again before the next reading. Drivers that keep no state do nothing.
+        """
+
+
+class Laser(Driver):
+    @abstractmethod
+    def set_wavelength(self, channel: int, wavelength: float):
+        """
+        Set the wavelength (nm) of a laser channel.
+        """
+
+    @abstractmethod
+    def wait_complete(self, timeout: float):
+        """
+        Wait until the last wavelength change has completed, for at most timeout seconds.
+        """
+
+
+class BeatFrequencyMeter(Driver):
+    def prepare(self):
+        """
+        Set the instrument up for beat frequency readings at the start of a sweep.
+        Raises RuntimeError if the instrument does not confirm the setup.
+        """
+
+    @abstractmethod
+    def measure_beat(self, predicted=None):
+        """
+        Return the beat frequency (GHz), or None if the instrument cannot measure it.
+        predicted: expected beat frequency (GHz), if known, to narrow the measurement.
+        """
+
+
+class SourceMeter(Driver):
+    @abstractmethod
+    def configure(self):
+        """
+        Send the measurement configuration. Called once per sweep (and again after invalidate()).
+        """
+
+    def invalidate(self):
+        """
+        Forget the instrument state (e.g. after a timeout) so the next reading reconfigures it.
+        """
+        self.configured = False
+
+    @abstractmethod
+    def set_voltage(self, voltage: float):
+        """
+        Set the source voltage (V).
+        """
+
+    @abstractmethod
+    def voltage(self):
+        """
+        Return the source voltage setting (V).
+        """
+
+    @abstractmethod
+    def start(self):
+        """
+        Trigger a current measurement; the result is collected with fetch().
+        """
+
+    @abstractmethod
+    def fetch(self):
+        """
+        Collect the measurement started by start(): (mean, std) in mA.
+        """
+
+    @abstractmethod
+    def read(self):
+        """
+        Trigger a current measurement and collect it: (mean, std) in mA.
+        """
+
+    @abstractmethod
+    def local(self):
+        """
+        Return the instrument to front panel control.
+        """
+
+
+class Attenuator(Driver):
+    @abstractmethod
+    def set_attenuation(self, attenuation: float):
+        """
+        Set the attenuation (dB).
+        """
+
+    @abstractmethod
+    def attenuation(self):
+        """
+        Return the attenuation setting (dB).
+        """
+
+    @abstractmethod
+    def read_power(self):
+        """
+        Return the actual output power (dBm).
+        """
+
+    @abstractmethod
+    def output_enabled(self):
+        """
+        True if the optical output is enabled.
+        """
+
+    @abstractmethod
+    def local(self):
+        """
+        Return the instrument to front panel control.
+        """
+
+
+class PowerMeter(Driver):
+    @abstractmethod
+    def configure(self):
+        """
+        Send the measurement configuration. Called once per sweep (and again after invalidate()).
+        """
+
+    def invalidate(self):
+        """
+        Forget the meter state (e.g. after a timeout or zeroing) so the next reading reconfigures it.
+        """
+        self.configured = False
+
+    @abstractmethod
+    def zero(self):
+        """
+        Zero the sensor (no RF applied) and wait for the zeroing to complete.
+        """
+
+    def input_changed(self):
+        """
+        Called when the RF input changes (laser retune, new bias or attenuation). A meter that
+        averages continuously must not return readings from before the change; one that starts
+        a new measurement for every reading needs nothing.
+        """
+
+    @abstractmethod
+    def measure_dbm(self, beat_freq):
+        """
+        Return one averaged power reading (dBm), corrected for the beat frequency (GHz).
+        """
@@ -0,0 +1,90 @@
+"""
+Buffered measurement session for the Keithley 2400 SourceMeter (:INIT / :FETCh? of
+trigger_count samples). See the Keithley 2400 manual, Section 18 (SCPI command reference).
+"""
+import math
+
+from instruments.interfaces import SourceMeter
+
+
+class Keithley2400Session(SourceMeter):
+    def __init__(self, smu, samples=5, nplc=1.0):
+        """
+        smu: open VISA resource for the Keithley 2400 (sourcing the PD bias voltage).
+        samples: readings taken per measurement (trigger count), averaged on the computer.
+        nplc: integration time of each reading in power line cycles (0.01 to 10).
+        """
+        self.smu = smu
+        self.samples = samples
+        self.nplc = nplc
+        self.configured = False
+
+    def configure(self):
+        """
+        Send the measurement configuration. Called once per sweep (and again after invalidate()).
+        """
+        self.smu.write(':SENS:FUNC "CURR"')
+        self.smu.write(f':SENS:CURR:NPLC {self.nplc}')
+        self.smu.write(':FORM:ELEM CURR')  # readings contain the current only
+        self.smu.write(f':TRIG:COUN {self.samples}')
+        # :FETCh?/:READ? answer after the last sample; allow twice the integration time at 50 Hz
+        self.smu.timeout = max(self.smu.timeout, int(self.samples * self.nplc / 50 * 2000) + 2000)
+        self.configured = True
+
+    def invalidate(self):
+        """
+        Forget the instrument state (e.g. after a timeout) so the next reading reconfigures it.
+        """
+        self.configured = False
+
+    def set_voltage(self, voltage: float):
+        self.smu.write(f":SOUR:VOLT:LEV:IMM:AMPL {voltage}")
+
+    def voltage(self):
+        return float(self.smu.query(':SOUR:VOLT:LEV:IMM:AMPL?'))
+
+    @staticmethod
+    def statistics(response):
+        """
+        Mean and standard deviation (mA) of a comma separated list of currents in A.
+        Returns (nan, nan) if nothing can be parsed.
+        """
+        try:
+            values = [float(value) * 1000 for value in response.split(',') if value.strip()]
+        except ValueError:
+            values = []
+        if not values:
+            return float('nan'), float('nan')
+        mean = sum(values) / len(values)
+        if len(values) < 2:
+            return mean, 0.0
+        variance = sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+        return mean, math.sqrt(variance)
+
+    def start(self):
+        """
+        Trigger a measurement; the samples are collected with fetch().
+        """
+        if not self.configured:
+            self.configure()
+        self.smu.write(':INIT')
+
+    def fetch(self):
+        """
+        Collect the samples of the measurement started by start(): (mean, std) in mA.
+        """
+        return self.statistics(self.smu.query(':FETC?'))
+
+    def read(self):
+        """
+        Trigger a measurement and collect its samples: (mean, std) in mA.
+        """
+        if not self.configured:
+            self.configure()
+        return self.statistics(self.smu.query(':READ?'))
+
+    def local(self):
+        """
+        Return the instrument to front panel control (end of the run).
+        """
+        self.smu.write(':SYST:LOC')
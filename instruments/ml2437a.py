@@ -0,0 +1,84 @@
+"""
+Measurement session for the Anritsu ML2437A power meter (50 GHz setup, sensor A on channel 1),
+read as a free-running moving average in watts.
+See Equipment_Specific_Code/Anritsu_ML2437A_power_meter.py for the commands.
+"""
+import math
+import time
+
+from instruments.interfaces import PowerMeter
+
+
+class ML2437ASession(PowerMeter):
+    def __init__(self, meter, average_count=5, reading_time=0.1, frequency_tolerance=0.5):
+        """
+        meter: open VISA resource for the ML2437A.
+        average_count: readings averaged by the meter per measurement
+                       (5 matches the five readings previously averaged in software).
+        reading_time: duration (s) of one free-run reading; average_count of them fill the averaging window.
+        frequency_tolerance: beat frequency change (GHz) before CFFRQ is updated.
+        """
+        self.meter = meter
+        self.average_count = average_count
+        self.reading_time = reading_time
+        self.frequency_tolerance = frequency_tolerance
+        self.configured = False
+        self.frequency = None  # Cal factor frequency currently set on the meter (GHz)
+        self.window_full_at = 0.0  # time.monotonic() when the moving average only holds readings of the current input
+
+    def configure(self):
+        """
+        Send the measurement configuration. Called once per sweep (and again after invalidate()).
+        """
+        self.meter.write('CHUNIT 1,W')  # linear readings
+        self.meter.write(f'AVG A,MOV,{self.average_count}')  # moving average on the meter
+        self.meter.write('CFSRC A,FREQ')  # cal factor from the CFFRQ frequency
+        self.meter.write('TR3')  # free run (continuous mode)
+        self.configured = True
+        self.frequency = None
+        self.input_changed()  # the averaging restarts
+
+    def input_changed(self):
+        """
+        Hold the next reading back until the moving average has a full window after this change.
+        """
+        self.window_full_at = time.monotonic() + self.average_count * self.reading_time
+
+    def invalidate(self):
+        """
+        Forget the meter state (e.g. after a timeout or zeroing) so the next reading reconfigures it.
+        """
+        self.configured = False
+        self.frequency = None
+
+    def zero(self, wait=10):
+        """
+        Zero sensor A (ZERO A) and wait for it to complete; the meter is reconfigured before
+        the next reading.
+        """
+        self.meter.write('ZERO A')
+        self.sleep(wait, 'zero')
+        self.invalidate()
+
+    def set_frequency(self, beat_freq):
+        """
+        Update the cal factor frequency only if the beat frequency (GHz) moved past the tolerance.
+        """
+        if self.frequency is None or abs(beat_freq - self.frequency) > self.frequency_tolerance:
+            self.meter.write(f"CFFRQ A,{beat_freq}E9")
+            self.frequency = beat_freq
+
+    def measure_watts(self, beat_freq):
+        """
+        Return one meter-averaged power reading (W) at the given beat frequency (GHz).
+        """
+        if not self.configured:
+            self.configure()
+        self.set_frequency(beat_freq)
+        remaining = self.window_full_at - time.monotonic()
+        if remaining > 0:
+            self.sleep(remaining, 'average')  # readings from before the last input change are still in the average
+        return float(self.meter.query('O 1').strip())
+
+    def measure_dbm(self, beat_freq):
+        return math.log10(self.measure_watts(beat_freq)) * 10 + 30  # convert to dBm
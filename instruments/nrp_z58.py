@@ -0,0 +1,76 @@
+"""
+Measurement session for the Rohde & Schwarz NRP-Z58 power sensor.
+See Instrument_Manuals/Alltest-Rohde-and-Schwarz-NRP-Z58-UserManual.pdf for the SCPI commands.
+"""
+import math
+
+from instruments.interfaces import PowerMeter
+
+
+class NRPZ58Session(PowerMeter):
+    def __init__(self, sensor, average_count=5, aperture=1e-1, frequency_tolerance=0.5):
+        """
+        sensor: open VISA resource for the NRP-Z58.
+        average_count: number of measurement windows averaged by the sensor per reading
+                       (5 matches the five readings previously averaged in software).
+        aperture: length of one measurement window (s).
+        frequency_tolerance: beat frequency change (GHz) before SENS:FREQ is updated.
+        """
+        self.sensor = sensor
+        self.average_count = average_count
+        self.aperture = aperture
+        self.frequency_tolerance = frequency_tolerance
+        self.configured = False
+        self.frequency = None  # Correction frequency currently set on the sensor (GHz)
+
+    def configure(self):
+        """
+        Send the measurement configuration. Called once per sweep (and again after invalidate()).
+        """
+        self.sensor.write('INIT:CONT OFF')
+        self.sensor.write('SENS:FUNC "POW:AVG"')
+        self.sensor.write('SENS:AVER:COUN:AUTO OFF')
+        self.sensor.write(f'SENS:AVER:COUN {self.average_count}')
+        self.sensor.write('SENS:AVER:STAT ON')
+        self.sensor.write('SENS:AVER:TCON REP')
+        self.sensor.write(f'SENS:POW:AVG:APER {self.aperture}')
+        self.configured = True
+        self.frequency = None
+
+    def invalidate(self):
+        """
+        Forget the sensor state (e.g. after a timeout or zeroing) so the next reading reconfigures it.
+        """
+        self.configured = False
+        self.frequency = None
+
+    def zero(self, wait=10):
+        """
+        Zero the sensor (CAL:ZERO:AUTO ONCE) and wait for it to complete; the sensor is reconfigured
+        before the next reading.
+        """
+        self.sensor.write('CAL:ZERO:AUTO ONCE')
+        self.sleep(wait, 'zero')
+        self.invalidate()
+
+    def set_frequency(self, beat_freq):
+        """
+        Update the correction frequency only if the beat frequency (GHz) moved past the tolerance.
+        """
+        if self.frequency is None or abs(beat_freq - self.frequency) > self.frequency_tolerance:
+            self.sensor.write(f'SENS:FREQ {beat_freq}e9')
+            self.frequency = beat_freq
+
+    def measure_watts(self, beat_freq):
+        """
+        Return one sensor-averaged power reading (W) at the given beat frequency (GHz).
+        """
+        if not self.configured:
+            self.configure()
+        self.set_frequency(beat_freq)
+        self.sensor.write('INIT:IMM')
+        output = self.sensor.query('TRIG:IMM')
+        return float(output.split(',')[0])
+
+    def measure_dbm(self, beat_freq):
+        return math.log10(self.measure_watts(beat_freq)) * 10 + 30  # convert to dBm
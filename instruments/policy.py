@@ -0,0 +1,127 @@
+"""
+Timeout and retry policy for the instrument sessions: per-command timeouts learned from the
+recent response times (LatencyTracker) and retries with exponential backoff (RetryPolicy).
+"""
+import re
+import time
+from collections import deque
+
+import numpy as np
+
+NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+
+def command_key(method, command=None):
+    """
+    Key the latency of a call is recorded under: the method and the command with numbers replaced by #.
+    """
+    if command is None:
+        return method
+    return f"{method} {NUMBER.sub('#', command.strip())}"
+
+
+class CommandLatency:
+    def __init__(self, history):
+        self.durations = deque(maxlen=history)  # seconds
+        self.scale = 1.0                         # doubled after each timeout, decays back to 1 after successful calls
+        self.timeouts = 0
+
+
+class LatencyTracker:
+    def __init__(self, min_samples=20, percentile=99, factor=3.0, floor=0.5, history=200, decay=0.9):
+        """
+        min_samples: durations needed before a command gets a learned timeout.
+        percentile: percentile of the recent durations the timeout is based on.
+        factor: margin applied to that percentile.
+        floor: shortest learned timeout (s).
+        history: recent durations kept per command.
+        decay: the doubled factor of a command that timed out is multiplied by this after each
+               successful call, until it is back to factor.
+        """
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.factor = factor
+        self.floor = floor
+        self.history = history
+        self.decay = decay
+        self.commands = {}  # (instrument, context, key) -> CommandLatency
+        self.contexts = {}  # instrument -> context its durations are currently learned for
+
+    def set_context(self, instrument, context):
+        """
+        Learn the instrument's durations separately for each context, e.g. the measurement
+        settings a reading takes longer with. Durations of other contexts are kept for when
+        they are set again.
+        """
+        self.contexts[instrument] = context
+
+    def entry(self, instrument, key):
+        name = (instrument, self.contexts.get(instrument), key)
+        entry = self.commands.get(name)
+        if entry is None:
+            entry = self.commands[name] = CommandLatency(self.history)
+        return entry
+
+    def record(self, instrument, key, duration):
+        """
+        Record the duration (s) of a successful call.
+        """
+        entry = self.entry(instrument, key)
+        entry.durations.append(duration)
+        entry.scale = max(1.0, entry.scale * self.decay)
+
+    def timeout_for(self, instrument, key, ceiling):
+        """
+        Timeout (ms) for the next call of a command: the learned timeout, or ceiling (the
+        configured timeout, ms) while there are too few samples.
+        """
+        entry = self.commands.get((instrument, self.contexts.get(instrument), key))
+        if entry is None or len(entry.durations) < self.min_samples:
+            return ceiling
+        learned = max(self.floor, self.factor * entry.scale * np.percentile(entry.durations, self.percentile))
+        return min(ceiling, int(learned * 1000) + 1)
+
+    def note_timeout(self, instrument, key):
+        entry = self.entry(instrument, key)
+        entry.timeouts += 1
+        entry.scale *= 2
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=3, base_delay=0.25, multiplier=2.0, max_delay=2.0):
+        """
+        max_attempts: attempts in total, including the first.
+        base_delay: wait (s) before the first retry; multiplied by multiplier for each further retry,
+                    up to max_delay.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.retries = {}  # instrument -> retries since reset()
+        self.profiler = None  # SweepProfiler the backoff waits are recorded in, if any
+
+    def delay(self, attempt):
+        """
+        Wait (s) after failed attempt number attempt (1-based).
+        """
+        return min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+
+    def note_retry(self, instrument):
+        """
+        Count a retry of instrument.
+        """
+        self.retries[instrument] = self.retries.get(instrument, 0) + 1
+
+    def backoff(self, instrument, attempt):
+        """
+        Count a retry of instrument and wait before the next attempt.
+        """
+        self.note_retry(instrument)
+        if self.profiler is None:
+            time.sleep(self.delay(attempt))
+        else:
+            self.profiler.sleep(self.delay(attempt), instrument, 'retry backoff')
+
+    def reset(self):
+        self.retries = {}
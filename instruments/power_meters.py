@@ -0,0 +1,24 @@
+"""
+Power meters the acquisition engine can be configured with (SweepEngine(power_meter=...)).
+"""
+from instruments.nrp_z58 import NRPZ58Session
+from instruments.ml2437a import ML2437ASession
+
+DEFAULT_POWER_METER = 'nrp_z58'
+
+POWER_METERS = {
+    # R&S NRP-Z58 USB power sensor (110 GHz setup)
+    'nrp_z58': {
+        'driver': NRPZ58Session,
+        'address': 'RSNRP::0x00a8::100940::INSTR',
+        'timeout': 15000,
+        'bench_timeout': 5000,
+    },
+    # Anritsu ML2437A power meter on GPIB (50 GHz setup)
+    'ml2437a': {
+        'driver': ML2437ASession,
+        'address': 'GPIB0::13::INSTR',
+        'timeout': 15000,
+        'bench_timeout': 10000,
+    },
+}
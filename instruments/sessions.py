@@ -0,0 +1,318 @@
+"""
+VISA session manager: lazy opening, sessions kept across runs and per-instrument recovery.
+Timeouts, learned timeouts and reconnects are described in the README ("Power Meter and
+Program Variants"); the warn/error callbacks keep this package independent of the engine.
+"""
+import threading
+import time
+
+import pyvisa
+
+from instruments.policy import LatencyTracker, command_key
+
+
+def is_timeout(error):
+    return isinstance(error, pyvisa.errors.VisaIOError) and error.error_code == pyvisa.constants.StatusCode.error_timeout
+
+
+class ManagedResource:
+    """
+    Stand-in for an open VISA resource that reports timeouts to its SessionManager and survives
+    a reconnect (the underlying resource is replaced, the driver keeps this object).
+    Anything not wrapped here is forwarded to the underlying resource.
+    """
+
+    def __init__(self, manager, name, resource, timeout):
+        self._manager = manager
+        self._name = name
+        self._resource = resource
+        self._timeout = timeout
+        resource.timeout = timeout
+
+    @property
+    def visa_resource(self):
+        """
+        The underlying VISA resource (replaced on reconnect).
+        """
+        return self._resource
+
+    def replace(self, resource):
+        """
+        Use a newly opened VISA resource, with the same timeout.
+        """
+        self._resource = resource
+        resource.timeout = self._timeout
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._timeout = value  # restored on reconnect
+        self._resource.timeout = value
+
+    def _call(self, method, command, *args, **kwargs):
+        with self._manager.sessions[self._name].lock:
+            return self._locked_call(method, command, *args, **kwargs)
+
+    def _locked_call(self, method, command, *args, **kwargs):
+        manager = self._manager
+        session = manager.sessions[self._name]
+        waiting = command is not None and command.strip() in session.wait_queries
+        key = command_key(method, command)
+        timeout = self._timeout
+        if manager.adaptive_timeouts and not waiting:
+            timeout = manager.latency.timeout_for(self._name, key, self._timeout)
+        if self._resource.timeout != timeout:
+            self._resource.timeout = timeout
+        session.calls += 1
+        start = time.perf_counter()
+        try:
+            if command is None:
+                result = getattr(self._resource, method)(*args, **kwargs)
+            else:
+                result = getattr(self._resource, method)(command, *args, **kwargs)
+        except Exception as e:
+            if not is_timeout(e) or waiting:
+                self._profile(key, start)
+                raise
+            session.timeouts += 1
+            manager.latency.note_timeout(self._name, key)
+            try:
+                if timeout >= self._timeout:
+                    raise
+                # Only the learned timeout was too tight: allow the configured timeout
+                if manager.retry_policy is not None:
+                    manager.retry_policy.note_retry(self._name)
+                self._resource.timeout = self._timeout
+                result = self._resume(method, command, *args, **kwargs)
+            except Exception as e:
+                self._profile(key, start)
+                if is_timeout(e):
+                    manager.recover(self._name)
+                raise
+        duration = self._profile(key, start)
+        if not waiting:
+            manager.latency.record(self._name, key, duration)
+        return result
+
+    def _resume(self, method, command, *args, **kwargs):
+        """
+        Finish a call that timed out at a learned timeout: a query was sent, so wait for its
+        reply; a write is sent again.
+        """
+        if method in ('query', 'read'):
+            return self._resource.read()
+        if method == 'query_binary_values':
+            kwargs.pop('delay', None)
+            return self._resource.read_binary_values(*args, **kwargs)
+        return getattr(self._resource, method)(command, *args, **kwargs)
+
+    def _profile(self, key, start):
+        duration = time.perf_counter() - start
+        if self._manager.profiler is not None:
+            self._manager.profiler.record_call(self._name, key, duration)
+        return duration
+
+    def write(self, command):
+        return self._call('write', command)
+
+    def read(self):
+        return self._call('read', None)
+
+    def query(self, command):
+        return self._call('query', command)
+
+    def query_binary_values(self, command, *args, **kwargs):
+        return self._call('query_binary_values', command, *args, **kwargs)
+
+    def close(self):
+        self._resource.close()
+
+    def __getattr__(self, name):
+        return getattr(self._resource, name)
+
+
+class Session:
+    def __init__(self, name, address, driver, timeout, health_query, wait_queries):
+        self.name = name                  # short instrument name used by the engine ('ecl', 'keithley', ...)
+        self.address = address            # VISA address
+        self.driver_factory = driver      # driver(resource) -> driver object (see instruments/interfaces.py)
+        self.timeout = timeout            # VISA timeout (ms) set when the session is opened
+        self.health_query = health_query  # cheap query answered by a healthy instrument
+        self.wait_queries = wait_queries  # queries that block until the instrument is done; timeouts are expected
+        self.resource = None              # ManagedResource once opened
+        self.driver = None
+        self.lock = threading.RLock()     # held for every call to the instrument and during its recovery
+        # Statistics since SessionManager.reset_statistics()
+        self.calls = 0
+        self.timeouts = 0
+        self.reconnects = 0
+
+
+class SessionManager:
+    def __init__(self, resource_manager, warn=print, error=print, health_timeout=2000):
+        """
+        resource_manager: VISA resource manager the sessions are opened with.
+        warn: warn(message) callback for problems that were handled (e.g. a reconnect).
+        error: error(message) callback for failures (e.g. an instrument that cannot be opened).
+        health_timeout: timeout (ms) of the health check after a timeout.
+        """
+        self.rm = resource_manager
+        self.warn = warn
+        self.error = error
+        self.health_timeout = health_timeout
+        self.sessions = {}
+        self.lock = threading.RLock()
+        self.latency = LatencyTracker()
+        self.adaptive_timeouts = False  # use the learned per-command timeouts
+        self.profiler = None            # SweepProfiler the calls are recorded in, if any
+        self.retry_policy = None        # RetryPolicy counting the calls retried at the configured timeout, if any
+
+    def register(self, name, address, driver, timeout, health_query='*IDN?', wait_queries=()):
+        """
+        Declare an instrument; nothing is opened until its driver is first used.
+        """
+        self.sessions[name] = Session(name, address, driver, timeout, health_query, wait_queries)
+
+    def is_open(self, name):
+        return self.sessions[name].resource is not None
+
+    def open(self, name):
+        """
+        Open the session (if not open yet) and create its driver.
+        Raises ConnectionError naming the instrument if it cannot be opened.
+        """
+        session = self.sessions[name]
+        with self.lock:
+            if session.resource is None:
+                try:
+                    resource = self.rm.open_resource(session.address)
+                except Exception as e:
+                    raise ConnectionError(f"Could not connect to {name} at {session.address}: {e}") from e
+                session.resource = ManagedResource(self, name, resource, session.timeout)
+                session.driver = session.driver_factory(session.resource)
+                session.driver.profiler = self.profiler
+                session.driver.profile_name = name
+            return session
+
+    def driver(self, name):
+        """
+        The instrument's driver, opening the session on first use.
+        """
+        session = self.sessions[name]
+        if session.driver is None:
+            self.open(name)
+        return session.driver
+
+    def resource(self, name):
+        """
+        The instrument's (managed) VISA resource, opening the session on first use.
+        """
+        return self.open(name).resource
+
+    def open_all(self):
+        """
+        Open every registered session now. Instruments that cannot be opened are logged and
+        left closed (they are retried on first use). Returns the names that failed.
+        """
+        failed = []
+        for name in self.sessions:
+            try:
+                self.open(name)
+            except ConnectionError as e:
+                self.error(str(e))
+                failed.append(name)
+        return failed
+
+    def healthy(self, name):
+        """
+        True if the instrument answers its health query within health_timeout. The instrument is
+        cleared first, so a late reply to a timed-out query is not taken for the answer.
+        """
+        session = self.sessions[name]
+        with session.lock:
+            resource = session.resource.visa_resource
+            try:
+                resource.clear()
+            except Exception:
+                pass  # not supported by every interface; the health query still tells
+            timeout = resource.timeout
+            try:
+                resource.timeout = self.health_timeout
+                resource.query(session.health_query)
+                return True
+            except Exception:
+                return False
+            finally:
+                try:
+                    resource.timeout = timeout
+                except Exception:
+                    pass
+
+    def reconnect(self, name):
+        """
+        Close and reopen one instrument's session, keeping its ManagedResource and driver.
+        """
+        session = self.sessions[name]
+        with session.lock:
+            managed = session.resource
+            try:
+                managed.visa_resource.close()
+            except Exception:
+                pass
+            managed.replace(self.rm.open_resource(session.address))
+            session.reconnects += 1
+
+    def recover(self, name):
+        """
+        Handle a timeout: health check, reconnect the instrument if it does not answer and
+        invalidate its driver either way.
+        """
+        session = self.sessions[name]
+        with session.lock:
+            if session.resource is None:
+                return
+            if self.healthy(name):
+                self.warn(f"{name} timed out but answers {session.health_query}; keeping the session")
+            else:
+                self.warn(f"{name} at {session.address} not responding, reconnecting...")
+                try:
+                    self.reconnect(name)
+                except Exception as e:
+                    self.error(f"Could not reconnect {name}: {e}")
+            session.driver.invalidate()
+
+    def statistics(self):
+        """
+        Calls, timeouts and reconnects per instrument since reset_statistics().
+        """
+        return {
+            name: {'calls': session.calls, 'timeouts': session.timeouts, 'reconnects': session.reconnects}
+            for name, session in self.sessions.items()
+        }
+
+    def reset_statistics(self):
+        for session in self.sessions.values():
+            session.calls = session.timeouts = session.reconnects = 0
+
+    def invalidate(self):
+        """
+        Make every open driver reconfigure its instrument before the next reading (sessions stay open).
+        """
+        for session in self.sessions.values():
+            if session.driver is not None:
+                session.driver.invalidate()
+
+    def close(self, name):
+        session = self.sessions[name]
+        with self.lock, session.lock:
+            if session.resource is not None:
+                session.resource.close()
+                session.resource = None
+                session.driver = None
+
+    def close_all(self):
+        for name in self.sessions:
+            self.close(name)
@@ -0,0 +1,468 @@
+"""
+Simulated VISA backend for the heterodyne bench: SimulatedResourceManager replaces
+pyvisa.ResourceManager() with fake instruments that share one SimulatedBench.
+
+Usage:
+    rm = SimulatedResourceManager(SimulatedBench(latency=0.01, noise=0.05, seed=1))
+    app = MeasurementApp(resource_manager=rm)
+"""
+import math
+import random
+import re
+import threading
+import time
+
+C = 299792458  # Speed of light in m/s
+
+# Default VISA addresses used by MeasurementApp, mapped to the simulated instrument type
+DEFAULT_ADDRESSES = {
+    'GPIB0::10::INSTR': 'ecl',
+    'GPIB0::20::INSTR': 'wavelength_meter',
+    'GPIB0::18::INSTR': 'spectrum_analyzer',
+    'GPIB0::24::INSTR': 'keithley',
+    'RSNRP::0x00a8::100940::INSTR': 'power_sensor',
+    'GPIB0::13::INSTR': 'ml2437a',
+    'GPIB0::26::INSTR': 'voa',
+}
+
+
+class SimulatedBench:
+    """
+    Shared physical state of the simulated setup.
+
+    The two lasers approach a new set wavelength exponentially with time constant
+    `settle_time` (s). Every bus transaction waits `latency` (s) and every reading
+    gets Gaussian noise scaled by `noise`. The random generator is seeded so that a
+    run with the same settings and command sequence reproduces the same readings.
+    """
+
+    def __init__(self, laser_3_WL=1550.0, laser_4_WL=1548.0, laser_4_offset=0.0,
+                 settle_time=0.5, latency=0.0, noise=0.0, seed=0,
+                 photocurrent=5.0, keithley_voltage=-2.0, p_actual=3.0,
+                 rf_bandwidth=60.0, esa_max_freq=50.0, wlm_min_beat=10.0,
+                 wlm_measure_time=0.0, esa_sweep_time=0.0):
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.settle_time = settle_time      # Laser tuning time constant (s)
+        self.latency = latency              # Delay per bus transaction (s)
+        self.noise = noise                  # Noise scale (GHz for frequencies, relative for powers)
+        self.laser_4_offset = laser_4_offset  # Actual minus set wavelength of laser 4 (nm)
+        self.photocurrent = photocurrent    # PD photocurrent (mA)
+        self.keithley_voltage = keithley_voltage  # Keithley source voltage (V)
+        self.p_actual = p_actual            # VOA output power (dBm)
+        self.rf_bandwidth = rf_bandwidth    # PD 3 dB bandwidth (GHz)
+        self.esa_max_freq = esa_max_freq    # Highest beat the ESA can see (GHz)
+        self.wlm_min_beat = wlm_min_beat    # Smallest line spacing the wavelength meter resolves (GHz)
+        self.wlm_measure_time = wlm_measure_time  # Duration of one wavelength meter measurement (s)
+        self.esa_sweep_time = esa_sweep_time  # Duration of one ESA sweep (s)
+        self.voa_enabled = True
+        self.voa_attenuation = 0.0          # VOA attenuation (dB) on top of the p_actual setting
+
+        # Commanded wavelengths, the wavelength each laser was tuning from and when
+        self._target = {3: laser_3_WL, 4: laser_4_WL}
+        self._start = dict(self._target)
+        self._set_time = {3: 0.0, 4: 0.0}
+
+    def set_wavelength(self, channel: int, wavelength: float):
+        with self.lock:
+            now = time.monotonic()
+            self._start[channel] = self._actual(channel, now)
+            self._target[channel] = wavelength
+            self._set_time[channel] = now
+
+    def _actual(self, channel, now):
+        start = self._start[channel]
+        target = self._target[channel]
+        if self.settle_time <= 0:
+            return target
+        elapsed = now - self._set_time[channel]
+        return target + (start - target) * math.exp(-elapsed / self.settle_time)
+
+    def wavelength(self, channel: int):
+        """
+        Actual emission wavelength (nm) of a laser channel right now.
+        """
+        with self.lock:
+            wl = self._actual(channel, time.monotonic())
+        if channel == 4:
+            wl += self.laser_4_offset
+        return wl
+
+    def settle_remaining(self, channel: int, settled_after=5.0):
+        """
+        Seconds until a laser is within exp(-settled_after) of its set wavelength.
+        """
+        with self.lock:
+            elapsed = time.monotonic() - self._set_time[channel]
+        return max(0.0, settled_after * self.settle_time - elapsed)
+
+    def beat_frequency(self):
+        """
+        Noise-free beat frequency (GHz) between lasers 3 and 4.
+        """
+        f3 = C / (self.wavelength(3) * 1e-9)
+        f4 = C / (self.wavelength(4) * 1e-9)
+        return abs(f3 - f4) / 1e9
+
+    def optical_power(self):
+        """
+        VOA output power (dBm) after the set attenuation.
+        """
+        return self.p_actual - self.voa_attenuation
+
+    def current(self):
+        """
+        PD photocurrent (mA); proportional to the optical power reaching the PD.
+        """
+        return self.photocurrent * 10 ** (-self.voa_attenuation / 10)
+
+    def rf_power_watts(self, freq_ghz):
+        """
+        RF power delivered into 50 ohms by the PD at a beat frequency, with a
+        single-pole roll-off at `rf_bandwidth`.
+        """
+        current = self.current() / 1000
+        rolloff = 1 / (1 + (freq_ghz / self.rf_bandwidth) ** 2)
+        return 0.5 * current ** 2 * 50 * rolloff
+
+    def gauss(self, scale=1.0):
+        with self.lock:
+            return self.rng.gauss(0, self.noise * scale) if self.noise > 0 else 0.0
+
+    def uniform(self, low, high):
+        with self.lock:
+            return self.rng.uniform(low, high)
+
+    def wait(self):
+        """
+        Emulate the round-trip time of one bus transaction.
+        """
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+
+class SimulatedResource:
+    """
+    Base class for a simulated VISA resource. Subclasses implement handle(),
+    which returns the reply string for a query or None for a plain write.
+    """
+
+    def __init__(self, bench: SimulatedBench, resource_name: str):
+        self.bench = bench
+        self.resource_name = resource_name
+        self.timeout = 2000
+        self._reply = None
+
+    def write(self, command: str):
+        self.bench.wait()
+        command = command.strip()
+        reply = self.handle(command)
+        if reply is not None:
+            self._reply = reply
+        return len(command)
+
+    def read(self):
+        if self._reply is None:
+            raise RuntimeError(f"{self.resource_name}: read with no pending reply")
+        reply, self._reply = self._reply, None
+        return reply + "\n"
+
+    def query(self, command: str):
+        self.write(command)
+        return self.read()
+
+    def clear(self):
+        self._reply = None  # device clear drops any pending reply
+
+    def close(self):
+        pass
+
+    def handle(self, command: str):
+        if command == '*IDN?':
+            return f"SIMULATED,{type(self).__name__},0,1.0"
+        if command == '*OPC?':
+            return "1"
+        return None
+
+
+class SimulatedECL(SimulatedResource):
+    """
+    Anritsu ECL frame: CHn:L=<nm> sets a laser wavelength. *OPC? returns once
+    both lasers have settled.
+    """
+
+    def handle(self, command):
+        match = re.fullmatch(r'CH(\d):L=([-+0-9.eE]+)', command)
+        if match:
+            self.bench.set_wavelength(int(match.group(1)), float(match.group(2)))
+            return None
+        match = re.fullmatch(r'CH(\d):L\?', command)
+        if match:
+            return f"{self.bench.wavelength(int(match.group(1))):.3f}"
+        if command == '*OPC?':
+            time.sleep(max(self.bench.settle_remaining(3), self.bench.settle_remaining(4)))
+        return super().handle(command)
+
+
+class SimulatedWavelengthMeter(SimulatedResource):
+    """
+    HP 86120C: :INIT:IMM captures a measurement which :CALC3:DATA? FREQuency returns.
+    In delta mode the reference line reads 0 and the other line its (negative)
+    offset; lines closer than `wlm_min_beat` are not resolved. *OPC? returns once
+    the measurement started by :INIT:IMM has completed.
+    """
+
+    def __init__(self, bench, resource_name):
+        super().__init__(bench, resource_name)
+        self.delta = False
+        self._captured = None
+        self._done_time = 0.0
+
+    def handle(self, command):
+        upper = command.upper()
+        if upper == ':INIT:IMM':
+            self._captured = self.bench.beat_frequency()
+            self._done_time = time.monotonic() + self.bench.wlm_measure_time
+            return None
+        if upper == '*OPC?':
+            time.sleep(max(0.0, self._done_time - time.monotonic()))
+        if upper.startswith(':CALC3:DATA?'):
+            beat = self._captured if self._captured is not None else self.bench.beat_frequency()
+            beat = abs(beat + self.bench.gauss(1.0))
+            f_ref = 0.0 if self.delta else C / (self.bench.wavelength(3) * 1e-9)
+            if beat < self.bench.wlm_min_beat:
+                return f"{f_ref:.6e}"
+            return f"{f_ref:.6e},{f_ref - beat * 1e9:.6e}"
+        if upper == ':CALCULATE3:PRESET':
+            self.delta = False
+            return None
+        if upper == ':CALCULATE3:DELTA:WAVELENGTH ON':
+            self.delta = True
+            return None
+        if upper == ':CALCULATE3:DELTA:WAVELENGTH OFF':
+            self.delta = False
+            return None
+        return super().handle(command)
+
+
+class SimulatedSpectrumAnalyzer(SimulatedResource):
+    """
+    HP 8565E: MKPK HI puts the marker on the beat note if it is inside the span,
+    otherwise on a random point of the noise floor. MKF? returns the marker in Hz.
+    TS takes a sweep and DONE? returns 1 once it has completed. TRA? (read with
+    query_binary_values) returns a 601-point trace with the beat note as a peak
+    of about 400 display units over a noise floor of about 100.
+    """
+
+    def __init__(self, bench, resource_name):
+        super().__init__(bench, resource_name)
+        self.center = 25.0  # GHz
+        self.span = 50.0  # GHz
+        self.marker = 0.0
+        self._done_time = 0.0
+
+    def in_window(self, freq):
+        start = self.center - self.span / 2
+        return start <= freq <= start + self.span and freq <= self.bench.esa_max_freq
+
+    def handle(self, command):
+        upper = command.upper()
+        if upper == 'TS':
+            self._done_time = time.monotonic() + self.bench.esa_sweep_time
+            return None
+        if upper == 'DONE?':
+            time.sleep(max(0.0, self._done_time - time.monotonic()))
+            return "1"
+        if upper == 'MKPK HI':
+            beat = self.bench.beat_frequency()
+            if self.in_window(beat):
+                self.marker = abs(beat + self.bench.gauss(0.1))
+            else:
+                start = self.center - self.span / 2
+                self.marker = self.bench.uniform(start, start + self.span)
+            return None
+        if upper == 'MKF?':
+            return f"{self.marker * 1e9:.4E}"
+        if upper in ('TDF B', 'TDF P', 'TDF M'):
+            return None
+        if upper == 'ID?':
+            return "HP8565E"
+        match = re.fullmatch(r':SENS:FREQ:SPAN\s+([0-9.eE+-]+)\s*GHZ', upper)
+        if match:
+            self.span = float(match.group(1))
+            return None
+        match = re.fullmatch(r':SENS:FREQ:CENT\s+([0-9.eE+-]+)\s*GHZ', upper)
+        if match:
+            self.center = float(match.group(1))
+            return None
+        return super().handle(command)
+
+    def trace(self, points=601):
+        beat = self.bench.beat_frequency()
+        start = self.center - self.span / 2
+        bin_width = self.span / (points - 1)
+        line_width = max(0.02, bin_width)  # GHz, roughly the resolution bandwidth
+        values = []
+        for i in range(points):
+            freq = start + i * bin_width
+            level = 100 + 5 * self.bench.gauss(1.0) + self.bench.uniform(0, 5)
+            if self.in_window(beat):
+                level += 400 * math.exp(-0.5 * ((freq - beat) / line_width) ** 2)
+            values.append(max(0, min(610, int(level))))
+        return values
+
+    def query_binary_values(self, command, datatype='H', is_big_endian=True, container=list,
+                            header_fmt='empty', data_points=601, expect_termination=False):
+        self.bench.wait()
+        if command.strip().upper() != 'TRA?':
+            raise ValueError(f"{self.resource_name}: unsupported binary query {command}")
+        return container(self.trace(data_points))
+
+
+class SimulatedKeithley(SimulatedResource):
+    """
+    Keithley 2400: :MEASure:CURRent? returns the usual five-element comma list
+    (voltage, current, resistance, timestamp, status); :SOUR:VOLT:LEV:IMM:AMPL <V> sets the bias.
+    After :FORM:ELEM CURR and :TRIG:COUN <n>, :INIT takes n current samples that :FETC? returns
+    (:READ? does both).
+    """
+
+    def __init__(self, bench, resource_name):
+        super().__init__(bench, resource_name)
+        self.trigger_count = 1
+        self.samples = []
+
+    def sample(self):
+        return self.bench.current() * (1 + self.bench.gauss(0.01)) / 1000
+
+    def handle(self, command):
+        upper = command.upper()
+        match = re.fullmatch(r':TRIG(?:GER)?:COUN(?:T)?\s+([0-9]+)', upper)
+        if match:
+            self.trigger_count = int(match.group(1))
+            return None
+        if upper in (':INIT', ':INITIATE'):
+            self.samples = [self.sample() for _ in range(self.trigger_count)]
+            return None
+        if upper in (':FETC?', ':FETCH?'):
+            return ','.join(f"{value:+.6E}" for value in self.samples)
+        if upper == ':READ?':
+            self.samples = [self.sample() for _ in range(self.trigger_count)]
+            return ','.join(f"{value:+.6E}" for value in self.samples)
+        match = re.fullmatch(r':SOUR:VOLT:LEV:IMM:AMPL\s+([-+0-9.eE]+)', upper)
+        if match:
+            self.bench.keithley_voltage = float(match.group(1))
+            return None
+        if upper == ':MEASURE:CURRENT?':
+            current = self.sample()
+            return f"{self.bench.keithley_voltage:+.6E},{current:+.6E},+9.910000E+37,+1.000000E+00,+1.994800E+04"
+        if upper == ':SOUR:VOLT:LEV:IMM:AMPL?':
+            return f"{self.bench.keithley_voltage:+.6E}"
+        return super().handle(command)
+
+
+class SimulatedPowerSensor(SimulatedResource):
+    """
+    R&S NRP-Z58: TRIG:IMM returns the averaged power in watts at the configured
+    SENS:FREQ correction frequency.
+    """
+
+    def __init__(self, bench, resource_name):
+        super().__init__(bench, resource_name)
+        self.frequency = 0.0  # GHz
+
+    def handle(self, command):
+        upper = command.upper()
+        match = re.fullmatch(r'SENS:FREQ\s+([-+0-9.eE]+)', upper)
+        if match:
+            self.frequency = float(match.group(1)) / 1e9
+            return None
+        if upper == 'TRIG:IMM':
+            watts = self.bench.rf_power_watts(self.bench.beat_frequency())
+            watts *= 1 + self.bench.gauss(0.01)
+            return f"{max(watts, 1e-12):.6e},0.000000e+00"
+        return super().handle(command)
+
+
+class SimulatedML2437A(SimulatedResource):
+    """
+    Anritsu ML2437A: O 1 returns the channel 1 power at the CFFRQ A cal factor frequency,
+    in dBm or in watts after CHUNIT 1,W.
+    """
+
+    def __init__(self, bench, resource_name):
+        super().__init__(bench, resource_name)
+        self.frequency = 0.0  # GHz
+        self.watts = False
+
+    def handle(self, command):
+        upper = command.upper()
+        match = re.fullmatch(r'CFFRQ\s+A,\s*([-+0-9.eE]+)', upper)
+        if match:
+            self.frequency = float(match.group(1)) / 1e9
+            return None
+        match = re.fullmatch(r'CHUNIT\s+1,\s*(\w+)', upper)
+        if match:
+            self.watts = match.group(1) == 'W'
+            return None
+        if upper == 'O 1':
+            watts = self.bench.rf_power_watts(self.bench.beat_frequency())
+            watts *= 1 + self.bench.gauss(0.01)
+            if self.watts:
+                return f"{max(watts, 1e-12):.4E}"
+            return f"{10 * math.log10(max(watts, 1e-12)) + 30:.2f}"
+        return super().handle(command)
+
+
+class SimulatedVOA(SimulatedResource):
+    """
+    Agilent 81577A attenuator: READ:POW? returns the output power in dBm;
+    :INP:ATT <dB> (or :INPut:ATTenuation) sets the attenuation.
+    """
+
+    def handle(self, command):
+        upper = command.upper()
+        match = re.fullmatch(r':INP(?:UT)?:ATT(?:ENUATION)?\s+([-+0-9.eE]+)(?:DB)?', upper)
+        if match:
+            self.bench.voa_attenuation = float(match.group(1))
+            return None
+        if upper in (':INP:ATT?', ':INPUT:ATTENUATION?'):
+            return f"{self.bench.voa_attenuation:+.6E}"
+        if upper == 'READ:POW?':
+            return f"{self.bench.optical_power() + self.bench.gauss(0.01):+.6E}"
+        if upper == ':OUTPUT:STATE?':
+            return "1" if self.bench.voa_enabled else "0"
+        return super().handle(command)
+
+
+SIMULATED_TYPES = {
+    'ecl': SimulatedECL,
+    'wavelength_meter': SimulatedWavelengthMeter,
+    'spectrum_analyzer': SimulatedSpectrumAnalyzer,
+    'keithley': SimulatedKeithley,
+    'power_sensor': SimulatedPowerSensor,
+    'ml2437a': SimulatedML2437A,
+    'voa': SimulatedVOA,
+}
+
+
+class SimulatedResourceManager:
+    """
+    Stand-in for pyvisa.ResourceManager() that opens simulated resources.
+    `addresses` maps each VISA address to one of the SIMULATED_TYPES keys.
+    """
+
+    def __init__(self, bench: SimulatedBench = None, addresses: dict = None):
+        self.bench = bench if bench is not None else SimulatedBench()
+        self.addresses = dict(DEFAULT_ADDRESSES if addresses is None else addresses)
+
+    def list_resources(self):
+        return tuple(self.addresses)
+
+    def open_resource(self, resource_name: str):
+        if resource_name not in self.addresses:
+            raise ValueError(f"No simulated instrument at {resource_name}")
+        return SIMULATED_TYPES[self.addresses[resource_name]](self.bench, resource_name)
+
+    def close(self):
+        pass
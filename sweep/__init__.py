@@ -0,0 +1,3 @@
+"""
+Sweep engine helpers for the heterodyne measurement.
+"""
@@ -0,0 +1,139 @@
+"""
+Batch queue of sweeps run back to back on one SweepEngine.
+The batch file format (defaults, jobs, file_template) is described in the README ("Batch Queue").
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from sweep.engine import SweepConfig, print_log
+from sweep.export import export_journal
+from sweep.log import WARNING, ERROR
+from sweep.tracking import optical_frequency
+from sweep.search import optical_wavelength
+
+DEFAULT_FILE_TEMPLATE = "{device_num}_job{index}_{start_freq:g}-{end_freq:g}GHz_{date}_{time}.txt"
+
+
+class BatchJob:
+    def __init__(self, index, config, file_template):
+        self.index = index              # 1-based position in the queue
+        self.config = config            # SweepConfig
+        self.file_template = file_template
+        self.result = None              # SweepResult once run
+
+    def file_path(self):
+        """
+        The job's .txt save file: its save_file_path or the rendered file template.
+        """
+        if self.config.save_file_path:
+            return self.config.save_file_path
+        fields = self.config.to_dict()
+        fields.update(index=self.index, date=time.strftime("%Y%m%d"), time=time.strftime("%H%M%S"))
+        return self.file_template.format(**fields)
+
+
+class BatchQueue:
+    def __init__(self, file_template=DEFAULT_FILE_TEMPLATE, output_dir=''):
+        """
+        file_template: str.format template of the save file for jobs without a save_file_path.
+        output_dir: directory the rendered save files are placed in.
+        """
+        self.file_template = os.path.join(output_dir, file_template) if output_dir else file_template
+        self.jobs = []
+
+    def add(self, config):
+        self.jobs.append(BatchJob(len(self.jobs) + 1, config, self.file_template))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a batch file (see the module docstring).
+        """
+        with open(path, 'r') as f:
+            batch = json.load(f)
+        queue = cls(batch.get('file_template', DEFAULT_FILE_TEMPLATE), batch.get('output_dir', ''))
+        defaults = batch.get('defaults', {})
+        for job in batch['jobs']:
+            queue.add(SweepConfig(**dict(defaults, **job)))
+        return queue
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def __iter__(self):
+        return iter(self.jobs)
+
+
+class BatchRunner:
+    def __init__(self, engine, log=print_log, contiguous_span=1.0):
+        """
+        engine: SweepEngine with the instruments open; it is reused for every job.
+        log: log(message, kind=STATUS, **data) callback.
+        contiguous_span: largest gap (GHz) between the end frequency of a job and the start frequency
+                         of the next one for the two to count as contiguous (at least one sweep step).
+        """
+        self.engine = engine
+        self.log = log
+        self.contiguous_span = contiguous_span
+
+    def continued_laser_4_WL(self, previous, config):
+        """
+        Laser 4 wavelength that continues the previous job's sweep to config.start_freq,
+        or None if the jobs are not contiguous.
+        """
+        records = self.engine.records
+        if previous is None or previous.result.status != 'completed' or not len(records):
+            return None
+        if previous.config.laser_3_WL != config.laser_3_WL:
+            return None
+        step = abs(previous.config.end_freq - previous.config.start_freq) / max(previous.config.num_steps, 1)
+        if abs(config.start_freq - previous.config.end_freq) > max(self.contiguous_span, step):
+            return None
+        # Extrapolate from the last measured point: a higher beat frequency is a lower laser 4 frequency
+        last_beat_freq = records['beat_freq'][-1]
+        last_laser_4_WL = records['laser_4_WL'][-1]
+        if not (np.isfinite(last_beat_freq) and np.isfinite(last_laser_4_WL)):
+            return None
+        return optical_wavelength(optical_frequency(last_laser_4_WL) - (config.start_freq - last_beat_freq))
+
+    def run(self, queue):
+        """
+        Run the jobs in order, exporting each one as it finishes. A job that fails is logged
+        and the batch moves on to the next one; stopping a sweep (engine.stop_event) ends the batch.
+        Returns the list of jobs, each with its result.
+        """
+        previous = None
+        for job in queue:
+            if self.engine.stop_event.is_set():
+                # Stopped between two jobs (e.g. while the previous one was exported)
+                self.log("Batch stopped by user.")
+                break
+            config = job.config
+            config.save_file_path = job.file_path()
+            directory = os.path.dirname(config.save_file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            laser_4_WL = self.continued_laser_4_WL(previous, config)
+            if laser_4_WL is not None:
+                config.laser_4_WL = laser_4_WL
+                config.use_laser_cache = False  # the live laser state is better than the cache
+                self.log(f"Job {job.index} continues from job {previous.index}, starting laser 4 at {laser_4_WL:.3f} nm")
+            self.log(f"BATCH JOB {job.index} of {len(queue)}: device {config.device_num}, "
+                     f"{config.start_freq}-{config.end_freq} GHz -> {config.save_file_path}")
+
+            job.result = self.engine.run(config)
+            if job.result.journal_path is not None:
+                export_journal(job.result.journal_path, config.save_file_path,
+                               job.result.sweep_run_time, job.result.total_run_time, self.log)
+            if job.result.status == 'error':
+                self.log(f"Job {job.index} failed: {job.result.error}", ERROR)
+            elif job.result.status != 'completed':
+                self.log(f"Job {job.index} {job.result.status}.", WARNING)
+            previous = job
+            if job.result.status == 'stopped':
+                self.log("Batch stopped by user.")
+                break
+        return queue.jobs
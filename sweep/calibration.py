@@ -0,0 +1,149 @@
+"""
+RF loss calibration tables, parsed once per file (until it changes on disk).
+"""
+import os
+import re
+
+import numpy as np
+import openpyxl
+
+_loss_tables = {}  # (absolute path, mtime) -> LossTable
+
+
+def read_excel_data(filepath: str):
+    """
+    Read the Excel file containing RF probe loss data.
+    Returns two numpy arrays: one for frequency and one for loss.
+    """
+    workbook = openpyxl.load_workbook(filepath, read_only=True)
+    sheet = workbook.active
+    frequency = []
+    loss = []
+    for row in sheet.iter_rows(min_row=1, max_col=2, values_only=True):
+        if row[0] is None or row[1] is None:
+            continue  # skip empty rows
+        frequency.append(row[0])
+        loss.append(row[1])
+    workbook.close()
+    return np.array(frequency, dtype=float), np.array(loss, dtype=float)
+
+
+def read_s2p_file(filepath: str):
+    """
+    Read the .s2p file containing network analyzer data.
+    Extracts frequency and S-parameter (S12 and S21) data and returns the averaged loss.
+    """
+    frequencies = []
+    s12 = []
+    s21 = []
+    with open(filepath, 'r') as file:
+        lines = file.readlines()
+    freq_unit = 'hz'
+    for line in lines:
+        if line.startswith('#'):
+            parts = line.split()
+            for part in parts:
+                if part.lower() in ['hz', 'khz', 'mhz', 'ghz']:
+                    freq_unit = part.lower()
+            continue
+        if not line.startswith('!'):
+            values = re.split(r'\s+', line.strip())
+            if len(values) >= 9:
+                frequencies.append(float(values[0]))
+                s21.append(float(values[3]))  # S21 in dB
+                s12.append(float(values[5]))  # S12 in dB
+    frequencies = np.array(frequencies)
+    s_avg = (np.array(s12) + np.array(s21)) / 2
+    if freq_unit == 'khz':
+        frequencies = frequencies / 1e6
+    elif freq_unit == 'mhz':
+        frequencies = frequencies / 1e3
+    elif freq_unit == 'hz':
+        frequencies = frequencies / 1e9
+    return frequencies, s_avg
+
+
+def linear_interpolation(x, y, x_new):
+    """
+    Linearly interpolate y(x) at x_new, holding the end values outside the range of x.
+    """
+    return np.interp(np.asarray(x_new, dtype=float), np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+
+
+class LossTable:
+    """
+    Loss (dB) versus frequency (GHz) from one calibration file.
+    Calling it returns the magnitude of the interpolated loss.
+    """
+
+    def __init__(self, frequencies, loss):
+        order = np.argsort(frequencies, kind='stable')
+        self.frequencies = np.asarray(frequencies, dtype=float)[order]
+        self.loss = np.asarray(loss, dtype=float)[order]
+
+    def __call__(self, beat_freqs):
+        return np.abs(linear_interpolation(self.frequencies, self.loss, beat_freqs))
+
+
+def load_loss_table(filepath: str):
+    """
+    Return the LossTable for a .s2p or .xlsx file, parsing it only if it is new or has changed.
+    """
+    path = os.path.abspath(filepath)
+    key = (path, os.path.getmtime(path))
+    table = _loss_tables.get(key)
+    if table is None:
+        if path.lower().endswith('.s2p'):
+            table = LossTable(*read_s2p_file(path))
+        else:
+            table = LossTable(*read_excel_data(path))
+        # Drop tables for older versions of the same file
+        for old_key in [k for k in _loss_tables if k[0] == path]:
+            del _loss_tables[old_key]
+        _loss_tables[key] = table
+    return table
+
+
+class CalibrationTable:
+    """
+    Combined RF loss from the .s2p and Excel files (either may be None).
+    """
+
+    def __init__(self, s2p_table=None, excel_table=None):
+        self.s2p_table = s2p_table
+        self.excel_table = excel_table
+
+    def losses(self, beat_freqs):
+        """
+        Return (total loss, .s2p loss, Excel loss) arrays in dB at the given beat frequencies (GHz).
+        """
+        beat_freqs = np.atleast_1d(np.asarray(beat_freqs, dtype=float))
+        s2p_loss = self.s2p_table(beat_freqs) if self.s2p_table is not None else np.zeros_like(beat_freqs)
+        excel_loss = self.excel_table(beat_freqs) if self.excel_table is not None else np.zeros_like(beat_freqs)
+        return s2p_loss + excel_loss, s2p_loss, excel_loss
+
+    def calibrate(self, powers, beat_freqs):
+        """
+        Return (calibrated RF power, total loss, .s2p loss, Excel loss) for raw powers (dBm)
+        measured at beat_freqs (GHz). Calibrated power is rounded to 0.01 dB.
+        """
+        powers = np.asarray(powers, dtype=float)
+        rf_loss, s2p_loss, excel_loss = self.losses(beat_freqs)
+        calibrated_rf = powers
+        if self.s2p_table is not None or self.excel_table is not None:
+            calibrated_rf = np.round(powers + rf_loss, 2)
+        return calibrated_rf, rf_loss, s2p_loss, excel_loss
+
+    def calibrate_point(self, power, beat_freq):
+        """
+        Return (calibrated RF power, total loss, .s2p loss, Excel loss) for a single reading taken
+        during the sweep. A missing power reading (None) gives a calibrated power of None.
+        """
+        rf_loss, s2p_loss, excel_loss = (float(loss[0]) for loss in self.losses(beat_freq))
+        if power is None:
+            calibrated_rf = None
+        elif self.s2p_table is None and self.excel_table is None:
+            calibrated_rf = power
+        else:
+            calibrated_rf = round(power + rf_loss, 2)
+        return calibrated_rf, rf_loss, s2p_loss, excel_loss
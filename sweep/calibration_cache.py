@@ -0,0 +1,59 @@
+"""
+Persisted laser calibration cache: the laser 4 wavelength that reached a start beat frequency
+for a given laser 3 wavelength.
+"""
+import json
+import os
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.heterodyne_laser_cache.json')
+
+
+class LaserCalibrationCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age_hours=72.0):
+        self.path = path
+        self.max_age = max_age_hours * 3600
+
+    @staticmethod
+    def key(laser_3_WL, start_freq):
+        return f"{laser_3_WL:.3f}nm@{start_freq:.2f}GHz"
+
+    def load(self):
+        """
+        Return the cache entries as a dict keyed by key(); an unreadable file counts as empty.
+        """
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, laser_3_WL, start_freq):
+        """
+        Return the cached laser 4 wavelength (nm) for this laser 3 wavelength and start frequency,
+        or None if there is no entry younger than the age limit.
+        """
+        entry = self.load().get(self.key(laser_3_WL, start_freq))
+        if entry is None or time.time() - entry['timestamp'] > self.max_age:
+            return None
+        return entry['laser_4_WL']
+
+    def store(self, laser_3_WL, start_freq, laser_4_WL, beat_freq):
+        """
+        Record the laser 4 wavelength that gave beat_freq (GHz) near start_freq, dropping stale entries.
+        """
+        now = time.time()
+        entries = {key: entry for key, entry in self.load().items() if now - entry['timestamp'] <= self.max_age}
+        entries[self.key(laser_3_WL, start_freq)] = {
+            'laser_3_WL': laser_3_WL,
+            'start_freq': start_freq,
+            'laser_4_WL': laser_4_WL,
+            'beat_freq': beat_freq,
+            'timestamp': now,
+            'date': time.strftime("%m/%d/%Y %H:%M:%S", time.localtime(now)),
+        }
+        # Write to a temporary file first so a crash cannot leave a half-written cache
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(temp_path, self.path)
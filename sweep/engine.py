@@ -0,0 +1,1014 @@
+"""
+Acquisition engine for the heterodyne measurement, shared by the Tkinter GUI
+(heterodyne_automation.py) and the headless runner (heterodyne_headless.py).
+Nothing here imports Tk or Matplotlib.
+"""
+import json
+import threading
+import time
+
+import numpy as np
+import pyvisa
+
+from instruments.acquisition import AcquisitionScheduler
+from instruments.anritsu_ecl import AnritsuECL
+from instruments.hp86120c import HP86120C
+from instruments.hp8565e import HP8565E
+from instruments.keithley2400 import Keithley2400Session
+from instruments.agilent81577a import Agilent81577A
+from instruments.power_meters import POWER_METERS, DEFAULT_POWER_METER
+from instruments.sessions import SessionManager
+from instruments.policy import RetryPolicy
+from sweep.tracking import BeatFrequencyTracker, WAVELENGTH_METER, ESA, BOTH, optical_frequency
+from sweep.search import StartFrequencySearch, optical_wavelength
+from sweep.calibration_cache import LaserCalibrationCache
+from sweep.calibration import CalibrationTable, load_loss_table
+from sweep.journal import SweepJournal, journal_path_for, read_journal
+from sweep.profiler import SweepProfiler, timing_path_for
+from sweep.records import SweepRecords
+from sweep.nested import SweepAxis, parse_points
+from sweep.log import STATUS, WARNING, ERROR, STEP
+
+
+def print_log(message, kind=STATUS, **data):
+    """
+    Default log callback: print the message, prefixed for warnings and errors.
+    """
+    prefix = {WARNING: "WARNING: ", ERROR: "ERROR: "}.get(kind, "")
+    print(prefix + message)
+
+
+class SweepConfig:
+    """
+    Definition of one sweep; the fields mirror the GUI inputs.
+    """
+    FIELDS = {
+        'laser_3_WL': 1550.0,           # Starting wavelength of laser 3 (nm)
+        'laser_4_WL': 1548.0,           # Starting wavelength of laser 4 (nm)
+        'start_freq': 0.0,              # Starting beat frequency (GHz)
+        'end_freq': 0.0,                # Ending beat frequency (GHz)
+        'num_steps': 0,
+        'delay': 3.5,                   # Delay between steps (s); upper bound with adaptive settle
+        'enable_search': True,          # Automatic start frequency search
+        'adaptive_settle': False,
+        'pipelined': False,
+        'retune_during_averaging': False,
+        'esa_trace': False,
+        'tracking': False,
+        'use_laser_cache': True,
+        'pause_after_search': False,    # Wait for continue_after_pause() between the start frequency search and the sweep
+        'adaptive_timeouts': False,     # VISA timeouts learned per instrument and command (configured timeouts are the upper bound)
+        'current_samples': 5,           # Keithley readings averaged per step (trigger count)
+        'current_nplc': 1.0,            # Keithley integration time per reading (power line cycles)
+        'bias_voltage': None,           # Keithley source voltage (V) set before the sweep; None leaves it as is
+        'voa_attenuation': None,        # VOA attenuation (dB) set before the sweep; None leaves it as is
+        'bias_points': None,            # Keithley bias voltages (V) measured at every frequency point (list or "start:stop:count")
+        'attenuation_points': None,     # VOA attenuations (dB) measured at every frequency point (list or "start:stop:count")
+        'frequency_outer': True,        # Nested sweep order: frequency outer loop (one lock per frequency point) or inner loop
+        's2p_file': '',                 # RF link loss (.s2p)
+        'excel_file': '',               # RF probe loss (.xlsx)
+        'save_file_path': None,         # .txt output; the journal and .xlsx are written next to it
+        'device_num': '',
+        'comment': '',
+    }
+
+    def __init__(self, **values):
+        unknown = set(values) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown sweep settings: {', '.join(sorted(unknown))}")
+        for name, default in self.FIELDS.items():
+            setattr(self, name, values.get(name, default))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a sweep definition from a JSON file with the FIELDS names as keys.
+        """
+        with open(path, 'r') as f:
+            return cls(**json.load(f))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+class SweepResult:
+    def __init__(self, status, sweep_run_time=0.0, total_run_time=0.0, journal_path=None, error=None):
+        self.status = status                  # 'completed', 'stopped', 'aborted' (before the sweep loop) or 'error'
+        self.sweep_run_time = sweep_run_time  # Frequency sweep run time (s), including resumed sessions
+        self.total_run_time = total_run_time  # Total run time (s), including resumed sessions
+        self.journal_path = journal_path      # Journal with the measured steps (None if the loop never started)
+        self.error = error                    # Exception that ended the run, if any
+
+
+class SweepRun:
+    """
+    Settings and progress of one SweepEngine.run: the config values, or those of the journal
+    when resuming, and the laser 4 setting as the sweep advances.
+    """
+    def __init__(self, config):
+        self.laser_3_WL = config.laser_3_WL
+        self.laser_4_WL = config.laser_4_WL
+        self.start_freq = config.start_freq
+        self.end_freq = config.end_freq
+        self.num_steps = config.num_steps
+        self.delay = config.delay
+        self.excel_file = config.excel_file
+        self.s2p_file = config.s2p_file
+        self.enable_search = config.enable_search
+        self.use_laser_cache = config.enable_search and config.use_laser_cache
+        self.search_freq = config.start_freq  # beat frequency the search brings laser 4 to
+        self.first_step = 0                   # steps already measured (resumed sweep)
+        self.resume_header = None             # journal header of the resumed run
+        self.previous_steps = []              # step records of the resumed run
+        self.previous_sweep_time = 0.0        # time (s) spent on those steps
+        self.previous_total_time = 0.0
+        self.start_time = time.time()
+        self.sweep_start_time = None
+        self.beat_freq = None                 # beat frequency (GHz) at the start of the sweep
+        self.settled_beat_freq = None         # beat frequency already read while settling (adaptive settle only)
+        self.retune_time = None               # time.monotonic() of the last laser 4 step
+
+    @property
+    def laser_4_step(self):
+        """
+        Beat frequency step (GHz) between sweep steps.
+        """
+        return (self.end_freq - self.start_freq) / self.num_steps
+
+
+class SweepEngine:
+    def __init__(self, resource_manager=None, log=print_log, power_meter=DEFAULT_POWER_METER):
+        """
+        resource_manager: VISA resource manager; by default pyvisa.ResourceManager().
+                          instruments.simulated.SimulatedResourceManager runs without hardware.
+        log: log(message, kind=STATUS, **data) callback for progress messages; may be called
+             from the measurement thread.
+        power_meter: RF power meter of the setup, a key of instruments.power_meters.POWER_METERS
+                     ('nrp_z58' or 'ml2437a'); it also sets the VISA timeouts.
+        """
+        if power_meter not in POWER_METERS:
+            raise ValueError(f"Unknown power meter '{power_meter}', expected one of: {', '.join(POWER_METERS)}")
+        self.rm = resource_manager if resource_manager is not None else pyvisa.ResourceManager()
+        self.log = log
+        self.power_meter_model = power_meter
+        self.power_meter_profile = POWER_METERS[power_meter]
+
+        # Define VISA addresses for the instruments
+        self.ecl_adapter_GPIB = 'GPIB0::10::INSTR'         # ECL laser (should be constant)
+        self.wavelength_meter_GPIB = 'GPIB0::20::INSTR'      # Wavelength meter
+        self.spectrum_analyzer_GPIB = 'GPIB0::18::INSTR'     # Spectrum analyzer
+        self.keithley_GPIB = 'GPIB0::24::INSTR'              # Keithley source meter
+        self.power_sensor_GPIB = self.power_meter_profile['address']  # RF power meter
+        self.voa_GPIB = 'GPIB0::26::INSTR'                   # VOA
+
+        # Instrument sessions, opened on first use of their driver (see instruments/interfaces.py)
+        timeout = self.power_meter_profile['bench_timeout']
+        self.sessions = SessionManager(self.rm, warn=lambda message: self.log(message, WARNING),
+                                       error=lambda message: self.log(message, ERROR))
+        self.sessions.register('ecl', self.ecl_adapter_GPIB, AnritsuECL, timeout, wait_queries=('*OPC?',))
+        self.sessions.register('wavelength_meter', self.wavelength_meter_GPIB, HP86120C, timeout)
+        self.sessions.register('spectrum_analyzer', self.spectrum_analyzer_GPIB, HP8565E, timeout, health_query='ID?')
+        self.sessions.register('keithley', self.keithley_GPIB, Keithley2400Session, timeout)
+        self.sessions.register('power_sensor', self.power_sensor_GPIB, self.power_meter_profile['driver'],
+                               self.power_meter_profile['timeout'])
+        self.sessions.register('voa', self.voa_GPIB, Agilent81577A, timeout)
+        # Retries of failed readings, with exponential backoff
+        self.retry_policy = RetryPolicy()
+        # Timing of every VISA call, sleep and GUI update of a run (report saved next to the data)
+        self.profiler = SweepProfiler()
+        self.sessions.profiler = self.profiler
+        self.sessions.retry_policy = self.retry_policy
+        self.retry_policy.profiler = self.profiler
+
+        # One row per step: beat frequency, laser 4 WL, raw/calibrated RF power, RF losses, photocurrent, VOA P actual
+        self.records = SweepRecords()
+        self.records_laser_3_WL = None  # laser 3 wavelength the records were measured at
+        self.looping = False
+
+        # Per-step journal written while the sweep runs; the .txt/.xlsx exports are built from it
+        self.journal = None
+        self.journal_path = None
+        self.keithley_voltage = None
+
+        # Adaptive settle: poll instrument completion instead of sleeping the full delay
+        self.adaptive_settle = False
+        self.settle_tolerance = 0.1  # GHz, agreement between consecutive beat readings
+
+        # Trace-based ESA peak detection (esa_beat_meter.trace_mode), zoomed around the predicted next beat frequency
+        self.predicted_beat_freq = None  # GHz, set by the sweep loop
+
+        # Predictive beat tracking: fit beat vs. laser 4 frequency and query only the instrument for that range
+        self.tracking_mode = False
+        self.beat_tracker = BeatFrequencyTracker()
+
+        # Laser 4 settings that reached each start frequency on previous runs
+        self.laser_cache = LaserCalibrationCache()
+
+        # Last wavelength written to each laser channel (None until set). A sweep that starts within
+        # relock_span of where the lasers already are skips the full stabilization wait.
+        self.laser_wavelengths = {3: None, 4: None}
+        self.relock_span = 0.1  # nm
+
+        # Largest distance (GHz) from the target beat frequency for the search to count as locked
+        self.freq_threshold = 0.5  # Note: values below 0.5 GHz are less likely to work
+
+        # Nested sweeps: wait after changing the nested setting (e.g. the bias) before reading
+        self.nested_settle = 0.2  # s
+
+        # Read instruments on different buses (GPIB vs. RSNRP USB) concurrently within each step
+        self.concurrent_acquisition = True
+        self.acquisition_scheduler = AcquisitionScheduler()
+
+        # Set to stop the sweep (run() does not clear it: a stop requested before the run starts
+        # still applies, the caller clears it when starting a fresh sweep); set by the engine
+        # whenever new records are available
+        self.stop_event = threading.Event()
+        self.data_ready_event = threading.Event()
+        # Set by continue_after_pause() to start the sweep after a pause_after_search pause
+        self.pause_event = threading.Event()
+
+    # Drivers of the instruments; each property opens its session on first use
+    @property
+    def laser(self):
+        return self.sessions.driver('ecl')  # AnritsuECL
+
+    @property
+    def wavelength_beat_meter(self):
+        return self.sessions.driver('wavelength_meter')  # HP86120C
+
+    @property
+    def esa_beat_meter(self):
+        return self.sessions.driver('spectrum_analyzer')  # HP8565E
+
+    @property
+    def source_meter(self):
+        return self.sessions.driver('keithley')  # Keithley2400Session
+
+    @property
+    def attenuator(self):
+        return self.sessions.driver('voa')  # Agilent81577A
+
+    @property
+    def power_meter(self):
+        return self.sessions.driver('power_sensor')  # NRPZ58Session or ML2437ASession
+
+    def open_instruments(self):
+        """
+        Open every instrument session now instead of on first use (e.g. to check the bench
+        before an unattended run). An instrument that cannot be opened is reported through log()
+        and tried again when it is needed.
+        """
+        failed = self.sessions.open_all()
+        if not failed:
+            self.log("Successfully connected to all VISA devices.")
+
+    def reset_instruments(self):
+        """
+        Make every instrument reconfigure before its next reading (e.g. after a reset).
+        The sessions stay open.
+        """
+        self.sessions.invalidate()
+
+    def visa_statistics(self):
+        """
+        Calls, timeouts, reconnects and retries per instrument during the last run.
+        """
+        statistics = self.sessions.statistics()
+        for name, counts in statistics.items():
+            counts['retries'] = self.retry_policy.retries.get(name, 0)
+        return statistics
+
+    def log_visa_statistics(self):
+        """
+        Report the instruments that timed out, reconnected or were retried during the run.
+        """
+        for name, counts in self.visa_statistics().items():
+            if counts['timeouts'] or counts['reconnects'] or counts['retries']:
+                self.log(
+                    f"{name}: {counts['timeouts']} timeouts, {counts['reconnects']} reconnects, "
+                    f"{counts['retries']} retries in {counts['calls']} calls", WARNING
+                )
+
+    def write_timing_report(self, file_path):
+        """
+        Save the run's timing report (sweep/profiler.py) and log the mean step breakdown.
+        """
+        try:
+            self.profiler.write_report(file_path)
+        except OSError as e:
+            self.log(f"Could not write timing report: {e}", WARNING)
+            return
+        mean = self.profiler.mean_step()
+        if mean is not None:
+            step_time, phases = mean
+            breakdown = ", ".join(f"{phase} {seconds:.2f}" for phase, seconds in phases.items() if seconds >= 0.005)
+            self.log(f"Mean step time: {step_time:.2f} s ({breakdown})")
+        self.log(f"Timing report saved to {file_path}")
+
+    def close_instruments(self):
+        try:
+            self.sessions.close_all()
+            self.log("Instruments closed successfully.")
+        except Exception as e:
+            self.log(f"Error closing instruments: {e}", ERROR)
+
+    def measure_peak_frequency(self):
+        """
+        Measure the peak frequency (GHz) with the spectrum analyzer (see HP8565E.measure_beat),
+        zoomed around predicted_beat_freq in trace mode when the sweep loop provides one.
+        Returns None if the measurement fails.
+        """
+        try:
+            return self.esa_beat_meter.measure_beat(self.predicted_beat_freq)
+        except Exception as e:
+            self.log(f"Error measuring peak frequency: {e}", ERROR)
+            return None
+
+    def measure_wavelength_beat(self):
+        """
+        Measure the beat frequency (GHz) with the wavelength meter (see HP86120C.measure_beat).
+        Returns None below 50 GHz or if nothing is returned, so that the ESA measurement is used instead.
+        """
+        try:
+            return self.wavelength_beat_meter.measure_beat()
+        except Exception as e:
+            self.log(f"Error measuring beat frequency with wavelength meter: {e}", ERROR)
+            return None
+
+    def measure_beat_frequency(self, laser_4_WL=None):
+        """
+        Measure the beat frequency with both the wavelength meter and the ESA and return
+        the wavelength meter reading above 50 GHz, otherwise the ESA reading (GHz or None).
+        In tracking mode, when laser_4_WL is given and the tracker can predict the beat frequency,
+        only the instrument for the predicted range is queried. Both are read inside the
+        45-50 GHz handover band or when the single reading misses the prediction.
+        """
+        if self.tracking_mode and laser_4_WL is not None:
+            predicted = self.beat_tracker.predict(laser_4_WL)
+            instrument = self.beat_tracker.instrument_for(predicted)
+            beat_freq = None
+            if instrument == WAVELENGTH_METER:
+                beat_freq = self.measure_wavelength_beat()
+            elif instrument == ESA:
+                beat_freq = self.measure_peak_frequency()
+            if instrument != BOTH and self.beat_tracker.accepts(beat_freq, predicted):
+                return beat_freq
+
+        wl_meter_beat_freq = self.measure_wavelength_beat()
+        esa_beat_freq = self.measure_peak_frequency()
+        if wl_meter_beat_freq is None:
+            wl_meter_beat_freq = esa_beat_freq
+        if wl_meter_beat_freq is None:
+            return None
+        return wl_meter_beat_freq if (wl_meter_beat_freq > 50 and wl_meter_beat_freq < 1000) else esa_beat_freq
+
+    def settle(self, max_delay: float, laser_4_WL=None):
+        """
+        Wait for the lasers to settle after a wavelength change.
+        Without adaptive settle this is a fixed sleep of max_delay seconds.
+        With adaptive settle, *OPC? is polled on the ECL and then the beat frequency is read
+        until two consecutive readings agree within settle_tolerance, with max_delay as the upper bound.
+        Returns the converged beat frequency (GHz), or None if it was not measured or did not converge.
+        laser_4_WL is passed on to measure_beat_frequency() for predictive tracking.
+        """
+        if not self.adaptive_settle:
+            self.profiler.sleep(max_delay, 'engine', 'settle')
+            return None
+
+        deadline = time.monotonic() + max_delay
+        # Wait for the ECL to report the retune complete (bounded by the remaining delay)
+        self.laser.wait_complete(max_delay)
+
+        previous = None
+        while time.monotonic() < deadline:
+            if self.stop_event.is_set():
+                return None
+            beat_freq = self.measure_beat_frequency(laser_4_WL)
+            if beat_freq is not None and previous is not None and abs(beat_freq - previous) <= self.settle_tolerance:
+                return beat_freq
+            previous = beat_freq
+        return None
+
+    def zero_power_sensor(self):
+        try:
+            if self.attenuator.output_enabled():
+                self.log("VOA is currently enabled, disable before zeroing power meter...", WARNING)
+                raise Exception("VOA is enabled")
+            self.log("Zeroing power sensor...")
+            self.power_meter.zero()  # waits for the zeroing process to complete
+            self.log("Power sensor zeroing completed.")
+            self.attenuator.local()
+        except Exception as e:
+            self.log(f"Error during power sensor zeroing: {e}", ERROR)
+
+    def measure_rf_power(self, beat_freq):
+        """
+        Safely measure RF power at beat_freq. Returns dBm or None if all attempts time out.
+        The power meter is configured once per sweep (see the PowerMeter drivers).
+        Attempts are retried with the backoff of retry_policy.
+        """
+        max_attempts = self.retry_policy.max_attempts
+        for attempt in range(1, max_attempts+1):
+            try:
+                return self.power_meter.measure_dbm(beat_freq)
+
+            except pyvisa.errors.VisaIOError:
+                self.power_meter.invalidate()  # reconfigure after a timeout
+                if attempt == max_attempts:
+                    break
+                self.log(
+                    f"Power sensor timeout (attempt {attempt}/{max_attempts}), retrying..."
+                )
+                self.retry_policy.backoff('power_sensor', attempt)
+
+        self.log(
+            "Power sensor unavailable after retries—continuing sweep without RF data."
+        )
+        return None
+
+
+    def measure_photocurrent(self):
+        """
+        Read the photocurrent from the Keithley (mA, NaN if the response cannot be parsed),
+        averaged over the session's samples.
+        """
+        current, _ = self.source_meter.read()
+        return round(current, 4)
+
+    def fetch_photocurrent(self):
+        """
+        Collect the Keithley samples triggered by source_meter.start().
+        Returns (mean, standard deviation) in mA.
+        """
+        current, current_std = self.source_meter.fetch()
+        return round(current, 4), current_std
+
+    def return_to_local(self):
+        """
+        Give the Keithley back to front panel control at the end of a run.
+        """
+        try:
+            if self.sessions.is_open('keithley'):
+                self.source_meter.local()
+        except Exception as e:
+            self.log(f"Could not return the Keithley to local: {e}", WARNING)
+
+    def measure_voa_power(self):
+        """
+        Read the VOA actual output power (dBm) and return the instrument to local mode.
+        """
+        p_actual = self.attenuator.read_power()
+        self.attenuator.local()
+        return p_actual
+
+    def start_step_acquisition(self, beat_freq):
+        """
+        Start reading photocurrent, VOA power and RF power for one sweep step.
+        The RF power reading is started first (the NRP-Z58 is on its own RSNRP bus) while the
+        Keithley and VOA, which share the GPIB controller, are read one after the other: the Keithley is triggered,
+        the VOA is read while it integrates and then the Keithley samples are fetched.
+        Returns a PendingAcquisition with the readings 'current' ((mean, std) in mA), 'p_actual'
+        and 'output_dbm'.
+        """
+        return self.acquisition_scheduler.start([
+            ('output_dbm', self.power_sensor_GPIB, lambda: self.measure_rf_power(beat_freq)),
+            ('current_trigger', self.keithley_GPIB, self.source_meter.start),
+            ('p_actual', self.voa_GPIB, self.measure_voa_power),
+            ('current', self.keithley_GPIB, self.fetch_photocurrent),
+        ], serial=not self.concurrent_acquisition)
+
+    def acquire_step_readings(self, beat_freq):
+        """
+        Read photocurrent, VOA power and RF power for one sweep step and join the results.
+        Returns (current, p_actual, output_dbm).
+        """
+        readings = self.start_step_acquisition(beat_freq).result()
+        return readings['current'][0], readings['p_actual'], readings['output_dbm']
+
+    def set_laser_wavelength(self, channel: int, wavelength: float):
+        """
+        Set the laser wavelength for the specified channel.
+        (This sends the command to the ECL laser via VISA.)
+        """
+        self.log(f"Setting laser {channel} wavelength to {wavelength:.3f} nm...")
+        self.laser.set_wavelength(channel, wavelength)
+        self.laser_wavelengths[channel] = wavelength
+        self.rf_input_changed()
+
+    def rf_input_changed(self):
+        """
+        Tell the power meter that the RF input changed (laser retune, bias or attenuation), so a
+        meter that averages continuously does not report power from before the change.
+        """
+        if self.sessions.is_open('power_sensor'):
+            self.power_meter.input_changed()
+
+    def continue_after_pause(self):
+        """
+        Let a sweep paused after the start frequency search (pause_after_search) continue.
+        """
+        self.pause_event.set()
+
+    def lasers_near(self, laser_3_WL, laser_4_WL):
+        """
+        True if both lasers are already set within relock_span of the given wavelengths.
+        """
+        return all(
+            self.laser_wavelengths[channel] is not None and abs(self.laser_wavelengths[channel] - wavelength) <= self.relock_span
+            for channel, wavelength in ((3, laser_3_WL), (4, laser_4_WL))
+        )
+
+    def set_bias_voltage(self, voltage: float):
+        """
+        Set the Keithley source voltage (PD bias).
+        """
+        self.log(f"Setting Keithley bias to {voltage} V...")
+        self.source_meter.set_voltage(voltage)
+        self.rf_input_changed()
+
+    def nested_axis(self, config):
+        """
+        SweepAxis swept together with the beat frequency for this config, or None for a plain sweep.
+        """
+        bias_points = parse_points(config.bias_points)
+        attenuation_points = parse_points(config.attenuation_points)
+        if bias_points and attenuation_points:
+            raise ValueError("A nested sweep takes either bias points or attenuation points, not both.")
+        if bias_points:
+            return SweepAxis('bias_voltage', bias_points, self.set_bias_voltage, self.source_meter.voltage)
+        if attenuation_points:
+            return SweepAxis('voa_attenuation', attenuation_points, self.set_voa_attenuation, self.attenuator.attenuation)
+        return None
+
+    def locked_wavelength(self, laser_3_WL, beat_freq, tolerance):
+        """
+        Laser 4 wavelength at which the last sweep measured beat_freq (within tolerance), or None.
+        Only used while laser 3 is at the same wavelength as during that sweep.
+        """
+        if self.records_laser_3_WL != laser_3_WL or not len(self.records):
+            return None
+        distance = np.abs(self.records['beat_freq'] - beat_freq)
+        if not np.isfinite(distance).any():
+            return None
+        index = np.nanargmin(distance)
+        if distance[index] > tolerance:
+            return None
+        return float(self.records['laser_4_WL'][index])
+
+    def set_voa_attenuation(self, attenuation: float):
+        """
+        Set the VOA attenuation (dB).
+        """
+        self.log(f"Setting VOA attenuation to {attenuation} dB...")
+        self.attenuator.set_attenuation(attenuation)
+        self.rf_input_changed()
+
+    def load_calibration(self, s2p_filename=None, excel_filename=None):
+        """
+        Load the RF loss tables for calibration:
+         - A network analyzer (.s2p file) for RF link loss.
+         - An Excel file for RF probe loss.
+        Files are parsed only once (until they change on disk); a file that cannot be read
+        is reported through log() and left out of the calibration.
+        """
+        s2p_table = None
+        excel_table = None
+        if s2p_filename:
+            try:
+                s2p_table = load_loss_table(s2p_filename)
+            except Exception as e:
+                self.log(f"Error processing S2P file: {e}", ERROR)
+        if excel_filename:
+            try:
+                excel_table = load_loss_table(excel_filename)
+            except Exception as e:
+                self.log(f"Error processing Excel file: {e}", ERROR)
+        return CalibrationTable(s2p_table, excel_table)
+
+    def restore_steps(self, records):
+        """
+        Refill the sweep records from sweep journal step records (used when resuming).
+        """
+        self.records.clear(len(records))
+        for record in records:
+            self.records.append(**{name: record.get(name) for name in self.records.columns})
+        self.data_ready_event.set()
+
+    def run(self, config, resume_path=None):
+        """
+        Perform the complete data collection process for a SweepConfig:
+         - Set initial laser wavelengths and wait for stabilization.
+         - Perform an automatic model-based start frequency search (if enabled) to bring the system to the target frequency.
+         - Conduct the frequency sweep and measure beat frequency, photocurrent, and RF power.
+         - Calibrate and journal each step as it is measured.
+
+        With resume_path (a sweep journal), the settings and steps recorded there are restored, laser 4
+        is re-locked with a short search to the beat frequency of the next step and the sweep continues.
+        Returns a SweepResult; errors are reported through log() and the result instead of raised.
+        """
+        self.data_ready_event.clear()
+        self.journal = None
+        self.journal_path = None
+        self.sessions.adaptive_timeouts = config.adaptive_timeouts
+        self.sessions.reset_statistics()
+        self.retry_policy.reset()
+        self.profiler.start()
+        timing_path = None
+
+        run = SweepRun(config)
+        try:
+            self.adaptive_settle = config.adaptive_settle
+            self.wavelength_beat_meter.adaptive = self.adaptive_settle
+            self.esa_beat_meter.adaptive = self.adaptive_settle
+            self.esa_beat_meter.trace_mode = config.esa_trace
+            self.predicted_beat_freq = None
+            self.tracking_mode = config.tracking
+            self.beat_tracker.reset()
+            axis = self.nested_axis(config)
+            # Nested sweep: the axis points are measured at each frequency step (inner) or the frequency sweep is repeated per point (outer)
+            inner_points = axis.points if axis is not None and config.frequency_outer else [None]
+            outer_points = axis.points if axis is not None and not config.frequency_outer else [None]
+            if resume_path is not None and not self._prepare_resume(run, resume_path):
+                return SweepResult('aborted', total_run_time=time.time() - run.start_time)
+            calibration = self.load_calibration(run.s2p_file, run.excel_file)  # loss tables for per-step calibration
+
+            status = self._acquire_lock(run, config)
+            if status is not None:
+                return SweepResult(status, total_run_time=time.time() - run.start_time)
+
+            if config.pause_after_search:
+                # Hold at the start frequency (e.g. to adjust the optical power) until continued
+                self.log("PAUSED after initial search, waiting to continue the measurement...")
+                self.pause_event.clear()
+                while not self.pause_event.wait(0.1):
+                    if self.stop_event.is_set():
+                        self.log("Data collection stopped by user.")
+                        return SweepResult('stopped', total_run_time=time.time() - run.start_time)
+                self.log("Resuming measurement after pause.")
+
+            # --- BEGIN DATA COLLECTION LOOP ---
+            self.log("BEGINNING MEASUREMENT LOOP...")
+            run.sweep_start_time = time.time()
+
+            # Get initial photocurrent from Keithley (convert to mA)
+            self.measure_photocurrent()
+
+            # Start the journal; every completed step is appended to it immediately
+            self.keithley_voltage = self.source_meter.voltage()
+            save_file_path = config.save_file_path or f"heterodyne_{time.strftime('%Y%m%d_%H%M%S')}.txt"
+            self.journal_path = resume_path or journal_path_for(save_file_path)
+            timing_path = timing_path_for(save_file_path)
+            self.journal = SweepJournal(self.journal_path)
+            self.records.clear(run.num_steps * len(inner_points) * len(outer_points))
+            self.records_laser_3_WL = run.laser_3_WL
+            if run.resume_header is not None:
+                # Restore the recorded steps and carry over the time already spent on them
+                self.restore_steps(run.previous_steps)
+                last_step_time = run.previous_steps[-1]['timestamp']
+                run.previous_sweep_time = run.resume_header.get('previous_sweep_time', 0.0) + max(
+                    0.0, last_step_time - run.resume_header['sweep_start_time'])
+                run.previous_total_time = run.resume_header.get('previous_total_time', 0.0) + max(
+                    0.0, last_step_time - run.resume_header['start_time'])
+            self.journal.open({
+                'device_num': config.device_num,
+                'comment': config.comment,
+                'keithley_voltage': self.keithley_voltage,
+                'voa_attenuation': config.voa_attenuation,
+                'laser_3_WL': run.laser_3_WL,
+                'laser_4_WL': run.laser_4_WL,
+                'start_freq': run.start_freq,
+                'end_freq': run.end_freq,
+                'num_steps': run.num_steps,
+                'delay': run.delay,
+                'excel_file': run.excel_file,
+                's2p_file': run.s2p_file,
+                'start_time': run.start_time,
+                'sweep_start_time': run.sweep_start_time,
+                'resumed_from_step': run.first_step,
+                'previous_sweep_time': run.previous_sweep_time,
+                'previous_total_time': run.previous_total_time,
+                'nested_axis': axis.name if axis is not None else None,
+                'nested_points': axis.points if axis is not None else None,
+                'frequency_outer': config.frequency_outer,
+            }, append=run.resume_header is not None)
+            self.log(f"Writing sweep journal to {self.journal_path}")
+
+            self.looping = True
+            sweep_start_laser_4_WL = run.laser_4_WL
+            axis_initial = axis.read() if axis is not None else None  # setting to return to after the sweep
+            stopped = False
+            for pass_index, outer_point in enumerate(outer_points):
+                if outer_point is not None:
+                    self.log(f"{axis.label}: {outer_point} - frequency sweep {pass_index + 1} of {len(outer_points)}")
+                    axis.apply(outer_point)
+                    if pass_index > 0:
+                        # Back to the start of the frequency range for the next pass
+                        run.laser_4_WL = sweep_start_laser_4_WL
+                        self.set_laser_wavelength(4, run.laser_4_WL)
+                        self.predicted_beat_freq = None
+                        run.settled_beat_freq = self.settle(run.delay, run.laser_4_WL)
+                    else:
+                        self.profiler.sleep(self.nested_settle, 'engine', 'nested settle')
+                if not self._run_pass(run, config, calibration, axis, inner_points, outer_point):
+                    self.log("Data collection stopped by user.")
+                    stopped = True
+                    break
+
+            self.log("Data collection completed.")
+            self.looping = False
+            if axis is not None:
+                axis.apply(axis_initial)  # back to the setting the sweep started at
+            self.predicted_beat_freq = None
+            time_end = time.time()
+            sweep_run_time = time_end - run.sweep_start_time + run.previous_sweep_time
+            total_run_time = time_end - run.start_time + run.previous_total_time
+            self.data_ready_event.set()
+            status = 'stopped' if stopped else 'completed'
+            self.journal.close(status, sweep_run_time=sweep_run_time, total_run_time=total_run_time)
+            return SweepResult(status, sweep_run_time, total_run_time, self.journal_path)
+        except Exception as e:
+            self.looping = False
+            self.predicted_beat_freq = None
+            self.log(f"Error in data collection: {e}", ERROR)
+            if self.journal is not None and self.journal.file is not None:
+                # Keep what was measured: the completed steps stay in the journal
+                self.journal.close('error', error=str(e))
+                self.log(f"Steps measured before the error are saved in {self.journal_path}", WARNING)
+            run_time = time.time() - run.start_time
+            return SweepResult('error', run_time, run_time, self.journal_path, e)
+        finally:
+            self.return_to_local()
+            self.log_visa_statistics()
+            self.profiler.finish()
+            if timing_path is not None:
+                self.write_timing_report(timing_path)
+
+    def _prepare_resume(self, run, resume_path):
+        """
+        Take the settings and measured steps of run from the journal at resume_path and aim the
+        search at the beat frequency of the next step. Returns False if the run cannot be resumed.
+        """
+        # Continue from the recorded run: same settings, next step after the last one measured
+        header, previous_steps, end = read_journal(resume_path)
+        if header is None or not previous_steps:
+            self.log(f"{resume_path} has no completed steps to resume from; start the sweep again.", ERROR)
+            return False
+        if header.get('nested_axis'):
+            self.log("Resuming a nested sweep is not supported; start it again.", ERROR)
+            return False
+        last_step = previous_steps[-1]
+        if (end is not None and end['status'] == 'completed') or last_step['step'] >= header['num_steps']:
+            self.log(f"The sweep in {resume_path} already completed all of its steps.", ERROR)
+            return False
+        last_beat_freq = last_step.get('beat_freq')
+        if last_beat_freq is None or not np.isfinite(last_beat_freq):
+            self.log(f"Step {last_step['step']} in {resume_path} has no beat frequency to resume from.", ERROR)
+            return False
+        run.resume_header = header
+        run.previous_steps = previous_steps
+        run.laser_3_WL = header['laser_3_WL']
+        run.num_steps = header['num_steps']
+        run.delay = header['delay']
+        run.start_freq = header['start_freq']
+        run.end_freq = header['end_freq']
+        run.excel_file = header['excel_file']
+        run.s2p_file = header['s2p_file']
+        run.first_step = last_step['step']
+        run.laser_4_WL = optical_wavelength(optical_frequency(last_step['laser_4_WL']) - run.laser_4_step)
+        run.search_freq = last_beat_freq + run.laser_4_step
+        run.enable_search = True  # short search to re-lock to the next step's beat frequency
+        run.use_laser_cache = False
+        self.log(
+            f"Resuming at step {run.first_step + 1} of {run.num_steps} from {resume_path} "
+            f"(target beat frequency {run.search_freq:.2f} GHz)"
+        )
+        return True
+
+    def _acquire_lock(self, run, config):
+        """
+        Set up the lasers and instruments and bring the beat frequency to run.search_freq: from the
+        cached or last locked laser 4 setting when there is one, then with the start frequency search.
+        Returns None once locked, or the SweepResult status ('stopped' or 'aborted') ending the run.
+        """
+        freq_threshold = self.freq_threshold
+        # Start from the laser 4 wavelength that reached this start frequency on a recent run
+        cached_laser_4_WL = None
+        if run.use_laser_cache:
+            cached_laser_4_WL = self.laser_cache.lookup(run.laser_3_WL, run.start_freq)
+            if cached_laser_4_WL is not None:
+                run.laser_4_WL = cached_laser_4_WL
+                self.log(f"Using cached laser 4 wavelength {run.laser_4_WL:.3f} nm, verifying start frequency...")
+        # Better still, the lock of the last sweep if it passed through the start frequency
+        locked_laser_4_WL = None
+        if run.enable_search and run.resume_header is None:
+            locked_laser_4_WL = self.locked_wavelength(run.laser_3_WL, run.start_freq, freq_threshold)
+            if locked_laser_4_WL is not None:
+                run.laser_4_WL = locked_laser_4_WL
+                self.log(f"Reusing the last sweep's lock at laser 4 {run.laser_4_WL:.3f} nm, verifying start frequency...")
+
+        # Device bias and optical power for this sweep
+        if config.bias_voltage is not None:
+            self.set_bias_voltage(config.bias_voltage)
+        if config.voa_attenuation is not None:
+            self.set_voa_attenuation(config.voa_attenuation)
+
+        # Set the laser wavelengths and power
+        lasers_locked = self.lasers_near(run.laser_3_WL, run.laser_4_WL)
+        self.set_laser_wavelength(3, run.laser_3_WL)
+        self.set_laser_wavelength(4, run.laser_4_WL)
+
+        if lasers_locked:
+            # Small move from the previous sweep's setting (e.g. the next job of a batch): settle like a step
+            self.log("Lasers already near the start wavelengths, settling...")
+            self.settle(run.delay)
+        elif cached_laser_4_WL is not None or locked_laser_4_WL is not None:
+            # Known setting for this start frequency: settle like a search step, the reading verifies it
+            self.log("Settling at the known laser 4 wavelength...")
+            self.settle(3)
+        else:
+            # Wait for the lasers to stabilize
+            self.log("Waiting for the lasers to stabilize...")
+            self.profiler.sleep(10, 'engine', 'stabilize')
+
+        # Initialize frequencies: set reference frequency to laser 3 (wavelength meter delta mode)
+        for meter in (self.wavelength_beat_meter, self.esa_beat_meter):
+            try:
+                meter.prepare()
+            except RuntimeError as e:
+                self.log(f"{e}, continuing.", WARNING)
+
+        # Keithley: sense function, NPLC and trigger count set once for the sweep
+        # (a fetch takes longer with more samples or a longer NPLC, so its timeout is learned per setting)
+        self.sessions.latency.set_context('keithley', (config.current_samples, config.current_nplc))
+        self.source_meter.samples = config.current_samples
+        self.source_meter.nplc = config.current_nplc
+        self.source_meter.configure()
+
+        # Configure the power meter once; it stays configured across sweeps until invalidated
+        if not self.power_meter.configured:
+            self.power_meter.configure()
+
+        # Measure initial beat frequency using both instruments
+        run.beat_freq = self.measure_beat_frequency()
+        if locked_laser_4_WL is not None and run.beat_freq is not None and abs(run.beat_freq - run.start_freq) <= freq_threshold:
+            # Still locked: no search needed
+            self.log(f"Beat frequency still locked at {run.beat_freq:.2f} GHz, skipping the start frequency search")
+            return None
+        if not run.enable_search:
+            return None
+
+        # --- AUTO START FREQUENCY SEARCH ---
+        self.log("RUNNING AUTOMATIC START FREQUENCY SEARCH...")
+        search = StartFrequencySearch(
+            set_wavelength=lambda wavelength: self.set_laser_wavelength(4, wavelength),
+            settle=lambda: self.settle(3),
+            measure=self.measure_beat_frequency,
+            stop_event=self.stop_event,
+            log=self.log,
+            threshold=freq_threshold,
+        )
+        try:
+            # Laser 4 starts below laser 3 when the setting is cached, the last lock or a resumed step
+            known_side = cached_laser_4_WL is not None or locked_laser_4_WL is not None or run.resume_header is not None
+            result = search.run(run.laser_4_WL, run.search_freq, run.beat_freq, sign=1 if known_side else None)
+        except ValueError as e:
+            self.log(str(e), ERROR)
+            return 'aborted'
+        if result is None:
+            self.log("Data collection stopped by user.")
+            return 'stopped'
+        run.laser_4_WL = result.laser_4_WL
+        run.beat_freq = result.beat_freq
+        if not result.converged:
+            # Sweeping from the wrong start frequency would only produce unusable data
+            self.log(
+                f"Start frequency search did not reach {run.search_freq:.2f} GHz within {freq_threshold} GHz "
+                f"after {result.iterations} iterations, sweep aborted.", ERROR
+            )
+            return 'aborted'
+        if run.use_laser_cache:
+            try:
+                self.laser_cache.store(run.laser_3_WL, run.start_freq, run.laser_4_WL, run.beat_freq)
+            except OSError as e:
+                self.log(f"Could not save laser calibration cache: {e}", WARNING)
+        self.log(
+            f"Final Beat Frequency: {round(run.beat_freq,2)} GHz "
+            f"({result.iterations} iterations, {result.elapsed:.1f} s)"
+        )
+        return None
+
+    def _step_laser_4(self, run):
+        """
+        Retune laser 4 to the next step of the sweep (one step size lower in optical frequency).
+        """
+        run.laser_4_WL = optical_wavelength(optical_frequency(run.laser_4_WL) - run.laser_4_step)
+        self.set_laser_wavelength(4, run.laser_4_WL)
+        run.retune_time = time.monotonic()
+
+    def _run_pass(self, run, config, calibration, axis, inner_points, outer_point):
+        """
+        One frequency sweep from run.first_step to the last step, at outer_point of a nested
+        sweep with the frequency as inner loop. Returns False if the sweep was stopped.
+        """
+        for step in range(run.first_step, run.num_steps):
+            if self.stop_event.is_set():
+                self.looping = False
+                self.data_ready_event.set()
+                return False
+            self.profiler.begin_step(step + 1)
+
+            # Choose measurement method based on previous beat frequency
+            if run.settled_beat_freq is not None:
+                # The converged reading from settle() is the measurement for this step
+                beat_freq = run.settled_beat_freq
+            else:
+                beat_freq = self.measure_beat_frequency(run.laser_4_WL)
+
+            self.log(f"Step {step + 1} of {run.num_steps}")
+
+            # For early steps near low start frequencies, adjust laser 4 more cautiously
+            if step < 2 and run.start_freq < 5 and beat_freq is not None and beat_freq > 15:
+                run.laser_4_WL = optical_wavelength(optical_frequency(run.laser_4_WL) - 0.3)
+                self.set_laser_wavelength(4, run.laser_4_WL)
+                self.settle(run.delay)
+                beat_freq = self.measure_beat_frequency(run.laser_4_WL)
+
+            if beat_freq is None:
+                # No beat note found by either instrument: nothing to record, move on to the next step
+                self.log(f"No beat frequency measured at step {step + 1}, skipping it.", WARNING)
+                self._step_laser_4(run)
+                run.settled_beat_freq = self.settle(run.delay, run.laser_4_WL)
+                continue
+
+            self._measure_step(run, config, step, beat_freq, calibration, axis, inner_points, outer_point)
+
+            # Update laser 4 wavelength for the next step (already done while measuring when pipelined)
+            if not config.pipelined:
+                self._step_laser_4(run)
+            # Expected beat frequency at the next laser setting (used to zoom the ESA trace)
+            self.predicted_beat_freq = self.beat_tracker.predict(run.laser_4_WL)
+            if self.predicted_beat_freq is None:
+                self.predicted_beat_freq = beat_freq + run.laser_4_step
+            self.data_ready_event.set()
+            # Time spent since the retune counts towards the delay
+            run.settled_beat_freq = self.settle(max(0.0, run.delay - (time.monotonic() - run.retune_time)), run.laser_4_WL)
+        return True
+
+    def _measure_step(self, run, config, step, beat_freq, calibration, axis, inner_points, outer_point):
+        """
+        Read photocurrent, VOA power and RF power at beat_freq (once per inner point of a nested
+        sweep), calibrate the RF power and record and journal each reading. When pipelined, laser 4
+        is retuned for the next step as soon as the last readings no longer depend on it.
+        """
+        step_laser_4_WL = run.laser_4_WL
+        self.beat_tracker.add(step_laser_4_WL, beat_freq)
+        for point_index, inner_point in enumerate(inner_points):
+            if inner_point is not None:
+                # Nested point at the locked beat frequency
+                axis.apply(inner_point)
+                self.profiler.sleep(self.nested_settle, 'engine', 'nested settle')
+            acquisition = self.start_step_acquisition(beat_freq)
+            if config.pipelined and point_index == len(inner_points) - 1:
+                # Retune laser 4 for the next step as soon as this step's readings no longer depend on it,
+                # so the laser settles while this step is logged and plotted
+                if config.retune_during_averaging:
+                    acquisition.result('current', 'p_actual')
+                else:
+                    acquisition.result()
+                self._step_laser_4(run)
+            readings = acquisition.result()
+            (current, current_std), p_actual, output_dbm = readings['current'], readings['p_actual'], readings['output_dbm']
+
+            calibrated_power, step_rf_loss, step_probe_loss, step_link_loss = calibration.calibrate_point(output_dbm, beat_freq)
+            step_values = {
+                'step': step + 1,
+                'beat_freq': beat_freq,
+                'laser_4_WL': step_laser_4_WL,
+                'raw_power': None if output_dbm is None else round(output_dbm, 2),
+                'current': current,
+                'current_std': current_std,
+                'p_actual': p_actual,
+                'rf_loss': step_rf_loss,
+                'rf_probe_loss': step_probe_loss,
+                'rf_link_loss': step_link_loss,
+                'calibrated_rf': calibrated_power,
+            }
+            if axis is not None:
+                step_values[axis.name] = inner_point if inner_point is not None else outer_point
+            self.records.append(**step_values)  # missing readings are stored as NaN
+            self.log(
+                f"Beat Frequency: {round(beat_freq,2)} GHz\n"
+                f"Measured Photocurrent: {current} mA\n"
+                f"Raw RF Power: {output_dbm} dBm",
+                STEP, **step_values
+            )
+            self.journal.add_step(**{
+                name: float('nan') if value is None else value for name, value in step_values.items()
+            })
+
+    def shutdown(self):
+        """
+        Stop any running sweep and the acquisition worker threads.
+        """
+        self.stop_event.set()
+        self.acquisition_scheduler.shutdown()
@@ -0,0 +1,169 @@
+"""
+End-of-run .txt and .xlsx exports, built from the sweep journal (sweep/journal.py).
+A nested sweep (sweep/nested.py) adds its axis value as a last column to every row and a
+2-D grid report (frequency step x axis point) of photocurrent and RF power.
+"""
+import time
+
+from openpyxl import Workbook
+
+from sweep.journal import read_journal
+from sweep.log import WARNING, ERROR
+from sweep.nested import AXIS_LABELS, grid
+
+# Grids written for a nested sweep: step record column -> heading
+GRID_COLUMNS = [('current', "I_PD (mA)"), ('raw_power', "Raw RF POW (dBm)"), ('calibrated_rf', "Cal RF POW (dBm)")]
+
+COLUMNS = ["F_BEAT (GHz)", "I_PD (mA)", "Raw RF POW (dBm)",
+           "Total RF Loss (dB)", "RF Probe Loss (dB)",
+           "RF Link Loss (dB)", "Cal RF POW (dBm)", "VOA P Actual (dBm)"]
+
+
+def write_text_report(file_path, header, steps, sweep_run_time, total_run_time):
+    """
+    Write the tab-separated .txt data file for the journal header and step records.
+    """
+    axis = header.get('nested_axis')
+    has_std = 'current_std' in steps[0]  # journals from before the buffered Keithley readings have no std
+    with open(file_path, 'w') as f:
+        f.write("DEVICE NUMBER: " + str(header['device_num']) + "\n")
+        f.write("COMMENTS: " + header['comment'] + "\n")
+        f.write("KEITHLEY VOLTAGE: " + str(header['keithley_voltage']) + " V" + "\n")
+        f.write("FREQUENCY SWEEP RUN TIME: " + f"{sweep_run_time:.2f}" + " s" + "\n")
+        f.write("TOTAL RUN TIME: " + f"{total_run_time:.2f}" + " s" + "\n")
+        f.write("RF Link Loss File (.xlsx): " + str(header['excel_file'] or 'None') + "\n")
+        f.write("RF Probe Loss File (.s2p): " + str(header['s2p_file'] or 'None') + "\n")
+        f.write("INITIAL PHOTOCURRENT: " + str(steps[0]['current']) + " (mA)" + "\n")
+        f.write("STARTING WAVELENGTH FOR LASER 3: " + str(header['laser_3_WL']) +
+                " (nm) : STARTING WAVELENGTH FOR LASER 4: " + f"{steps[0]['laser_4_WL']:.3f}" +
+                " (nm) : DELAY: " + str(header['delay']) + " (s) " + "\n")
+        f.write("DATE: " + time.strftime("%m/%d/%Y") + "\n")
+        f.write("TIME: " + time.strftime("%H:%M:%S") + "\n")
+        f.write("\n")
+        f.write("F_BEAT(GHz)\tI_PD (mA)\tRaw RF POW (dBm)\tTotal RF Loss (dB)\tProbe RF Loss (dB)\tLink RF Loss (dB)\tCal RF POW (dBm)\tVOA P Actual (dBm)" +
+                ("\tI_PD STD (mA)" if has_std else "") + (f"\t{AXIS_LABELS[axis]}" if axis else "") + "\n")
+        for step in steps:
+            f.write(f"{step['beat_freq']:<10.2f}\t{step['current']:<10.4e}\t{step['raw_power']:<10.2f}\t"
+                    f"{step['rf_loss']:<10.2f}\t{step['rf_probe_loss']:<10.2f}\t{step['rf_link_loss']:<10.2f}\t"
+                    f"{step['calibrated_rf']:<10.2f}\t{step['p_actual']:<10.3f}" +
+                    (f"\t{step['current_std']:<10.4e}" if has_std else "") +
+                    (f"\t{step[axis]:<10.3f}" if axis else "") + "\n")
+
+
+def write_excel_report(file_path, header, steps, sweep_run_time, total_run_time):
+    """
+    Write the .xlsx data file for the journal header and step records.
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Experiment Data"
+    ws.append(["DEVICE NUMBER", header['device_num']])
+    ws.append(["COMMENTS", header['comment']])
+    ws.append(["KEITHLEY VOLTAGE", f"{header['keithley_voltage']} V"])
+    ws.append(["INITIAL PHOTOCURRENT", f"{steps[0]['current']} (mA)"])
+    ws.append(["STARTING WAVELENGTH FOR LASER 3", f"{header['laser_3_WL']} (nm)"])
+    ws.append(["STARTING WAVELENGTH FOR LASER 4", f"{steps[0]['laser_4_WL']:.3f} (nm)"])
+    ws.append(["DELAY", f"{header['delay']} (s)"])
+    ws.append(["FREQUENCY SWEEP RUN TIME", f"{sweep_run_time:.2f} s"])
+    ws.append(["TOTAL RUN TIME", f"{total_run_time:.2f} s"])
+    ws.append(["EXCEL LOSS FILE", header['excel_file'] or 'None'])
+    ws.append(["S2P LOSS FILE", header['s2p_file'] or 'None'])
+    ws.append(["DATE", time.strftime("%m/%d/%Y")])
+    ws.append(["TIME", time.strftime("%H:%M:%S")])
+    ws.append([])
+    axis = header.get('nested_axis')
+    has_std = 'current_std' in steps[0]
+    ws.append(COLUMNS + (["I_PD STD (mA)"] if has_std else []) + ([AXIS_LABELS[axis]] if axis else []))
+    for step in steps:
+        ws.append([
+            f"{step['beat_freq']:.2f}",
+            f"{step['current']}",
+            f"{step['raw_power']:.2f}",
+            f"{step['rf_loss']:.2f}",
+            f"{step['rf_probe_loss']:.2f}",
+            f"{step['rf_link_loss']:.2f}",
+            f"{step['calibrated_rf']:.2f}",
+            f"{step['p_actual']:.3f}"
+        ] + ([f"{step['current_std']}"] if has_std else []) + ([f"{step[axis]:.3f}"] if axis else []))
+    if axis:
+        # One sheet per grid: a row per frequency step, a column per axis point
+        for column, heading in GRID_COLUMNS:
+            step_numbers, beat_freqs, points, values = grid(steps, axis, column)
+            sheet = wb.create_sheet(heading.split(' (')[0] + " grid")
+            sheet.append([heading])
+            sheet.append(["STEP", "F_BEAT (GHz)"] + [f"{AXIS_LABELS[axis]} {point:g}" for point in points])
+            for step_number, beat_freq, row in zip(step_numbers, beat_freqs, values):
+                sheet.append([step_number, round(float(beat_freq), 2)] + [None if value != value else float(value) for value in row])
+    # Adjust column widths
+    for column in ws.columns:
+        max_length = 0
+        column = list(column)
+        for cell in column:
+            try:
+                if len(str(cell.value)) > max_length:
+                    max_length = len(str(cell.value))
+            except Exception:
+                pass
+        adjusted_width = (max_length + 2)
+        ws.column_dimensions[column[0].column_letter].width = adjusted_width
+    wb.save(file_path)
+
+
+def grid_path_for(file_path):
+    """
+    2-D grid report next to a .txt data file, e.g. data.txt -> data_grid.txt.
+    """
+    return file_path.rsplit('.', 1)[0] + '_grid.txt'
+
+
+def write_grid_report(file_path, header, steps):
+    """
+    Write the 2-D grids (frequency step x nested axis point) of photocurrent and RF power of a
+    nested sweep as tab-separated tables, one after the other.
+    """
+    axis = header['nested_axis']
+    with open(file_path, 'w') as f:
+        f.write("DEVICE NUMBER: " + str(header['device_num']) + "\n")
+        f.write("COMMENTS: " + header['comment'] + "\n")
+        f.write("NESTED AXIS: " + AXIS_LABELS[axis] + " (" +
+                ("frequency outer loop" if header.get('frequency_outer', True) else "frequency inner loop") + ")\n")
+        for column, heading in GRID_COLUMNS:
+            step_numbers, beat_freqs, points, values = grid(steps, axis, column)
+            f.write("\n" + heading + "\n")
+            f.write("STEP\tF_BEAT(GHz)\t" + "\t".join(f"{AXIS_LABELS[axis]} {point:g}" for point in points) + "\n")
+            for step_number, beat_freq, row in zip(step_numbers, beat_freqs, values):
+                f.write(f"{step_number}\t{beat_freq:.2f}\t" + "\t".join(f"{value:.4g}" for value in row) + "\n")
+
+
+def export_journal(journal_path, file_path, sweep_run_time, total_run_time, log):
+    """
+    Write the .txt data file and the .xlsx next to it from the steps recorded in a sweep journal.
+    log(message, kind) reports the files written and any failure; nothing is raised, so an
+    unattended run carries on after a failed save.
+    """
+    try:
+        header, steps, _ = read_journal(journal_path)
+    except Exception as e:
+        log(f"Could not read sweep journal {journal_path}: {e}", ERROR)
+        return
+    if not steps:
+        log("No completed steps to save.", WARNING)
+        return
+    try:
+        write_text_report(file_path, header, steps, sweep_run_time, total_run_time)
+        log(f"Data saved to {file_path}")
+    except Exception as e:
+        log(f"Text save failed: {e}", ERROR)
+    excel_path = file_path.replace(".txt", ".xlsx")
+    try:
+        write_excel_report(excel_path, header, steps, sweep_run_time, total_run_time)
+        log(f"Excel data saved to {excel_path}")
+    except Exception as e:
+        log(f"Excel save failed: {e}", ERROR)
+    if header.get('nested_axis'):
+        grid_path = grid_path_for(file_path)
+        try:
+            write_grid_report(grid_path, header, steps)
+            log(f"2-D grid data saved to {grid_path}")
+        except Exception as e:
+            log(f"Grid save failed: {e}", ERROR)
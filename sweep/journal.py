@@ -0,0 +1,92 @@
+"""
+Append-only JSONL journal of a sweep (header, one record per step, end), written as each step
+completes; the .txt/.xlsx exports and --resume are built from it.
+"""
+import json
+import os
+import time
+
+JOURNAL_VERSION = 1
+
+
+def journal_path_for(file_path):
+    """
+    Journal path next to a save file, e.g. data.txt -> data.journal.jsonl.
+    """
+    return file_path.rsplit('.', 1)[0] + '.journal.jsonl'
+
+
+class SweepJournal:
+    def __init__(self, path, fsync_interval=5.0):
+        """
+        path: journal file (.jsonl).
+        fsync_interval: longest time (s) records may sit in the OS cache before being fsync'ed.
+        """
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.file = None
+        self.last_sync = 0.0
+
+    def open(self, header, append=False):
+        """
+        Start the journal with a header record. With append=True the existing file is kept
+        and the header is added after its records.
+        """
+        self.file = open(self.path, 'a' if append else 'w', buffering=1)  # line-buffered
+        if append and self.file.tell() > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self.file.write('\n')  # end a line cut off by a crash, so the header starts its own line
+        self.write(dict(header, type='header', version=JOURNAL_VERSION))
+        self.sync()
+
+    def write(self, record):
+        record.setdefault('timestamp', time.time())
+        self.file.write(json.dumps(record) + '\n')
+        if time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.sync()
+
+    def add_step(self, **fields):
+        self.write(dict(fields, type='step'))
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_sync = time.monotonic()
+
+    def close(self, status, **fields):
+        """
+        Write the end record ('completed', 'stopped' or 'error') and close the file.
+        """
+        if self.file is None:
+            return
+        self.write(dict(fields, type='end', status=status))
+        self.sync()
+        self.file.close()
+        self.file = None
+
+
+def read_journal(path):
+    """
+    Return (header, steps, end) from a journal file. header is the latest header record
+    (a resumed sweep adds one per session), steps the list of step records in order and end
+    the last end record (None if the run did not finish). A partially written last line
+    (crash mid-write) is ignored.
+    """
+    header = None
+    steps = []
+    end = None
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record['type'] == 'header':
+                header = record
+            elif record['type'] == 'step':
+                steps.append(record)
+            elif record['type'] == 'end':
+                end = record
+    return header, steps, end
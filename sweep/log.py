@@ -0,0 +1,7 @@
+"""
+Kinds of messages passed to the sweep engine's log callback (and shown by the GUI message feed).
+"""
+STATUS = 'status'
+WARNING = 'warning'
+ERROR = 'error'
+STEP = 'step'  # one measured step; the message data holds its readings
@@ -0,0 +1,74 @@
+"""
+Nested sweeps: the Keithley bias or the VOA attenuation swept together with the beat frequency.
+"""
+import numpy as np
+
+# Export column heading of each nested axis (record column name -> label with unit)
+AXIS_LABELS = {
+    'bias_voltage': "BIAS (V)",
+    'voa_attenuation': "VOA ATT (dB)",
+}
+
+
+def parse_points(value):
+    """
+    List of float set points from a list, a comma separated string ("-1, -2, -3") or an
+    inclusive range "start:stop:count" ("-1:-5:5" = -1, -2, -3, -4, -5). None or "" gives [].
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return []
+        if ':' in value:
+            try:
+                start, stop, count = value.split(':')
+                count = int(count)
+            except ValueError:
+                raise ValueError(f"Invalid point range '{value}', expected start:stop:count") from None
+            if count < 1:
+                raise ValueError(f"Invalid point range '{value}', count must be at least 1")
+            return [round(float(point), 9) for point in np.linspace(float(start), float(stop), count)]
+        return [float(point) for point in value.split(',') if point.strip()]
+    return [float(point) for point in value]
+
+
+class SweepAxis:
+    def __init__(self, name, points, apply, read):
+        """
+        name: record column and journal field holding the axis value (a key of AXIS_LABELS).
+        points: set points, in the order they are measured.
+        apply: apply(point) sets the instrument to a point.
+        read: read() returns the current setting, restored after the sweep.
+        """
+        self.name = name
+        self.label = AXIS_LABELS[name]
+        self.points = points
+        self.apply = apply
+        self.read = read
+
+
+def grid(steps, axis_name, column):
+    """
+    Arrange step records of a nested sweep into a 2-D grid.
+    Returns (step numbers, mean beat frequency of each step, axis points, values) where
+    values[i, j] is column at step i and axis point j (NaN where it was not measured).
+    """
+    step_numbers = sorted({record['step'] for record in steps})
+    points = sorted({record[axis_name] for record in steps})
+    row = {step: i for i, step in enumerate(step_numbers)}
+    col = {point: j for j, point in enumerate(points)}
+    values = np.full((len(step_numbers), len(points)), np.nan)
+    beat_sum = np.zeros(len(step_numbers))
+    beat_count = np.zeros(len(step_numbers))
+    for record in steps:
+        i = row[record['step']]
+        value = record[column]
+        values[i, col[record[axis_name]]] = np.nan if value is None else value
+        if record['beat_freq'] is not None and np.isfinite(record['beat_freq']):
+            beat_sum[i] += record['beat_freq']
+            beat_count[i] += 1
+    with np.errstate(invalid='ignore'):
+        beat_freqs = beat_sum / beat_count
+    return step_numbers, beat_freqs, points, values
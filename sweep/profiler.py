@@ -0,0 +1,182 @@
+"""
+Timing profile of a sweep: every VISA call, sleep and GUI update, attributed to the sweep step
+it happened in (step 0 is the setup and search), saved next to the data as <name>_timing.txt.
+"""
+import threading
+import time
+
+import numpy as np
+
+VISA = 'visa'
+SLEEP = 'sleep'
+GUI = 'gui'
+
+# Phase of the per-step breakdown each event source counts towards
+PHASES = ['laser', 'settle', 'WLM', 'ESA', 'Keithley', 'VOA', 'power sensor', 'plot', 'GUI feed', 'other']
+SOURCE_PHASES = {
+    'ecl': 'laser',
+    'wavelength_meter': 'WLM',
+    'spectrum_analyzer': 'ESA',
+    'keithley': 'Keithley',
+    'voa': 'VOA',
+    'power_sensor': 'power sensor',
+}
+ENGINE_SLEEP_PHASES = {'stabilize': 'settle', 'settle': 'settle', 'nested settle': 'settle'}
+GUI_PHASES = {'plot': 'plot', 'message feed': 'GUI feed'}
+
+
+def timing_path_for(file_path):
+    """
+    Timing report next to a .txt data file, e.g. data.txt -> data_timing.txt.
+    """
+    return file_path.rsplit('.', 1)[0] + '_timing.txt'
+
+
+def phase_of(kind, source, name):
+    if kind == GUI:
+        return GUI_PHASES.get(name, 'other')
+    if source == 'engine':
+        return ENGINE_SLEEP_PHASES.get(name, 'other')
+    return SOURCE_PHASES.get(source, 'other')
+
+
+class SweepProfiler:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Clear the events; called at the start of every run.
+        """
+        with self.lock:
+            self.events = []        # (step, kind, source, name, duration in s)
+            self.step_starts = []   # (step, perf_counter at its start)
+            self.step = 0
+            self.active = False
+            self.end_time = None
+
+    def start(self):
+        """
+        Start recording (step 0: setup and search).
+        """
+        self.reset()
+        self.active = True
+        self.step_starts.append((0, time.perf_counter()))
+
+    def begin_step(self, step):
+        """
+        Attribute the following events to a sweep step (1-based).
+        """
+        with self.lock:
+            self.step = step
+            self.step_starts.append((step, time.perf_counter()))
+
+    def finish(self):
+        """
+        Stop recording; events after this (e.g. the final redraw) are not part of the run.
+        """
+        self.active = False
+        self.end_time = time.perf_counter()
+
+    def record(self, kind, source, name, duration):
+        if not self.active:
+            return
+        with self.lock:
+            self.events.append((self.step, kind, source, name, duration))
+
+    def record_call(self, instrument, command, duration):
+        """
+        Record a VISA call (called by instruments/sessions.py).
+        """
+        self.record(VISA, instrument, command, duration)
+
+    def sleep(self, seconds, source, name):
+        """
+        time.sleep(seconds), recorded as a sleep of source (e.g. 'engine' or an instrument name).
+        """
+        start = time.perf_counter()
+        time.sleep(seconds)
+        self.record(SLEEP, source, name, time.perf_counter() - start)
+
+    def step_wall_times(self):
+        """
+        Wall time (s) of each step: from its start to the start of the next one (or the end of the run).
+        """
+        end = self.end_time if self.end_time is not None else time.perf_counter()
+        wall = {}
+        for i, (step, start) in enumerate(self.step_starts):
+            stop = self.step_starts[i + 1][1] if i + 1 < len(self.step_starts) else end
+            wall[step] = wall.get(step, 0.0) + stop - start
+        return wall
+
+    def step_breakdown(self):
+        """
+        {step: {phase: seconds}} for every step with events or a wall time.
+        """
+        breakdown = {step: dict.fromkeys(PHASES, 0.0) for step in self.step_wall_times()}
+        with self.lock:
+            events = list(self.events)
+        for step, kind, source, name, duration in events:
+            phases = breakdown.setdefault(step, dict.fromkeys(PHASES, 0.0))
+            phases[phase_of(kind, source, name)] += duration
+        return breakdown
+
+    def summary(self):
+        """
+        One row per (kind, source, name): count, total (s), mean, 95th percentile and max (ms),
+        sorted by total time.
+        """
+        with self.lock:
+            events = list(self.events)
+        groups = {}
+        for _, kind, source, name, duration in events:
+            groups.setdefault((kind, source, name), []).append(duration)
+        rows = []
+        for (kind, source, name), durations in groups.items():
+            durations = np.asarray(durations)
+            rows.append((kind, source, name, len(durations), durations.sum(), durations.mean() * 1000,
+                         np.percentile(durations, 95) * 1000, durations.max() * 1000))
+        rows.sort(key=lambda row: row[4], reverse=True)
+        return rows
+
+    def mean_step(self):
+        """
+        (mean wall time, {phase: mean seconds}) over the sweep steps (step 0 excluded), or None.
+        """
+        wall = self.step_wall_times()
+        breakdown = self.step_breakdown()
+        steps = [step for step in wall if step > 0]
+        if not steps:
+            return None
+        phases = {phase: sum(breakdown[step][phase] for step in steps) / len(steps) for phase in PHASES}
+        return sum(wall[step] for step in steps) / len(steps), phases
+
+    def write_report(self, file_path):
+        """
+        Write the per-step breakdown and the summary table as tab separated text.
+        """
+        wall = self.step_wall_times()
+        breakdown = self.step_breakdown()
+        with open(file_path, 'w') as f:
+            f.write("SWEEP TIMING REPORT\n")
+            f.write(f"RUN TIME: {sum(wall.values()):.2f} s\n")
+            mean = self.mean_step()
+            if mean is not None:
+                f.write(f"MEAN STEP TIME: {mean[0]:.3f} s\n")
+            f.write("NOTE: instruments on different buses are read concurrently, so the phases of a step "
+                    "can add up to more than its wall time.\n\n")
+
+            f.write("PER-STEP BREAKDOWN (s)\n")
+            f.write("STEP\tWALL\t" + "\t".join(PHASES) + "\n")
+            for step in sorted(breakdown):
+                label = "0 (setup)" if step == 0 else str(step)
+                f.write(f"{label}\t{wall.get(step, 0.0):.3f}\t"
+                        + "\t".join(f"{breakdown[step][phase]:.3f}" for phase in PHASES) + "\n")
+            if mean is not None:
+                f.write(f"MEAN\t{mean[0]:.3f}\t" + "\t".join(f"{mean[1][phase]:.3f}" for phase in PHASES) + "\n")
+
+            f.write("\nSUMMARY\n")
+            f.write("KIND\tSOURCE\tNAME\tCOUNT\tTOTAL (s)\tMEAN (ms)\tP95 (ms)\tMAX (ms)\n")
+            for kind, source, name, count, total, mean_ms, p95_ms, max_ms in self.summary():
+                f.write(f"{kind}\t{source}\t{name}\t{count}\t{total:.3f}\t{mean_ms:.1f}\t{p95_ms:.1f}\t{max_ms:.1f}\n")
@@ -0,0 +1,58 @@
+"""
+Columnar store for the readings of a sweep (preallocated NumPy arrays, NaN for missing readings).
+"""
+import numpy as np
+
+COLUMNS = ('step', 'beat_freq', 'laser_4_WL', 'raw_power', 'current', 'current_std', 'p_actual',
+           'rf_loss', 'rf_probe_loss', 'rf_link_loss', 'calibrated_rf', 'bias_voltage',
+           'voa_attenuation')
+
+
+class SweepRecords:
+    def __init__(self, capacity=0, columns=COLUMNS):
+        self.columns = tuple(columns)
+        self.count = 0  # fill pointer: number of rows stored
+        self.arrays = {name: np.full(capacity, np.nan) for name in self.columns}
+
+    @property
+    def capacity(self):
+        return len(self.arrays[self.columns[0]])
+
+    def reserve(self, capacity):
+        """
+        Make room for at least capacity rows, keeping the rows already stored.
+        """
+        if capacity <= self.capacity:
+            return
+        for name, array in self.arrays.items():
+            grown = np.full(capacity, np.nan)
+            grown[:self.count] = array[:self.count]
+            self.arrays[name] = grown
+
+    def clear(self, capacity=0):
+        """
+        Drop all rows (the storage is reused) and make room for capacity rows.
+        """
+        self.count = 0
+        self.reserve(capacity)
+
+    def append(self, **values):
+        """
+        Add one row. Columns that are not given, or given as None, are stored as NaN.
+        """
+        unknown = set(values) - set(self.columns)
+        if unknown:
+            raise KeyError(f"Unknown sweep columns: {', '.join(sorted(unknown))}")
+        if self.count == self.capacity:
+            self.reserve(max(16, 2 * self.capacity))
+        for name, array in self.arrays.items():
+            value = values.get(name)
+            array[self.count] = np.nan if value is None else value
+        # Advance the pointer last, so a reader on another thread never sees a half-written row
+        self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name):
+        return self.arrays[name][:self.count]
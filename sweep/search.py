@@ -0,0 +1,174 @@
+"""
+Model-based search for the starting beat frequency: resolve which side of laser 3 laser 4 is
+on, then solve the linear beat model for the laser 4 setting and refine it with secant steps.
+"""
+import time
+
+from sweep.tracking import C, optical_frequency
+
+
+def optical_wavelength(frequency):
+    """
+    Wavelength (nm) of an optical frequency in GHz.
+    """
+    return C / (frequency * 1e9) * 1e9
+
+
+class SearchResult:
+    def __init__(self, laser_4_WL, beat_freq, iterations, elapsed, converged):
+        self.laser_4_WL = laser_4_WL    # Final laser 4 setting (nm)
+        self.beat_freq = beat_freq      # Last measured beat frequency (GHz)
+        self.iterations = iterations    # Number of laser 4 moves
+        self.elapsed = elapsed          # Search time (s)
+        self.converged = converged      # True if the beat frequency is within the threshold
+
+
+class StartFrequencySearch:
+    def __init__(self, set_wavelength, settle, measure, stop_event=None, log=print,
+                 threshold=0.5, min_beat=1.0, escape_step=3.0, probe_step=5.0,
+                 max_step=500.0, max_iterations=15, wavelength_bounds=(1540, 1660)):
+        """
+        set_wavelength(wavelength): command laser 4 (nm).
+        settle(): wait after a retune; may return a converged beat frequency (GHz) or None.
+        measure(): read the beat frequency (GHz) or None.
+        threshold: accepted distance (GHz) from the start frequency.
+        min_beat: below this beat frequency (GHz) the side of laser 3 cannot be resolved.
+        escape_step: laser 4 step (GHz) used to get away from 0 GHz; must exceed 2 * min_beat.
+        probe_step: largest laser 4 step (GHz) used to find the sign of the beat frequency.
+        max_step: largest laser 4 step (GHz) taken in one secant iteration.
+        """
+        self.set_wavelength = set_wavelength
+        self.settle = settle
+        self.measure = measure
+        self.stop_event = stop_event
+        self.log = log
+        self.threshold = threshold
+        self.min_beat = min_beat
+        self.escape_step = escape_step
+        self.probe_step = probe_step
+        self.max_step = max_step
+        self.max_iterations = max_iterations
+        self.wavelength_bounds = wavelength_bounds
+        self.iterations = 0
+
+    def stopped(self):
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def move(self, laser_4_freq):
+        """
+        Retune laser 4 to an optical frequency (GHz) and return the new beat frequency reading.
+        """
+        wavelength = optical_wavelength(laser_4_freq)
+        low, high = self.wavelength_bounds
+        if not low < wavelength < high:
+            raise ValueError(f"New wavelength for laser 4 is out of bounds: {wavelength:.3f} nm")
+        self.iterations += 1
+        self.set_wavelength(wavelength)
+        beat_freq = self.settle()
+        if beat_freq is None:
+            beat_freq = self.measure()
+        return beat_freq
+
+    def resolve_sign(self, laser_4_freq, beat_freq):
+        """
+        Return a list of (laser 4 frequency, signed beat frequency) points on one side of laser 3.
+        """
+        while not self.stopped() and self.iterations < self.max_iterations:
+            if beat_freq is None:
+                # Nothing readable: take a small step and try again
+                laser_4_freq -= self.min_beat
+                beat_freq = self.move(laser_4_freq)
+                continue
+            if beat_freq < self.min_beat:
+                # Too close to 0 GHz to tell the side: step down until laser 4 is surely below laser 3
+                laser_4_freq -= self.escape_step
+                beat_freq = self.move(laser_4_freq)
+                if beat_freq is not None:
+                    return [(laser_4_freq, beat_freq)]
+                continue
+            # Step down by at most half the beat frequency, so the probe cannot cross 0 GHz.
+            # A falling beat frequency means laser 4 is above laser 3 (negative s).
+            probe_freq = laser_4_freq - min(beat_freq / 2, self.probe_step)
+            probe_beat = self.move(probe_freq)
+            if probe_beat is None:
+                continue
+            sign = -1 if probe_beat < beat_freq else 1
+            return [(laser_4_freq, sign * beat_freq), (probe_freq, sign * probe_beat)]
+        return []
+
+    def run(self, laser_4_WL, start_freq, beat_freq=None, sign=None):
+        """
+        Bring the beat frequency to start_freq (GHz) with laser 4 below laser 3, starting from
+        laser 4 at laser_4_WL (nm) and an optional beat frequency reading taken there.
+        sign: side of laser 3 laser 4 is known to be on (1: below, e.g. a cached or resumed
+              setting), so the first reading is accepted or refined without a probe step.
+        Returns a SearchResult, or None if stopped by the user.
+        """
+        start_time = time.monotonic()
+        self.iterations = 0
+        if beat_freq is None:
+            beat_freq = self.measure()
+        if (start_freq < self.min_beat or sign == 1) and beat_freq is not None and abs(beat_freq - start_freq) <= self.threshold:
+            # Already there (near 0 GHz the sign cannot be resolved and does not matter)
+            return SearchResult(laser_4_WL, beat_freq, 0, time.monotonic() - start_time, True)
+        if sign is not None and beat_freq is not None and beat_freq >= self.min_beat:
+            points = [(optical_frequency(laser_4_WL), sign * beat_freq)]
+        else:
+            points = self.resolve_sign(optical_frequency(laser_4_WL), beat_freq)
+
+        while points and not self.stopped():
+            laser_4_freq, signed_beat = points[-1]
+            if abs(signed_beat - start_freq) <= self.threshold or self.iterations >= self.max_iterations:
+                break
+            # A start frequency below min_beat is approached from a resolved point with laser 4
+            # below laser 3 (escape_step), in a step short enough to land within the threshold
+            target = start_freq
+            if start_freq < self.min_beat and not 0 < signed_beat <= self.escape_step + self.threshold:
+                target = self.escape_step
+
+            # Slope of the signed beat vs. laser 4 frequency; ideally -1, use that when the last
+            # two points are too close together or give an unphysical value
+            slope = -1.0
+            if len(points) >= 2:
+                previous_freq, previous_beat = points[-2]
+                if abs(laser_4_freq - previous_freq) > 0.2:
+                    fitted = (signed_beat - previous_beat) / (laser_4_freq - previous_freq)
+                    if -2.0 <= fitted <= -0.5:
+                        slope = fitted
+
+            step = (target - signed_beat) / slope
+            step = max(-self.max_step, min(self.max_step, step))
+            new_freq = laser_4_freq + step
+            new_beat = self.move(new_freq)
+            if new_beat is None:
+                continue
+
+            self.log(f"Search iteration {self.iterations}: beat frequency {new_beat:.2f} GHz")
+            # The model says which side of laser 3 the new point should be on, except near 0 GHz
+            # where both signs are equally likely and noise would decide
+            predicted = signed_beat + slope * step
+            if abs(predicted) < self.min_beat:
+                if abs(new_beat - start_freq) <= self.threshold:
+                    points.append((new_freq, new_beat))
+                else:
+                    points = self.resolve_sign(new_freq, new_beat)
+                continue
+            new_signed = new_beat if abs(predicted - new_beat) <= abs(predicted + new_beat) else -new_beat
+            if abs(new_signed - target) > abs(signed_beat - target):
+                # Further from the target than before: the side was most likely wrong. Go back to the
+                # last point and resolve it there, so a bad reading cannot walk the search away
+                if self.iterations >= self.max_iterations:
+                    break
+                back_beat = self.move(laser_4_freq)
+                points = self.resolve_sign(laser_4_freq, back_beat)
+                continue
+            points.append((new_freq, new_signed))
+
+        if self.stopped():
+            return None
+        elapsed = time.monotonic() - start_time
+        if not points:
+            return SearchResult(laser_4_WL, beat_freq, self.iterations, elapsed, False)
+        laser_4_freq, signed_beat = points[-1]
+        converged = abs(signed_beat - start_freq) <= self.threshold
+        return SearchResult(optical_wavelength(laser_4_freq), abs(signed_beat), self.iterations, elapsed, converged)
@@ -0,0 +1,83 @@
+"""
+Predictive beat-frequency tracking: a linear fit over the last (laser 4, beat) points picks the
+instrument to query for the next step.
+"""
+import numpy as np
+
+C = 299792458  # Speed of light in m/s
+
+WAVELENGTH_METER = 'wavelength_meter'
+ESA = 'esa'
+BOTH = 'both'
+
+
+def optical_frequency(wavelength):
+    """
+    Optical frequency (GHz) of a wavelength in nm.
+    """
+    return C / (wavelength * 1e-9) / 1e9
+
+
+class BeatFrequencyTracker:
+    def __init__(self, window=6, tolerance=1.0, handover=(45.0, 50.0)):
+        """
+        window: number of most recent points used for the linear fit.
+        tolerance: largest accepted difference (GHz) between a reading and the prediction.
+        handover: beat frequency band (GHz) where the ESA hands over to the wavelength meter;
+                  both instruments are read inside it (widened by the tolerance).
+        """
+        self.window = window
+        self.tolerance = tolerance
+        self.handover = handover
+        self.laser_4_freqs = []
+        self.beat_freqs = []
+
+    def reset(self):
+        self.laser_4_freqs = []
+        self.beat_freqs = []
+
+    def add(self, laser_4_WL, beat_freq):
+        """
+        Record the beat frequency (GHz) measured with laser 4 set to laser_4_WL (nm).
+        A point that misses the prediction (e.g. after passing through 0 GHz or a laser mode hop)
+        starts a new fit from that point.
+        """
+        if beat_freq is None or not np.isfinite(beat_freq):
+            return
+        predicted = self.predict(laser_4_WL)
+        if predicted is not None and not self.accepts(beat_freq, predicted):
+            self.reset()
+        self.laser_4_freqs.append(optical_frequency(laser_4_WL))
+        self.beat_freqs.append(beat_freq)
+        del self.laser_4_freqs[:-self.window]
+        del self.beat_freqs[:-self.window]
+
+    def predict(self, laser_4_WL):
+        """
+        Predicted beat frequency (GHz) at laser_4_WL (nm), or None with fewer than two points.
+        """
+        if len(self.beat_freqs) < 2:
+            return None
+        x = np.asarray(self.laser_4_freqs)
+        x0 = x[-1]  # fit relative to the last point to keep the optical frequencies well conditioned
+        slope, intercept = np.polyfit(x - x0, np.asarray(self.beat_freqs), 1)
+        return float(slope * (optical_frequency(laser_4_WL) - x0) + intercept)
+
+    def instrument_for(self, predicted):
+        """
+        Which instrument(s) to query for a predicted beat frequency.
+        """
+        if predicted is None:
+            return BOTH
+        low, high = self.handover
+        if predicted < low - self.tolerance:
+            return ESA
+        if predicted > high + self.tolerance:
+            return WAVELENGTH_METER
+        return BOTH
+
+    def accepts(self, beat_freq, predicted):
+        """
+        True if a single-instrument reading agrees with the prediction.
+        """
+        return beat_freq is not None and abs(beat_freq - predicted) <= self.tolerance
@@ -0,0 +1,31 @@
+import time
+
+import pytest
+
+from instruments.simulated import SimulatedBench, SimulatedResourceManager
+from sweep import batch
+from sweep.batch import BatchQueue, BatchRunner
+from sweep.engine import SweepConfig, SweepEngine
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+
+
+def test_stop_between_jobs_ends_batch(tmp_path, monkeypatch):
+    engine = SweepEngine(SimulatedResourceManager(SimulatedBench(settle_time=0.0)),
+                         log=lambda message, *args, **data: None)
+    queue = BatchQueue(output_dir=str(tmp_path))
+    for start_freq in (5.0, 20.0):
+        queue.add(SweepConfig(laser_3_WL=1550.0, laser_4_WL=1548.0, start_freq=start_freq, end_freq=start_freq + 4,
+                              num_steps=2, delay=0.0, use_laser_cache=False, device_num='D1'))
+
+    def export_and_stop(*args):
+        engine.stop_event.set()  # e.g. Ctrl+C while the first job is exported
+    monkeypatch.setattr(batch, 'export_journal', export_and_stop)
+
+    jobs = BatchRunner(engine, log=lambda message, *args, **data: None).run(queue)
+    engine.shutdown()
+    assert jobs[0].result.status == 'completed'
+    assert jobs[1].result is None
@@ -0,0 +1,146 @@
+import json
+import time
+
+import numpy as np
+import pytest
+
+from instruments.simulated import SimulatedBench, SimulatedResourceManager
+from sweep.engine import SweepConfig, SweepEngine
+from sweep.export import export_journal, grid_path_for
+from sweep.journal import read_journal
+from sweep.nested import grid
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+
+
+@pytest.fixture
+def bench():
+    return SimulatedBench(settle_time=0.0)
+
+
+@pytest.fixture
+def engine(bench, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine = SweepEngine(SimulatedResourceManager(bench), log=lambda message, *args, **data: None)
+    yield engine
+    engine.shutdown()
+
+
+def make_config(tmp_path, **values):
+    settings = dict(laser_3_WL=1550.0, laser_4_WL=1548.0, start_freq=5.0, end_freq=15.0, num_steps=5,
+                    delay=0.0, use_laser_cache=False, save_file_path=str(tmp_path / 'data.txt'))
+    settings.update(values)
+    return SweepConfig(**settings)
+
+
+def test_plain_sweep(engine, tmp_path):
+    result = engine.run(make_config(tmp_path))
+    assert result.status == 'completed'
+    assert len(engine.records) == 5
+    np.testing.assert_allclose(engine.records['beat_freq'], [5, 7, 9, 11, 13], atol=0.5)
+    header, steps, end = read_journal(result.journal_path)
+    assert [step['step'] for step in steps] == [1, 2, 3, 4, 5]
+    assert end['status'] == 'completed'
+
+
+
+def test_photocurrent_mean_and_std(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bench = SimulatedBench(settle_time=0.0, noise=0.05, seed=1)
+    engine = SweepEngine(SimulatedResourceManager(bench), log=lambda message, *args, **data: None)
+    try:
+        result = engine.run(make_config(tmp_path))
+    finally:
+        engine.shutdown()
+    assert result.status == 'completed'
+    np.testing.assert_allclose(engine.records['current'], bench.photocurrent, rtol=0.05)
+    std = engine.records['current_std']
+    assert np.isfinite(std).all() and (std > 0).all() and (std < 0.1 * bench.photocurrent).all()
+
+@pytest.mark.parametrize('start_freq', [0.0, 0.3, 0.8])
+def test_search_converges_from_low_start(engine, tmp_path, start_freq):
+    result = engine.run(make_config(tmp_path, start_freq=start_freq, end_freq=start_freq + 2, num_steps=2))
+    assert result.status == 'completed'
+    assert abs(engine.records['beat_freq'][0] - start_freq) <= 0.5
+
+
+def test_tracking_across_handover(engine, tmp_path):
+    result = engine.run(make_config(tmp_path, start_freq=40.0, end_freq=56.0, num_steps=8, tracking=True))
+    assert result.status == 'completed'
+    np.testing.assert_allclose(engine.records['beat_freq'], np.arange(40.0, 56.0, 2.0), atol=0.5)
+
+
+@pytest.mark.parametrize('frequency_outer', [True, False])
+def test_nested_bias_grid(engine, tmp_path, frequency_outer):
+    config = make_config(tmp_path, num_steps=3, bias_points='-1:-3:3', frequency_outer=frequency_outer)
+    result = engine.run(config)
+    assert result.status == 'completed'
+    assert len(engine.records) == 9
+    export_journal(result.journal_path, config.save_file_path, result.sweep_run_time, result.total_run_time,
+                   lambda message, *args: None)
+    with open(grid_path_for(config.save_file_path)) as f:
+        text = f.read()
+    assert "BIAS (V) -3\tBIAS (V) -2\tBIAS (V) -1" in text
+    header, steps, _ = read_journal(result.journal_path)
+    _, _, points, values = grid(steps, 'bias_voltage', 'current')
+    assert points == [-3.0, -2.0, -1.0]
+    assert values.shape == (3, 3) and np.isfinite(values).all()
+
+
+def truncate_journal(path, steps):
+    """
+    Keep the header and the first steps of a journal and cut the next record mid-line, as a crash would.
+    """
+    with open(path) as f:
+        lines = f.readlines()
+    with open(path, 'w') as f:
+        f.writelines(lines[:1 + steps])
+        f.write(lines[1 + steps][:20])
+
+
+def test_resume_from_truncated_journal(engine, tmp_path):
+    config = make_config(tmp_path, num_steps=6)
+    result = engine.run(config)
+    truncate_journal(result.journal_path, 3)
+
+    resumed = engine.run(config, result.journal_path)
+    assert resumed.status == 'completed'
+    header, steps, end = read_journal(result.journal_path)
+    assert [step['step'] for step in steps] == [1, 2, 3, 4, 5, 6]
+    assert header['resumed_from_step'] == 3
+    assert end['status'] == 'completed'
+    np.testing.assert_allclose([step['beat_freq'] for step in steps], np.linspace(5, 13.33, 6), atol=0.5)
+
+
+def test_resume_without_steps_aborts(engine, tmp_path):
+    config = make_config(tmp_path)
+    result = engine.run(config)
+    truncate_journal(result.journal_path, 0)
+    assert engine.run(config, result.journal_path).status == 'aborted'
+
+
+def test_resume_completed_sweep_aborts(engine, tmp_path):
+    config = make_config(tmp_path)
+    result = engine.run(config)
+    with open(result.journal_path) as f:
+        records = f.readlines()
+    assert engine.run(config, result.journal_path).status == 'aborted'
+    with open(result.journal_path) as f:
+        assert f.readlines() == records
+
+
+def test_resume_without_beat_frequency_aborts(engine, tmp_path):
+    config = make_config(tmp_path)
+    result = engine.run(config)
+    truncate_journal(result.journal_path, 2)
+    with open(result.journal_path) as f:
+        lines = f.readlines()
+    last = json.loads(lines[2])
+    last['beat_freq'] = float('nan')
+    lines[2] = json.dumps(last) + '\n'
+    with open(result.journal_path, 'w') as f:
+        f.writelines(lines)
+    assert engine.run(config, result.journal_path).status == 'aborted'
@@ -0,0 +1,21 @@
+import math
+
+import pytest
+
+from instruments.keithley2400 import Keithley2400Session
+
+
+def test_statistics_in_milliamps():
+    mean, std = Keithley2400Session.statistics("+1.000000E-03,+2.000000E-03,+3.000000E-03")
+    assert mean == pytest.approx(2.0)
+    assert std == pytest.approx(1.0)
+
+
+def test_statistics_of_one_sample():
+    assert Keithley2400Session.statistics("5e-3") == (pytest.approx(5.0), 0.0)
+
+
+@pytest.mark.parametrize('response', ["", "+9.910000E+37,garbage", " , "])
+def test_statistics_of_unparseable_response(response):
+    mean, std = Keithley2400Session.statistics(response)
+    assert math.isnan(mean) and math.isnan(std)
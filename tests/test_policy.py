@@ -0,0 +1,116 @@
+import pyvisa
+import pytest
+
+from instruments.policy import LatencyTracker, RetryPolicy
+from instruments.sessions import SessionManager
+
+
+def learned(tracker, duration=0.1, samples=20):
+    for _ in range(samples):
+        tracker.record('keithley', 'query :FETC?', duration)
+    return tracker.timeout_for('keithley', 'query :FETC?', 10000)
+
+
+def test_learned_timeout_backs_off_and_decays():
+    tracker = LatencyTracker(floor=0.0)
+    assert tracker.timeout_for('keithley', 'query :FETC?', 10000) == 10000  # too few samples
+    timeout = learned(tracker)
+    assert timeout == pytest.approx(301, abs=1)
+    tracker.note_timeout('keithley', 'query :FETC?')
+    assert tracker.timeout_for('keithley', 'query :FETC?', 10000) == pytest.approx(2 * timeout, abs=2)
+    tracker.note_timeout('keithley', 'query :FETC?')
+    tracker.note_timeout('keithley', 'query :FETC?')
+    tracker.note_timeout('keithley', 'query :FETC?')
+    tracker.note_timeout('keithley', 'query :FETC?')
+    assert tracker.timeout_for('keithley', 'query :FETC?', 5000) == 5000  # capped at the configured timeout
+    learned(tracker, samples=100)
+    assert tracker.timeout_for('keithley', 'query :FETC?', 10000) == pytest.approx(timeout, abs=1)
+
+
+def test_latency_is_learned_per_context():
+    tracker = LatencyTracker(floor=0.0)
+    tracker.set_context('keithley', (5, 1.0))
+    short = learned(tracker, 0.1)
+    tracker.set_context('keithley', (50, 10.0))
+    assert tracker.timeout_for('keithley', 'query :FETC?', 10000) == 10000
+    learned(tracker, 2.0)
+    tracker.set_context('keithley', (5, 1.0))
+    assert tracker.timeout_for('keithley', 'query :FETC?', 10000) == short
+
+
+class SlowResource:
+    """
+    Resource whose query reply takes reply_time ms: a shorter timeout raises a VISA timeout, the
+    reply can then still be read.
+    """
+    def __init__(self, reply_time):
+        self.reply_time = reply_time
+        self.timeout = 2000
+        self.pending = None
+        self.queries = 0
+
+    def query(self, command):
+        self.queries += 1
+        self.pending = '1.0'
+        return self.read()
+
+    def read(self):
+        if self.timeout < self.reply_time:
+            raise pyvisa.errors.VisaIOError(pyvisa.constants.StatusCode.error_timeout)
+        reply, self.pending = self.pending, None
+        return reply
+
+    def close(self):
+        pass
+
+
+class SlowResourceManager:
+    def __init__(self, resource):
+        self.resource = resource
+
+    def open_resource(self, address):
+        return self.resource
+
+
+class Driver:
+    def __init__(self, resource):
+        self.resource = resource
+        self.invalidated = False
+
+    def invalidate(self):
+        self.invalidated = True
+
+
+def test_query_past_learned_timeout_is_retried_at_configured_timeout():
+    resource = SlowResource(reply_time=0)
+    sessions = SessionManager(SlowResourceManager(resource), warn=lambda message: None)
+    sessions.retry_policy = RetryPolicy()
+    sessions.adaptive_timeouts = True
+    sessions.register('keithley', 'GPIB0::24::INSTR', Driver, 5000)
+    managed = sessions.resource('keithley')
+    for _ in range(20):
+        managed.query(':FETC?')
+    resource.reply_time = 1000  # e.g. more samples than the learned timeout was trained on
+    assert managed.query(':FETC?') == '1.0'
+    assert resource.queries == 21  # the reply was waited for, the query not sent again
+    assert sessions.retry_policy.retries == {'keithley': 1}
+    assert sessions.statistics()['keithley']['reconnects'] == 0
+    assert not sessions.driver('keithley').invalidated
+
+    resource.reply_time = 10000  # longer than the configured timeout: a real failure
+    with pytest.raises(pyvisa.errors.VisaIOError):
+        managed.query(':FETC?')
+    assert sessions.driver('keithley').invalidated
+
+
+def test_recovery_clears_the_late_reply_before_the_health_query():
+    resource = SlowResource(reply_time=0)
+    cleared = []
+    resource.clear = lambda: cleared.append(resource.pending)
+    sessions = SessionManager(SlowResourceManager(resource), warn=lambda message: None)
+    sessions.register('keithley', 'GPIB0::24::INSTR', Driver, 500)
+    managed = sessions.resource('keithley')
+    resource.reply_time = 1000
+    with pytest.raises(pyvisa.errors.VisaIOError):
+        managed.query(':FETC?')
+    assert cleared == ['1.0']